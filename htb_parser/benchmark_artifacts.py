@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark storing and re-reading converted writeups.
+
+Converts the golden fixtures once, then stores their page texts,
+blocks and markdown many times over (as if for a large archive) in a
+FileArtifactStore (one file per artifact) and a SegmentArtifactStore,
+and compares write time, disk footprint, file count and read-back time.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+from golden_harness import FIXTURES, REPO_ROOT, build_fixture_pdf
+from src.artifact_store import FileArtifactStore, SegmentArtifactStore
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+
+COPIES = 50
+
+def _documents(temp_dir: Path) -> dict:
+    """doc_key -> {(kind, page): bytes} for every fixture, captured from a real conversion."""
+    documents = {}
+    for name, source in FIXTURES.items():
+        pdf_path = temp_dir / f"{name}.pdf"
+        build_fixture_pdf(REPO_ROOT / source, pdf_path, name)
+        with SegmentArtifactStore(str(temp_dir / f"{name}-capture")) as store:
+            with PDFProcessor() as processor:
+                processor.load_pdf(str(pdf_path))
+                ConversionPipeline(artifact_store=store).convert(processor)
+            documents[name] = store.read_document(str(pdf_path))
+    return documents
+
+def _measure(store, documents: dict, root: Path) -> dict:
+    """Write every document COPIES times, then read each back."""
+    start = time.perf_counter()
+    for copy in range(COPIES):
+        for name, artifacts in documents.items():
+            for (kind, page), data in artifacts.items():
+                store.put(f"{name}-{copy}", kind, data, page)
+    store.flush()
+    write_seconds = time.perf_counter() - start
+
+    doc_keys = store.documents()
+    start = time.perf_counter()
+    for doc_key in doc_keys:
+        store.read_document(doc_key)
+    read_seconds = time.perf_counter() - start
+
+    files = [path for path in root.rglob("*") if path.is_file()]
+    return {
+        "write_seconds": write_seconds,
+        "read_ms_per_document": read_seconds * 1e3 / len(doc_keys),
+        "files": len(files),
+        "disk_bytes": sum(path.stat().st_size for path in files)
+    }
+
+def run_benchmark():
+    """Print footprint and timings for each store."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_dir = Path(temp_dir)
+        documents = _documents(temp_dir)
+        raw_bytes = COPIES * sum(len(data) for artifacts in documents.values() for data in artifacts.values())
+
+        print(f"📊 Artifact store benchmark ({COPIES * len(documents)} documents, {raw_bytes / 1e6:.1f} MB raw)")
+        print("=" * 60)
+        for name, make_store in [
+            ("one file per artifact", lambda root: FileArtifactStore(root)),
+            ("segments, zlib", lambda root: SegmentArtifactStore(root, codec="zlib")),
+            ("segments, zstd", lambda root: SegmentArtifactStore(root, codec="zstd")),
+            ("segments, zstd, mmap", lambda root: SegmentArtifactStore(root, codec="zstd", use_mmap=True)),
+        ]:
+            root = temp_dir / name.replace(" ", "").replace(",", "_")
+            with make_store(str(root)) as store:
+                result = _measure(store, documents, root)
+                codec = store.codec.name
+            print(f"{name} ({codec}):")
+            print(f"  write: {result['write_seconds']:.2f}s, read: {result['read_ms_per_document']:.2f} ms/doc, "
+                  f"{result['files']} files, {result['disk_bytes'] / 1e6:.1f} MB on disk")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark line classification on prose-heavy and mixed pages.
+
+Compares the full pattern cascade (no triggers), classify_line()
+with triggers, the batch path returning only content types
+(line_types()) and building blocks too (classify_lines()) and, when
+numpy is installed, the trained n-gram model backend. Repeated lines
+are classified once per batch, so the mixed corpus is also timed with
+every line unique.
+"""
+import time
+
+from src.content_analyzer import ContentAnalyzer
+from classification_corpus import corpus_lines, split_corpus
+from test_prefilter import classify_without_prefilter
+
+def _time(function, repeat: int = 3) -> float:
+    """Best wall-clock time of a few runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark():
+    """Print classification timings for prose-heavy and mixed input."""
+
+    analyzer = ContentAnalyzer()
+    mixed = corpus_lines()
+    prose = [line for line in mixed if analyzer.classify_line(line).content_type == "text"]
+    model_analyzer = _train_model_analyzer()
+
+    print("📊 Classification benchmark")
+    print("=" * 60)
+    unique = list(dict.fromkeys(mixed))
+    for name, lines in [("prose-heavy", prose), ("mixed", mixed), ("mixed, unique lines", unique)]:
+        full = _time(lambda: [classify_without_prefilter(analyzer, line) for line in lines])
+        single = _time(lambda: [analyzer.classify_line(line) for line in lines])
+        types = _time(lambda: analyzer.line_types(lines))
+        batch = _time(lambda: analyzer.classify_lines(lines))
+
+        print(f"{name} ({len(lines)} lines):")
+        print(f"  full cascade:      {full * 1e6 / len(lines):6.2f} µs/line")
+        print(f"  with triggers:     {single * 1e6 / len(lines):6.2f} µs/line ({full / single:.1f}x)")
+        print(f"  batch, types only: {types * 1e6 / len(lines):6.2f} µs/line ({full / types:.1f}x)")
+        print(f"  batch, blocks:     {batch * 1e6 / len(lines):6.2f} µs/line ({full / batch:.1f}x)")
+        if model_analyzer:
+            model = _time(lambda: model_analyzer.classify_lines(lines))
+            print(f"  n-gram model:      {model * 1e6 / len(lines):6.2f} µs/line ({full / model:.1f}x)")
+
+def _train_model_analyzer():
+    """Train the n-gram model on most documents and report agreement on the unseen rest."""
+    try:
+        from src.line_classifier import NgramLineClassifier
+    except ImportError:
+        print("ℹ️ numpy is not installed, skipping the n-gram model")
+        return None
+
+    training_lines, held_out = split_corpus()
+
+    start = time.perf_counter()
+    classifier, report = NgramLineClassifier.train_from_regex(training_lines)
+    training_time = time.perf_counter() - start
+
+    analyzer = ContentAnalyzer()
+    labels = analyzer.rules.content_types(held_out)
+    print(f"n-gram model: trained on {report['lines']} lines in {training_time:.1f}s, "
+          f"{classifier.evaluate(held_out, labels):.1%} agreement on {len(held_out)} held-out lines "
+          f"from unseen documents")
+    return ContentAnalyzer(backend=classifier)
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark page extraction when a caller wants text and page info.
+
+Compares separate page.get_text() / get_text("dict") / get_images()
+calls (every text query parses the page again) with one PageContext
+per page, and reports how many parses the context saved.
+"""
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from golden_harness import FIXTURES, REPO_ROOT, build_fixture_pdf
+from src.pdf_processor import PDFProcessor
+
+def _separate_calls(pdf_path: Path) -> float:
+    """Seconds for text plus page info with a parse per query."""
+    document = fitz.open(pdf_path)
+    start = time.perf_counter()
+    for page in document:
+        page.get_text()
+        len(page.get_text("dict")["blocks"])
+        len(page.get_images())
+        len(page.get_images())
+    seconds = time.perf_counter() - start
+    document.close()
+    return seconds
+
+def _page_context(pdf_path: Path) -> tuple:
+    """Seconds for text plus page info from one parse per page, and the stats."""
+    with PDFProcessor(profile="full") as processor:
+        processor.load_pdf(str(pdf_path))
+        start = time.perf_counter()
+        for page_number in range(len(processor.current_document)):
+            processor.extract_text_from_page(page_number)
+            processor.get_page_info(page_number)
+        seconds = time.perf_counter() - start
+        return seconds, processor.get_extraction_statistics()
+
+def run_benchmark():
+    """Print extraction timings for the golden fixtures."""
+
+    print("📊 Page extraction benchmark (text + page info)")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, source in FIXTURES.items():
+            pdf_path = Path(temp_dir) / f"{name}.pdf"
+            pages = build_fixture_pdf(REPO_ROOT / source, pdf_path, name)
+            separate = min(_separate_calls(pdf_path) for _ in range(3))
+            shared, stats = min((_page_context(pdf_path) for _ in range(3)), key=lambda run: run[0])
+            print(f"{name} ({pages} pages):")
+            print(f"  separate calls: {separate * 1e3:7.2f} ms")
+            print(f"  page context:   {shared * 1e3:7.2f} ms ({separate / shared:.1f}x), "
+                  f"{stats['textpages_built']} parses, {stats['reparses_avoided']} avoided")
+
+if __name__ == "__main__":
+    run_benchmark()
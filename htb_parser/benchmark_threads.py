@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark a SharedClassifier used by several threads at once.
+
+Every thread classifies the whole corpus with the same shared
+instance. On a regular CPython build the GIL serializes the regex
+work, so throughput stays flat; on a free-threaded build (python3.13t
+and later) it should grow with the number of threads.
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.compiled_rules import SharedClassifier, shared_rules
+from classification_corpus import corpus_lines
+
+THREAD_COUNTS = [1, 2, 4, 8]
+
+def _gil_enabled() -> bool:
+    """Whether this interpreter runs with the GIL."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+def _throughput(classifier: SharedClassifier, lines, threads: int, batch: bool) -> float:
+    """Lines per second with every thread classifying all lines."""
+    def work(_):
+        if batch:
+            classifier.classify_lines(lines)
+        else:
+            for line in lines:
+                classifier.classify_line(line)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        list(executor.map(work, range(threads)))
+        seconds = time.perf_counter() - start
+    return threads * len(lines) / seconds
+
+def run_benchmark():
+    """Print throughput and scaling for 1 to 8 threads."""
+
+    lines = corpus_lines()
+    rules = shared_rules()
+
+    print("📊 Shared classifier thread scaling")
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if _gil_enabled() else 'disabled'}")
+    print("=" * 60)
+    for name, cache_size, batch in [("per line, no cache", 0, False),
+                                    ("per line, per-thread LRU", 4096, False),
+                                    ("batch scan", 0, True)]:
+        classifier = SharedClassifier(rules, cache_size=cache_size)
+        baseline = None
+        print(f"{name}:")
+        for threads in THREAD_COUNTS:
+            speed = _throughput(classifier, lines, threads, batch)
+            baseline = baseline or speed
+            print(f"   {threads} threads: {speed:>12,.0f} lines/s  ({speed / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,67 @@
+"""
+Shared line corpus for the classification tests and benchmarks.
+
+Every line of the writeups and notes in this repository, plus a few
+tricky one-liners, so the batch, prefilter, model and thread-shared
+classifiers are all checked against the same real-world input.
+Generated files (the golden outputs, tool caches) are left out: they
+are the parser's own output for the same writeups.
+"""
+import random
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Directories holding generated markdown rather than source documents
+EXCLUDED_DIRS = {"golden", ".pytest_cache", ".git"}
+
+def corpus_documents() -> Dict[str, List[str]]:
+    """Lines of every source document, keyed by its path relative to the repository."""
+    paths = sorted(path for path in REPO_ROOT.rglob("*.md")
+                   if not EXCLUDED_DIRS.intersection(path.relative_to(REPO_ROOT).parts))
+    documents = {}
+    for path in paths + [Path(__file__).parent / "extracted_text.txt"]:
+        text = path.read_text(encoding="utf-8", errors="replace")
+        documents[path.relative_to(REPO_ROOT).as_posix()] = text.split("\n")
+    return documents
+
+def corpus_lines():
+    """Lines from the writeups and notes in this repository."""
+    lines = []
+    for document_lines in corpus_documents().values():
+        lines.extend(document_lines)
+    # Tricky cases: patterns that could match across line breaks
+    lines.extend(["", "FOO", "bar", "hello", "-x", "def", "foo(", "EXPLOITATION", "x" * 120 + "A",
+                  "A" * 101, "port", "22", "C:", "\\Windows", "~/", "$ ls", "#!s", "10.10.10.1:8080"])
+    return lines
+
+def split_corpus(held_out_share: float = 0.2, seed: int = 0) -> Tuple[List[str], List[str]]:
+    """
+    Split the corpus into training and held-out lines by source document.
+
+    Whole documents are held out, so a model is scored on writeups it
+    has never seen. Lines are stripped and deduplicated, and held-out
+    lines that also occur in a training document are dropped, so
+    repeated commands and boilerplate can't inflate the agreement.
+
+    Args:
+        held_out_share: Share of the corpus lines to hold out (at least)
+        seed: Seed for the document order
+
+    Returns:
+        (training lines, held-out lines)
+    """
+    documents = list(corpus_documents().values())
+    random.Random(seed).shuffle(documents)
+    held_out_target = sum(len(lines) for lines in documents) * held_out_share
+
+    training, held_out = [], []
+    for lines in documents:
+        (held_out if len(held_out) < held_out_target else training).extend(lines)
+
+    training = list(dict.fromkeys(line.strip() for line in training if line.strip()))
+    seen = set(training)
+    held_out = [line for line in dict.fromkeys(line.strip() for line in held_out if line.strip())
+                if line not in seen]
+    return training, held_out
@@ -2,12 +2,12 @@
 from src.pdf_processor import PDFProcessor
 from src.content_analyzer import ContentAnalyzer
 from src.markdown_generator import MarkdownGenerator
+from src.pipeline import ConversionPipeline
 
 def complete_pdf_to_markdown():
     """Complete test of PDF to Markdown conversion."""
     
     # Initialize all components
-    pdf_processor = PDFProcessor()
     content_analyzer = ContentAnalyzer()
     markdown_generator = MarkdownGenerator()
     
@@ -15,7 +15,11 @@ def complete_pdf_to_markdown():
     pdf_path = input("Enter PDF file path: ")
     output_path = input("Enter output markdown file path (e.g., output.md): ")
     
-    if pdf_processor.load_pdf(pdf_path):
+    # The with-block closes the document even if a step below fails
+    with PDFProcessor() as pdf_processor:
+        if not pdf_processor.load_pdf(pdf_path):
+            return
+        
         print("📄 Processing PDF...")
         
         # Get document info for metadata
@@ -63,12 +67,12 @@ def complete_pdf_to_markdown():
             percentage = (count / stats['total_blocks']) * 100
             print(f"  {content_type:10s}: {count:3d} ({percentage:5.1f}%)")
         
-        pdf_processor.close_document()
-        
         # Ask if user wants to preview
         preview = input("\nWould you like to preview the first 20 lines? [y/n]: ")
         if preview.lower() == 'y':
-            lines = final_markdown.split('\n')[:20]
+            # Only the pages needed for 20 lines are extracted again
+            pipeline = ConversionPipeline(content_analyzer, markdown_generator)
+            lines = pipeline.preview_markdown(pdf_processor, max_lines=20)
             print("\n" + "="*60)
             print("MARKDOWN PREVIEW:")
             print("="*60)
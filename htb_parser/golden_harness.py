@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Golden-output regression harness for the full conversion pipeline.
+
+Builds fixture PDFs from the writeups in this repository, converts
+them with ConversionPipeline and compares the markdown and the block
+classifications with the stored outputs in golden/. Throughput is
+measured on every run, so a rewrite of classification or rendering
+can be checked for both correctness and speed. Recorded throughput is
+specific to the machine, so golden/throughput.jsonl is not committed:
+record a baseline locally before a change and compare after it.
+
+Usage:
+    python golden_harness.py            # compare and print throughput
+    python golden_harness.py --record   # ...and append it to golden/throughput.jsonl
+    python golden_harness.py --update   # rewrite the golden outputs (after a wanted change)
+"""
+import difflib
+import io
+import json
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from src.block_exporter import BlockExporter
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+THROUGHPUT_LOG = GOLDEN_DIR / "throughput.jsonl"
+
+# Slowest run accepted relative to the last recorded one; timings on a
+# busy machine easily vary by a third
+MIN_THROUGHPUT_RATIO = 0.5
+
+# Fixture name -> writeup the fixture PDF is typeset from
+FIXTURES = {
+    "meow": "meow_notes/htb_meow_wiki_outline.md",
+    "fawn": "fawn_notes/fawn_writeup.md",
+    "dancing": "dancing_notes/dancing_writeup.md",
+    "redeemer": "redeemer_notes/redeemer_writeup.md",
+    "archetype": "archetype/archetype_writeup.md",
+    "oopsie": "oopsie/oopsie_writeup.md",
+}
+
+# Fixed page layout so the fixtures extract the same way on every run
+FONT_NAME = "cour"
+FONT_SIZE = 9
+LINE_HEIGHT = 1.25
+LINES_PER_PAGE = 64
+WRAP_WIDTH = 90
+MARGIN = 50
+
+def build_fixture_pdf(source_path: Path, pdf_path: Path, title: str) -> int:
+    """
+    Typeset a markdown writeup as a plain monospaced PDF.
+
+    Long lines are wrapped so nothing runs off the page.
+
+    Returns:
+        Number of pages written
+    """
+    lines = []
+    for line in source_path.read_text(encoding="utf-8").split("\n"):
+        lines.extend(textwrap.wrap(line, WRAP_WIDTH, drop_whitespace=False) or [""])
+
+    document = fitz.open()
+    for start in range(0, len(lines), LINES_PER_PAGE):
+        page = document.new_page()
+        page.insert_text((MARGIN, MARGIN), "\n".join(lines[start:start + LINES_PER_PAGE]),
+                         fontname=FONT_NAME, fontsize=FONT_SIZE, lineheight=LINE_HEIGHT)
+    document.set_metadata({"title": title})
+    page_count = len(document)
+    document.save(pdf_path)
+    document.close()
+    return page_count
+
+def convert_fixture(name: str, pdf_path: Path, pipeline: ConversionPipeline) -> Dict:
+    """Run the full pipeline on one fixture and serialize its outputs."""
+    with PDFProcessor() as processor:
+        assert processor.load_pdf(str(pdf_path))
+        start = time.perf_counter()
+        result = pipeline.convert(processor)
+        seconds = time.perf_counter() - start
+        page_count = len(processor.current_document)
+
+    blocks = io.StringIO()
+    BlockExporter(include_empty=True).write_jsonl(result["content_blocks"], blocks, doc_key=name)
+
+    return {
+        "markdown": result["markdown"],
+        "blocks": blocks.getvalue(),
+        "pages": page_count,
+        "lines": len(result["content_blocks"]),
+        "seconds": seconds,
+    }
+
+def golden_paths(name: str) -> Dict[str, Path]:
+    """Stored outputs of a fixture."""
+    return {
+        "markdown": GOLDEN_DIR / f"{name}.md",
+        "blocks": GOLDEN_DIR / f"{name}.blocks.jsonl",
+    }
+
+def diff_with_golden(name: str, output: Dict, max_lines: int = 40) -> List[str]:
+    """Unified diff of a fixture's outputs against the golden files (empty if equal)."""
+    diff = []
+    for kind, path in golden_paths(name).items():
+        expected = path.read_text(encoding="utf-8") if path.exists() else ""
+        if output[kind] != expected:
+            diff.extend(difflib.unified_diff(
+                expected.splitlines(), output[kind].splitlines(),
+                f"golden/{path.name}", f"actual/{path.name}", lineterm=""
+            ))
+    return diff[:max_lines]
+
+def write_golden(name: str, output: Dict):
+    """Store a fixture's outputs as the new golden files."""
+    GOLDEN_DIR.mkdir(exist_ok=True)
+    for kind, path in golden_paths(name).items():
+        path.write_text(output[kind], encoding="utf-8")
+
+def run_harness(update: bool = False) -> Dict:
+    """
+    Convert every fixture and compare it with the golden outputs.
+
+    Args:
+        update: Overwrite the golden outputs instead of comparing
+
+    Returns:
+        Dictionary with per-fixture diffs and throughput, plus totals
+    """
+    pipeline = ConversionPipeline()
+    report = {"fixtures": {}, "pages": 0, "lines": 0, "seconds": 0.0}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name, source in FIXTURES.items():
+            pdf_path = Path(temp_dir) / f"{name}.pdf"
+            build_fixture_pdf(REPO_ROOT / source, pdf_path, name)
+            output = convert_fixture(name, pdf_path, pipeline)
+
+            if update:
+                write_golden(name, output)
+            report["fixtures"][name] = {
+                "diff": [] if update else diff_with_golden(name, output),
+                "pages": output["pages"],
+                "lines": output["lines"],
+                "lines_per_second": output["lines"] / output["seconds"],
+            }
+            for key in ("pages", "lines", "seconds"):
+                report[key] += output[key]
+
+    report["lines_per_second"] = report["lines"] / report["seconds"]
+    report["pages_per_second"] = report["pages"] / report["seconds"]
+    return report
+
+def record_throughput(report: Dict):
+    """Append the run's throughput to golden/throughput.jsonl."""
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "pages": report["pages"],
+        "lines": report["lines"],
+        "lines_per_second": round(report["lines_per_second"]),
+        "pages_per_second": round(report["pages_per_second"], 1),
+    }
+    with open(THROUGHPUT_LOG, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + "\n")
+
+def last_recorded_throughput() -> Dict:
+    """Most recent entry of golden/throughput.jsonl (empty if there is none)."""
+    if not THROUGHPUT_LOG.exists():
+        return {}
+    entries = THROUGHPUT_LOG.read_text(encoding="utf-8").splitlines()
+    return json.loads(entries[-1]) if entries else {}
+
+def throughput_ratio(report: Dict) -> Optional[float]:
+    """Throughput of a run relative to the last recorded one (None without a recording)."""
+    baseline = last_recorded_throughput()
+    if not baseline:
+        return None
+    return report["lines_per_second"] / baseline["lines_per_second"]
+
+def print_report(report: Dict):
+    """Print diffs and throughput, compared with the last recorded run."""
+    print("📊 Golden-output harness")
+    print("=" * 60)
+    for name, fixture in report["fixtures"].items():
+        status = "✅" if not fixture["diff"] else "❌"
+        print(f"{status} {name}: {fixture['pages']} pages, {fixture['lines']} lines, "
+              f"{fixture['lines_per_second']:,.0f} lines/s")
+        for line in fixture["diff"]:
+            print(f"     {line}")
+
+    print(f"Total: {report['lines_per_second']:,.0f} lines/s, "
+          f"{report['pages_per_second']:,.1f} pages/s")
+    ratio = throughput_ratio(report)
+    if ratio is not None:
+        baseline = last_recorded_throughput()
+        print(f"Last recorded ({baseline['timestamp']}): {baseline['lines_per_second']:,} lines/s "
+              f"({ratio:.2f}x)")
+
+if __name__ == "__main__":
+    update = "--update" in sys.argv
+    report = run_harness(update=update)
+    print_report(report)
+    if "--record" in sys.argv:
+        record_throughput(report)
+    if update:
+        print(f"✏️  Golden outputs written to {GOLDEN_DIR}")
+    elif any(fixture["diff"] for fixture in report["fixtures"].values()):
+        sys.exit(1)
@@ -0,0 +1,475 @@
+# src/archive_ingestor.py
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterator, Optional, Tuple
+from src.header_footer_filter import HeaderFooterFilter
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+
+
+# Output archive suffixes and the tarfile mode used to write them
+TAR_WRITE_MODES = {
+    ".tar": "w",
+    ".tar.gz": "w:gz",
+    ".tgz": "w:gz",
+    ".tar.bz2": "w:bz2",
+    ".tar.xz": "w:xz",
+}
+
+
+def convert_pdf_bytes(member_name: str, pdf_data: bytes, memory_budget: Optional[int] = None,
+                      classifier_backend: str = "regex", strip_headers: bool = False) -> Dict:
+    """
+    Convert one in-memory PDF to markdown.
+
+    This lives at module level so worker processes can run it. With a
+    memory budget the markdown is streamed to a temporary file and its
+    path is returned instead of the text, so neither the worker nor the
+    parent has to hold a giant document as one string.
+
+    Args:
+        member_name: Name of the PDF inside the archive
+        pdf_data: Raw bytes of the PDF
+        memory_budget: Per-document memory budget (see ConversionPipeline)
+        classifier_backend: "regex" or "ngram" (see ConversionPipeline)
+        strip_headers: Remove running headers, footers and page numbers
+                       (see src/header_footer_filter.py)
+
+    Returns:
+        Processing result dictionary with "markdown" (the text) or
+        "markdown_path" (a temporary file the caller must remove)
+    """
+    start_time = time.time()
+    markdown_path = None
+
+    try:
+        with PDFProcessor() as pdf_processor:
+            if not pdf_processor.load_pdf_from_bytes(pdf_data, member_name):
+                return {
+                    "success": False,
+                    "input_file": member_name,
+                    "error": "Failed to load PDF",
+                    "processing_time": time.time() - start_time
+                }
+
+            pipeline = ConversionPipeline(memory_budget=memory_budget, classifier_backend=classifier_backend,
+                                          header_filter=HeaderFooterFilter() if strip_headers else None)
+            fallback_title = PurePosixPath(member_name).stem
+            if memory_budget is None:
+                result = pipeline.convert(pdf_processor, fallback_title=fallback_title)
+                output = {"markdown": result["markdown"], "output_size": len(result["markdown"])}
+            else:
+                handle, markdown_path = tempfile.mkstemp(prefix="htb_archive_", suffix=".md")
+                os.close(handle)
+                result = pipeline.convert_to_file(pdf_processor, markdown_path, fallback_title=fallback_title,
+                                                  save_section_index=False)
+                output = {"markdown_path": markdown_path, "output_size": os.path.getsize(markdown_path)}
+
+        return {
+            "success": True,
+            "input_file": member_name,
+            "pages": result["doc_info"].get("pages", 0),
+            "content_blocks": result["statistics"]["total_blocks"],
+            "processing_time": time.time() - start_time,
+            **output
+        }
+
+    except Exception as e:
+        if markdown_path and os.path.exists(markdown_path):
+            os.remove(markdown_path)
+        return {
+            "success": False,
+            "input_file": member_name,
+            "error": str(e),
+            "processing_time": time.time() - start_time
+        }
+
+
+class ArchiveIngestor:
+    """
+    Converts PDFs straight out of zip/tar archives.
+
+    This is like reading the letters in a parcel without unpacking the
+    whole parcel onto the floor: every PDF is read into memory, converted,
+    and only the markdown is written out.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, use_processes: bool = True,
+                 memory_budget: Optional[int] = None, classifier_backend: str = "regex",
+                 strip_headers: bool = False):
+        """
+        Initialize the archive ingestor.
+
+        Args:
+            max_workers: Number of parallel workers (default: CPU count)
+            use_processes: Use worker processes (True) or threads (False)
+            memory_budget: Bytes of blocks, page texts and markdown each worker
+                           keeps in memory before spilling to disk (None: no limit)
+            classifier_backend: "regex" rules or the trained "ngram" model
+                                (see src/line_classifier.py)
+            strip_headers: Remove running headers, footers and page numbers
+                           (see src/header_footer_filter.py)
+        """
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.memory_budget = memory_budget
+        self.classifier_backend = classifier_backend
+        self.strip_headers = strip_headers
+
+        # Statistics tracking
+        self.processed_files = 0
+        self.failed_files = 0
+
+    def iter_pdf_members(self, archive_path: str) -> Iterator[Tuple[str, bytes]]:
+        """
+        Stream PDF members out of a zip or tar archive.
+
+        Args:
+            archive_path: Path to the archive
+
+        Yields:
+            (member name, PDF bytes) for every PDF in the archive
+        """
+        path = Path(archive_path)
+
+        if zipfile.is_zipfile(path):
+            yield from self._iter_zip_members(path)
+        elif tarfile.is_tarfile(path):
+            yield from self._iter_tar_members(path)
+        else:
+            raise ValueError(f"Unsupported archive format: {archive_path}")
+
+    def _iter_zip_members(self, path: Path) -> Iterator[Tuple[str, bytes]]:
+        """Yield PDF members from a zip archive one at a time."""
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and self._is_pdf_name(info.filename):
+                    yield info.filename, archive.read(info)
+
+    def _iter_tar_members(self, path: Path) -> Iterator[Tuple[str, bytes]]:
+        """Yield PDF members from a (possibly compressed) tar archive."""
+        # "r|*" reads the tar as a stream, so no seeking or temp files
+        with tarfile.open(path, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile() and self._is_pdf_name(member.name):
+                    member_file = archive.extractfile(member)
+                    if member_file is not None:
+                        yield member.name, member_file.read()
+
+    def _is_pdf_name(self, name: str) -> bool:
+        """Check if an archive member name looks like a PDF."""
+        return name.lower().endswith(".pdf")
+
+    def process_archive(self, archive_path: str, output: str) -> Dict:
+        """
+        Convert every PDF in an archive and write the markdown outputs.
+
+        Args:
+            archive_path: zip or tar archive containing PDFs
+            output: Output directory, or an output archive path
+                    (.zip, .tar, .tar.gz, .tgz, .tar.bz2, .tar.xz)
+
+        Returns:
+            Batch processing summary
+        """
+        print(f"🚀 Starting archive ingestion...")
+        print(f"   Input: {archive_path}")
+        print(f"   Output: {output}")
+
+        results = []
+        start_time = time.time()
+
+        with self._open_writer(output) as writer:
+            for output_name, result in self._convert_members(self.iter_pdf_members(archive_path)):
+                if result["success"]:
+                    if "markdown_path" in result:
+                        markdown_path = result.pop("markdown_path")
+                        try:
+                            result["output_file"] = writer.write_file(output_name, markdown_path)
+                        finally:
+                            os.remove(markdown_path)
+                    else:
+                        result["output_file"] = writer.write(output_name, result.pop("markdown"))
+                    self.processed_files += 1
+                    print(f"   ✅ {result['input_file']} in {result['processing_time']:.1f}s")
+                else:
+                    self.failed_files += 1
+                    print(f"   ❌ {result['input_file']}: {result['error']}")
+                results.append(result)
+
+        total_time = time.time() - start_time
+        summary = {
+            "total_files": len(results),
+            "processed_successfully": self.processed_files,
+            "failed": self.failed_files,
+            "total_time": total_time,
+            "average_time_per_file": total_time / len(results) if results else 0.0,
+            "results": results
+        }
+
+        self._print_summary(summary)
+        return summary
+
+    def _convert_members(self, members: Iterator[Tuple[str, bytes]]) -> Iterator[Tuple[str, Dict]]:
+        """
+        Run conversions in parallel while keeping few PDFs in memory.
+
+        Output names are given out in archive order before a member is
+        submitted, so colliding members get the same names on every run.
+        A worker process that dies takes every in-flight conversion of its
+        pool with it; those members are converted again one at a time on
+        a fresh pool, and only a member that also crashes alone fails.
+
+        Yields:
+            (output name, processing result) for every member
+        """
+        worker_count = self.max_workers or os.cpu_count() or 1
+        # Only read ahead a couple of members per worker
+        max_in_flight = 2 * worker_count
+        used_names = set()
+        pending = {}  # future -> (member name, output name, PDF bytes)
+        executor = self._new_executor(worker_count)
+
+        try:
+            for member_name, pdf_data in members:
+                output_name = unique_output_name(markdown_member_name(member_name), used_names)
+                if len(pending) >= max_in_flight:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    crashed = yield from self._collect_results(done, pending)
+                    if crashed:
+                        executor = yield from self._replace_broken_pool(executor, worker_count, pending, crashed)
+                try:
+                    future = self._submit(executor, member_name, pdf_data)
+                except BrokenProcessPool:
+                    executor = yield from self._replace_broken_pool(executor, worker_count, pending, [])
+                    future = self._submit(executor, member_name, pdf_data)
+                pending[future] = (member_name, output_name, pdf_data)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                crashed = yield from self._collect_results(done, pending)
+                if crashed:
+                    executor = yield from self._replace_broken_pool(executor, worker_count, pending, crashed)
+        finally:
+            executor.shutdown()
+
+    def _new_executor(self, worker_count: int):
+        """Create a process or thread pool."""
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        return executor_class(max_workers=worker_count)
+
+    def _submit(self, executor, member_name: str, pdf_data: bytes):
+        """Submit one member conversion to a pool."""
+        return executor.submit(convert_pdf_bytes, member_name, pdf_data,
+                               self.memory_budget, self.classifier_backend, self.strip_headers)
+
+    def _collect_results(self, done, pending: Dict):
+        """
+        Yield the results of finished conversions, in archive order.
+
+        Returns:
+            (member name, output name, PDF bytes) of the members whose
+            worker process crashed
+        """
+        crashed = []
+        for future in [future for future in pending if future in done]:
+            member_name, output_name, pdf_data = pending.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                crashed.append((member_name, output_name, pdf_data))
+                continue
+            yield output_name, result
+        return crashed
+
+    def _replace_broken_pool(self, executor, worker_count: int, pending: Dict, crashed: list):
+        """
+        Swap a crashed pool for a new one after re-running its members alone.
+
+        Returns:
+            The new pool
+        """
+        # Every other in-flight conversion either finished or broke with the pool
+        done, _ = wait(pending)
+        crashed = crashed + (yield from self._collect_results(done, pending))
+        executor.shutdown(wait=False)
+
+        for member_name, output_name, pdf_data in crashed:
+            yield output_name, self._convert_alone(member_name, pdf_data)
+        return self._new_executor(worker_count)
+
+    def _convert_alone(self, member_name: str, pdf_data: bytes) -> Dict:
+        """Convert one member on its own pool, failing it only if its worker dies."""
+        executor = self._new_executor(1)
+        try:
+            return self._submit(executor, member_name, pdf_data).result()
+        except BrokenProcessPool:
+            return {
+                "success": False,
+                "input_file": member_name,
+                "error": "Worker process crashed",
+                "processing_time": 0.0
+            }
+        finally:
+            executor.shutdown()
+
+    def _open_writer(self, output: str):
+        """Choose a writer for an output directory or archive."""
+        name = output.lower()
+        if name.endswith(".zip"):
+            return ZipOutputWriter(output)
+        for suffix, mode in TAR_WRITE_MODES.items():
+            if name.endswith(suffix):
+                return TarOutputWriter(output, mode)
+        return DirectoryOutputWriter(output)
+
+    def _print_summary(self, summary: Dict):
+        """Print archive ingestion summary."""
+        print(f"\n{'='*60}")
+        print(f"📊 ARCHIVE INGESTION SUMMARY")
+        print(f"{'='*60}")
+        print(f"Total files: {summary['total_files']}")
+        print(f"Successful: {summary['processed_successfully']}")
+        print(f"Failed: {summary['failed']}")
+        print(f"Total time: {summary['total_time']:.1f} seconds")
+
+        if summary['failed'] > 0:
+            print(f"\n❌ Failed files:")
+            for result in summary['results']:
+                if not result['success']:
+                    print(f"   - {result['input_file']}: {result['error']}")
+
+
+def markdown_member_name(member_name: str) -> str:
+    """
+    Turn an archive member name into a safe relative markdown file name.
+
+    "packs/../meow.pdf" becomes "packs/meow.md" - parent references and
+    absolute prefixes are dropped so outputs can't escape the target.
+    """
+    parts = [part for part in PurePosixPath(member_name.replace("\\", "/")).parts
+             if part not in ("", ".", "..", "/")]
+    if not parts:
+        parts = ["document.pdf"]
+    return str(PurePosixPath(*parts).with_suffix(".md"))
+
+
+def unique_output_name(name: str, used_names: set) -> str:
+    """
+    Make an output name unique among the names already written.
+
+    "meow.pdf" and "./meow.pdf" both map to "meow.md"; the second one
+    becomes "meow-2.md" instead of overwriting the first. Names are
+    compared case-insensitively so outputs also survive extraction on
+    case-insensitive file systems.
+
+    Args:
+        name: Output name from markdown_member_name()
+        used_names: Lower-cased names already taken (updated in place)
+    """
+    path = PurePosixPath(name)
+    candidate = name
+    counter = 2
+    while candidate.lower() in used_names:
+        candidate = str(path.with_name(f"{path.stem}-{counter}{path.suffix}"))
+        counter += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+
+class DirectoryOutputWriter:
+    """Writes markdown outputs into a directory tree."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir)
+
+    def __enter__(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def write(self, output_name: str, markdown: str) -> str:
+        """Write one markdown file under a relative output name and return its path."""
+        output_file = self.output_dir / output_name
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(markdown)
+        return str(output_file)
+
+    def write_file(self, output_name: str, markdown_path: str) -> str:
+        """Copy a markdown file into place and return its path."""
+        output_file = self.output_dir / output_name
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(markdown_path, output_file)
+        return str(output_file)
+
+
+class ZipOutputWriter:
+    """Writes markdown outputs into a zip archive."""
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.archive = None
+
+    def __enter__(self):
+        self.archive = zipfile.ZipFile(self.output_path, "w", compression=zipfile.ZIP_DEFLATED)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.archive.close()
+        return False
+
+    def write(self, output_name: str, markdown: str) -> str:
+        """Add one markdown member and return its name."""
+        self.archive.writestr(output_name, markdown.encode("utf-8"))
+        return output_name
+
+    def write_file(self, output_name: str, markdown_path: str) -> str:
+        """Add a markdown file as a member, streaming it in, and return its name."""
+        self.archive.write(markdown_path, output_name)
+        return output_name
+
+
+class TarOutputWriter:
+    """Writes markdown outputs into a (possibly compressed) tar archive."""
+
+    def __init__(self, output_path: str, mode: str = "w"):
+        self.output_path = output_path
+        self.mode = mode
+        self.archive = None
+
+    def __enter__(self):
+        self.archive = tarfile.open(self.output_path, self.mode)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.archive.close()
+        return False
+
+    def write(self, output_name: str, markdown: str) -> str:
+        """Add one markdown member and return its name."""
+        data = markdown.encode("utf-8")
+        info = tarfile.TarInfo(output_name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        self.archive.addfile(info, io.BytesIO(data))
+        return output_name
+
+    def write_file(self, output_name: str, markdown_path: str) -> str:
+        """Add a markdown file as a member, streaming it in, and return its name."""
+        info = tarfile.TarInfo(output_name)
+        info.size = os.path.getsize(markdown_path)
+        info.mtime = int(time.time())
+        with open(markdown_path, 'rb') as f:
+            self.archive.addfile(info, f)
+        return output_name
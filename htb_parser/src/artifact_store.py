@@ -0,0 +1,629 @@
+# src/artifact_store.py
+import hashlib
+import json
+import mmap
+import shutil
+import sqlite3
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.content_analyzer import ContentBlock
+
+try:
+    import zstandard
+except ImportError:
+    # zstd is optional - the stores fall back to zlib without it
+    zstandard = None
+
+
+# Page number used for artifacts that belong to the whole document
+# (pages themselves are 1-based, like ContentBlock.page_number)
+DOCUMENT_PAGE = 0
+
+
+class Codec:
+    """Compresses artifact bytes; the name is stored with every record."""
+
+    name = "none"
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def compressor(self):
+        """An object with compress(chunk) and flush() for data written in chunks."""
+        return _Passthrough()
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class _Passthrough:
+    """Streaming "compressor" of the none codec."""
+
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class ZlibCodec(Codec):
+    """zlib (deflate) from the standard library."""
+
+    name = "zlib"
+
+    def __init__(self, level: int = 6):
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def compressor(self):
+        return zlib.compressobj(self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCodec(Codec):
+    """Zstandard via the optional zstandard package."""
+
+    name = "zstd"
+
+    def __init__(self, level: int = 3):
+        if zstandard is None:
+            raise ImportError("zstd compression needs the zstandard package")
+        self.level = level
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def compressor(self):
+        return self._compressor.compressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        # Streamed frames don't record their size, so always decompress as a stream
+        return self._decompressor.decompressobj().decompress(data)
+
+
+def get_codec(name: str = "zstd", fallback: bool = True) -> Codec:
+    """
+    Create a codec by name.
+
+    For writing, "zstd" falls back to zlib when the zstandard package
+    is missing, so stores work everywhere; the codec actually used is
+    recorded per artifact. Reading passes fallback=False, since zstd
+    data can only be read with zstandard installed.
+    """
+    if name == "zstd":
+        return ZstdCodec() if zstandard is not None or not fallback else ZlibCodec()
+    if name == "zlib":
+        return ZlibCodec()
+    if name == "none":
+        return Codec()
+    raise ValueError(f"Unknown codec: {name} (choose from zstd, zlib, none)")
+
+
+class ArtifactStore(ABC):
+    """
+    Where the pipeline keeps page texts, classified blocks and markdown.
+
+    Artifacts are addressed by (document key, kind, page); page 0
+    (DOCUMENT_PAGE) holds whole-document artifacts such as the
+    markdown. Subclass this to store artifacts somewhere else.
+    """
+
+    @abstractmethod
+    def put(self, doc_key: str, kind: str, data: bytes, page: int = DOCUMENT_PAGE):
+        """Store one artifact (replacing an earlier one with the same address)."""
+
+    @abstractmethod
+    def put_chunks(self, doc_key: str, kind: str, chunks: Iterable[bytes], page: int = DOCUMENT_PAGE):
+        """Store one artifact that arrives in chunks, without joining them in memory."""
+
+    @abstractmethod
+    def get(self, doc_key: str, kind: str, page: int = DOCUMENT_PAGE) -> Optional[bytes]:
+        """Read one artifact, or None if it isn't stored."""
+
+    @abstractmethod
+    def read_document(self, doc_key: str, kind: Optional[str] = None) -> Dict[Tuple[str, int], bytes]:
+        """Read every artifact of a document (or of one kind): (kind, page) -> bytes."""
+
+    @abstractmethod
+    def delete_document(self, doc_key: str):
+        """Remove every artifact of a document (e.g. before it is converted again)."""
+
+    @abstractmethod
+    def documents(self) -> List[str]:
+        """Keys of all stored documents."""
+
+    def iter_pages(self, doc_key: str, kind: str) -> Iterator[Tuple[int, bytes]]:
+        """(page, bytes) for the page artifacts of one kind, in page order."""
+        artifacts = self.read_document(doc_key, kind)
+        for (_, page), data in sorted(artifacts.items(), key=lambda item: item[0][1]):
+            if page != DOCUMENT_PAGE:
+                yield page, data
+
+    def flush(self):
+        """Write out anything still buffered."""
+
+    def close(self):
+        """Flush and release files."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class FileArtifactStore(ArtifactStore):
+    """
+    One (optionally compressed) file per artifact.
+
+    Simple and easy to inspect, but thousands of writeups mean hundreds
+    of thousands of small files; SegmentArtifactStore avoids that.
+    """
+
+    def __init__(self, root: str, codec: str = "none"):
+        """
+        Args:
+            root: Directory the artifacts are written to
+            codec: Compression for the files ("zstd", "zlib" or "none")
+        """
+        self.root = Path(root)
+        self.codec = get_codec(codec)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _document_dir(self, doc_key: str) -> Path:
+        """Directory of one document, named after a hash of its key."""
+        return self.root / hashlib.sha1(doc_key.encode("utf-8")).hexdigest()
+
+    def _artifact_path(self, doc_key: str, kind: str, page: int) -> Path:
+        """File of one artifact, creating its document directory if needed."""
+        document_dir = self._document_dir(doc_key)
+        if not document_dir.exists():
+            document_dir.mkdir()
+            (document_dir / "doc_key").write_text(doc_key, encoding="utf-8")
+        return document_dir / f"{kind}-{page}.{self.codec.name}"
+
+    def put(self, doc_key: str, kind: str, data: bytes, page: int = DOCUMENT_PAGE):
+        self._artifact_path(doc_key, kind, page).write_bytes(self.codec.compress(data))
+
+    def put_chunks(self, doc_key: str, kind: str, chunks: Iterable[bytes], page: int = DOCUMENT_PAGE):
+        compressor = self.codec.compressor()
+        with open(self._artifact_path(doc_key, kind, page), 'wb') as f:
+            for chunk in chunks:
+                f.write(compressor.compress(chunk))
+            f.write(compressor.flush())
+
+    def get(self, doc_key: str, kind: str, page: int = DOCUMENT_PAGE) -> Optional[bytes]:
+        for path in self._document_dir(doc_key).glob(f"{kind}-{page}.*"):
+            return get_codec(path.suffix[1:], fallback=False).decompress(path.read_bytes())
+        return None
+
+    def read_document(self, doc_key: str, kind: Optional[str] = None) -> Dict[Tuple[str, int], bytes]:
+        artifacts = {}
+        for path in self._document_dir(doc_key).glob(f"{kind or '*'}-*.*"):
+            file_kind, _, page = path.stem.rpartition("-")
+            codec = get_codec(path.suffix[1:], fallback=False)
+            artifacts[(file_kind, int(page))] = codec.decompress(path.read_bytes())
+        return artifacts
+
+    def delete_document(self, doc_key: str):
+        shutil.rmtree(self._document_dir(doc_key), ignore_errors=True)
+
+    def documents(self) -> List[str]:
+        return sorted(path.read_text(encoding="utf-8") for path in self.root.glob("*/doc_key"))
+
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    doc_key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    raw_length INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    crc32 INTEGER NOT NULL,
+    PRIMARY KEY (doc_key, kind, page)
+);
+"""
+
+
+class SegmentArtifactStore(ArtifactStore):
+    """
+    Compressed artifacts packed into a few large append-only segment files.
+
+    This is like a warehouse that stores parcels on long shelves in the
+    order they arrive, with a card index saying which shelf and slot
+    every parcel is in: nothing is ever moved, and fetching one customer's
+    parcels means walking one stretch of shelf instead of opening a
+    drawer per parcel.
+
+    Writes are buffered and written as one batch, sorted so each
+    document's artifacts sit next to each other. The SQLite index maps
+    (document, kind, page) to a segment, offset and length, so reading
+    a document back is one or a few large sequential reads (optionally
+    through mmap). Replacing an artifact appends a new copy; the old
+    bytes stay in the segment as garbage (see get_statistics()) until
+    compact() rewrites the segment.
+
+    A store has one writer at a time; other processes may read it.
+    """
+
+    def __init__(self, root: str, codec: str = "zstd", batch_bytes: int = 4 * 1024 * 1024,
+                 max_segment_bytes: int = 256 * 1024 * 1024, use_mmap: bool = False,
+                 max_read_gap: int = 64 * 1024):
+        """
+        Open (or create) a segment store.
+
+        Args:
+            root: Directory holding the segments and the index
+            codec: Compression for new artifacts ("zstd" falls back to "zlib")
+            batch_bytes: Uncompressed bytes buffered before a batch is written
+            max_segment_bytes: Start a new segment file beyond this size
+            use_mmap: Read segments through memory maps instead of file reads
+            max_read_gap: Artifacts this close together are fetched in one read
+        """
+        self.root = Path(root)
+        self.codec = get_codec(codec)
+        self.batch_bytes = batch_bytes
+        self.max_segment_bytes = max_segment_bytes
+        self.use_mmap = use_mmap
+        self.max_read_gap = max_read_gap
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.root / "index.sqlite3"))
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(INDEX_SCHEMA)
+
+        self.pending: Dict[Tuple[str, str, int], bytes] = {}
+        self.pending_bytes = 0
+        self.segment_number = self._last_segment_number()
+        self._readers = {}  # segment -> open file
+        self._maps = {}  # segment -> mmap
+        self._codecs = {self.codec.name: self.codec}
+
+        # Statistics tracking
+        self.batches_written = 0
+        self.reads = 0
+        self.bytes_read = 0
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.root / f"segment-{segment:05d}.seg"
+
+    def _last_segment_number(self) -> int:
+        """Number of the segment new batches are appended to."""
+        numbers = [int(path.stem.split("-")[1]) for path in self.root.glob("segment-*.seg")]
+        return max(numbers, default=1)
+
+    def put(self, doc_key: str, kind: str, data: bytes, page: int = DOCUMENT_PAGE):
+        key = (doc_key, kind, page)
+        if key in self.pending:
+            self.pending_bytes -= len(self.pending[key])
+        self.pending[key] = data
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= self.batch_bytes:
+            self.flush()
+
+    def put_chunks(self, doc_key: str, kind: str, chunks: Iterable[bytes], page: int = DOCUMENT_PAGE):
+        """Compress an artifact chunk by chunk straight into the current segment."""
+        # Buffered artifacts go first, so this one replaces any pending copy
+        self.flush()
+        segment_path, position = self._append_position()
+        compressor = self.codec.compressor()
+        length = raw_length = crc32 = 0
+        with open(segment_path, 'ab') as f:
+            for chunk in chunks:
+                raw_length += len(chunk)
+                crc32 = zlib.crc32(chunk, crc32)
+                stored = compressor.compress(chunk)
+                f.write(stored)
+                length += len(stored)
+            stored = compressor.flush()
+            f.write(stored)
+            length += len(stored)
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO artifacts "
+                "(doc_key, kind, page, segment, position, length, raw_length, codec, crc32) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_key, kind, page, self.segment_number, position, length, raw_length, self.codec.name, crc32)
+            )
+
+    def _append_position(self) -> Tuple[Path, int]:
+        """Segment file new data is appended to (starting a new one when full) and its size."""
+        segment_path = self._segment_path(self.segment_number)
+        position = segment_path.stat().st_size if segment_path.exists() else 0
+        if position and position >= self.max_segment_bytes:
+            self.segment_number += 1
+            segment_path = self._segment_path(self.segment_number)
+            position = 0
+        return segment_path, position
+
+    def flush(self):
+        """Compress the buffered artifacts and append them as one write."""
+        if not self.pending:
+            return
+
+        segment_path, position = self._append_position()
+
+        chunks = []
+        rows = []
+        for (doc_key, kind, page), data in sorted(self.pending.items()):
+            stored = self.codec.compress(data)
+            chunks.append(stored)
+            rows.append((doc_key, kind, page, self.segment_number, position, len(stored),
+                         len(data), self.codec.name, zlib.crc32(data)))
+            position += len(stored)
+
+        with open(segment_path, 'ab') as f:
+            f.write(b"".join(chunks))
+
+        # The index only points at bytes that are already written
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO artifacts "
+                "(doc_key, kind, page, segment, position, length, raw_length, codec, crc32) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+        self.pending = {}
+        self.pending_bytes = 0
+        self.batches_written += 1
+
+    def get(self, doc_key: str, kind: str, page: int = DOCUMENT_PAGE) -> Optional[bytes]:
+        if (doc_key, kind, page) in self.pending:
+            return self.pending[(doc_key, kind, page)]
+        row = self.connection.execute(
+            "SELECT * FROM artifacts WHERE doc_key = ? AND kind = ? AND page = ?", (doc_key, kind, page)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._decode(row, self._read(row["segment"], row["position"], row["length"]))
+
+    def read_document(self, doc_key: str, kind: Optional[str] = None) -> Dict[Tuple[str, int], bytes]:
+        """
+        Read a document's artifacts with as few reads as possible.
+
+        Artifacts are fetched in segment order, and neighbours less than
+        max_read_gap apart are read together.
+        """
+        self.flush()
+        query = "SELECT * FROM artifacts WHERE doc_key = ?"
+        parameters = [doc_key]
+        if kind is not None:
+            query += " AND kind = ?"
+            parameters.append(kind)
+        rows = self.connection.execute(query + " ORDER BY segment, position", parameters).fetchall()
+
+        artifacts = {}
+        for span_rows in self._group_reads(rows):
+            start = span_rows[0]["position"]
+            end = span_rows[-1]["position"] + span_rows[-1]["length"]
+            buffer = self._read(span_rows[0]["segment"], start, end - start)
+            for row in span_rows:
+                offset = row["position"] - start
+                artifacts[(row["kind"], row["page"])] = self._decode(row, buffer[offset:offset + row["length"]])
+        return artifacts
+
+    def _group_reads(self, rows: List[sqlite3.Row]) -> Iterator[List[sqlite3.Row]]:
+        """Split index rows (in segment order) into spans worth one read each."""
+        span_rows = []
+        for row in rows:
+            if span_rows:
+                last = span_rows[-1]
+                gap = row["position"] - (last["position"] + last["length"])
+                if row["segment"] != last["segment"] or gap > self.max_read_gap:
+                    yield span_rows
+                    span_rows = []
+            span_rows.append(row)
+        if span_rows:
+            yield span_rows
+
+    def _read(self, segment: int, position: int, length: int) -> bytes:
+        """Read a byte range of a segment."""
+        self.reads += 1
+        self.bytes_read += length
+        if self.use_mmap:
+            segment_map = self._maps.get(segment)
+            if segment_map is None or len(segment_map) < position + length:
+                # The active segment grows, so map it again when needed
+                if segment_map is not None:
+                    segment_map.close()
+                with open(self._segment_path(segment), 'rb') as f:
+                    segment_map = self._maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return segment_map[position:position + length]
+
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self._segment_path(segment), 'rb')
+        reader.seek(position)
+        return reader.read(length)
+
+    def _decode(self, row: sqlite3.Row, stored: bytes) -> bytes:
+        """Decompress one artifact and check it against its checksum."""
+        codec = self._codecs.get(row["codec"])
+        if codec is None:
+            codec = self._codecs[row["codec"]] = get_codec(row["codec"], fallback=False)
+        data = codec.decompress(stored)
+        if zlib.crc32(data) != row["crc32"]:
+            raise ValueError(f"Corrupt artifact {row['kind']} page {row['page']} of {row['doc_key']}")
+        return data
+
+    def delete_document(self, doc_key: str):
+        """Drop a document from the index; its bytes become garbage in the segments."""
+        for key in [key for key in self.pending if key[0] == doc_key]:
+            self.pending_bytes -= len(self.pending.pop(key))
+        with self.connection:
+            self.connection.execute("DELETE FROM artifacts WHERE doc_key = ?", (doc_key,))
+
+    def documents(self) -> List[str]:
+        self.flush()
+        rows = self.connection.execute("SELECT DISTINCT doc_key FROM artifacts ORDER BY doc_key")
+        return [row["doc_key"] for row in rows]
+
+    def compact(self, min_garbage_ratio: float = 0.0) -> Dict:
+        """
+        Rewrite the segments holding garbage and delete the old files.
+
+        Only the artifacts the index still points at are copied (as they
+        are stored, without recompressing), grouped by document, into new
+        segments; a segment holding nothing but garbage is just deleted.
+        The index is switched over in one transaction after the copies
+        are written, so an interrupted compaction only leaves garbage.
+
+        Args:
+            min_garbage_ratio: Leave segments with less garbage than this
+                               share of their size alone
+
+        Returns:
+            Segments rewritten and bytes reclaimed
+        """
+        self.flush()
+        live_bytes = {row[0]: row[1] for row in self.connection.execute(
+            "SELECT segment, SUM(length) FROM artifacts GROUP BY segment")}
+        segment_sizes = {int(path.stem.split("-")[1]): path.stat().st_size
+                         for path in self.root.glob("segment-*.seg")}
+        victims = [segment for segment, size in sorted(segment_sizes.items())
+                   if size > live_bytes.get(segment, 0)
+                   and size - live_bytes.get(segment, 0) >= size * min_garbage_ratio]
+        if not victims:
+            return {"segments_rewritten": 0, "bytes_reclaimed": 0}
+
+        self._close_segments()
+        self.segment_number = max(segment_sizes) + 1
+        rows = self.connection.execute(
+            "SELECT doc_key, kind, page, segment, position, length FROM artifacts "
+            f"WHERE segment IN ({', '.join('?' * len(victims))}) ORDER BY doc_key, kind, page", victims
+        ).fetchall()
+
+        moved = []
+        sources = {}
+        target = None
+        position = 0
+        try:
+            for row in rows:
+                if target is None or position >= self.max_segment_bytes:
+                    if target is not None:
+                        target.close()
+                        self.segment_number += 1
+                    target = open(self._segment_path(self.segment_number), 'ab')
+                    position = 0
+                source = sources.get(row["segment"])
+                if source is None:
+                    source = sources[row["segment"]] = open(self._segment_path(row["segment"]), 'rb')
+                source.seek(row["position"])
+                target.write(source.read(row["length"]))
+                moved.append((self.segment_number, position, row["doc_key"], row["kind"], row["page"]))
+                position += row["length"]
+        finally:
+            for source in sources.values():
+                source.close()
+            if target is not None:
+                target.close()
+
+        # The index only points at bytes that are already written
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE artifacts SET segment = ?, position = ? WHERE doc_key = ? AND kind = ? AND page = ?",
+                moved
+            )
+        for segment in victims:
+            self._segment_path(segment).unlink()
+        return {
+            "segments_rewritten": len(victims),
+            "bytes_reclaimed": sum(segment_sizes[segment] - live_bytes.get(segment, 0) for segment in victims)
+        }
+
+    def get_statistics(self) -> Dict:
+        """Sizes, compression ratio, garbage and read counts."""
+        self.flush()
+        documents, artifacts, raw_bytes, stored_bytes = self.connection.execute(
+            "SELECT COUNT(DISTINCT doc_key), COUNT(*), COALESCE(SUM(raw_length), 0), "
+            "COALESCE(SUM(length), 0) FROM artifacts"
+        ).fetchone()
+        segment_paths = list(self.root.glob("segment-*.seg"))
+        segment_bytes = sum(path.stat().st_size for path in segment_paths)
+        return {
+            "codec": self.codec.name,
+            "documents": documents,
+            "artifacts": artifacts,
+            "segments": len(segment_paths),
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "compression_ratio": raw_bytes / stored_bytes if stored_bytes else 0.0,
+            "garbage_bytes": segment_bytes - stored_bytes,
+            "batches_written": self.batches_written,
+            "reads": self.reads,
+            "bytes_read": self.bytes_read
+        }
+
+    def _close_segments(self):
+        """Close the segment files and maps opened for reading."""
+        for segment_map in self._maps.values():
+            segment_map.close()
+        for reader in self._readers.values():
+            reader.close()
+        self._maps = {}
+        self._readers = {}
+
+    def close(self):
+        """Write pending artifacts and close the index and segment files."""
+        self.flush()
+        self._close_segments()
+        self.connection.close()
+
+
+def encode_manifest(doc_key: str, input_size: int, start_page: int = 0,
+                    end_page: Optional[int] = None) -> bytes:
+    """
+    The "manifest" artifact: what a document's artifacts were made from.
+
+    Records the input's size and modification time (when the document
+    key is a file) and the converted page range, so stale artifacts can
+    be recognised later (see manifest_is_current()).
+    """
+    path = Path(doc_key)
+    return json.dumps({
+        "input_size": input_size,
+        "input_mtime_ns": path.stat().st_mtime_ns if path.is_file() else None,
+        "start_page": start_page,
+        "end_page": end_page
+    }).encode("utf-8")
+
+
+def manifest_is_current(doc_key: str, manifest: Dict) -> bool:
+    """Check that the input file still matches its manifest (keys that aren't files can't be checked)."""
+    path = Path(doc_key)
+    if not path.is_file():
+        return True
+    stat = path.stat()
+    return (stat.st_size, stat.st_mtime_ns) == (manifest["input_size"], manifest["input_mtime_ns"])
+
+
+def encode_blocks(blocks: Iterable[ContentBlock]) -> bytes:
+    """Serialize blocks as JSON Lines (the "blocks" artifact of a page)."""
+    return "".join(
+        json.dumps([block.text, block.content_type, block.confidence, block.metadata,
+                    block.page_number, block.line_number, block.page_marker], ensure_ascii=False) + "\n"
+        for block in blocks
+    ).encode("utf-8")
+
+
+def decode_blocks(data: bytes) -> Iterator[ContentBlock]:
+    """Read back blocks written by encode_blocks()."""
+    for line in data.decode("utf-8").splitlines():
+        text, content_type, confidence, metadata, page_number, line_number, page_marker = json.loads(line)
+        yield ContentBlock(text, content_type, confidence, metadata, page_number, line_number, page_marker)
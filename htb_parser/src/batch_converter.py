@@ -0,0 +1,335 @@
+# src/batch_converter.py
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.content_analyzer import ContentBlock
+from src.header_footer_filter import HeaderFooterFilter
+from src.heading_index import section_index_path
+from src.job_journal import JobJournal, worker_name
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+from src.render_sinks import RenderSink
+
+
+class PageJournalSink(RenderSink):
+    """
+    Records every finished page of a document in the job journal.
+
+    A page counts as finished when the first block of the next page
+    arrives (or the stream ends); its time is the time between those
+    page boundaries in the block stream.
+    """
+
+    name = "pages"
+
+    def __init__(self, journal: JobJournal, job_id: int):
+        """
+        Args:
+            journal: Journal the pages are written to
+            job_id: Job the pages belong to
+        """
+        self.journal = journal
+        self.job_id = job_id
+        self.page_number = None
+        self.block_count = 0
+        self.page_started = time.perf_counter()
+        self.pages_recorded = 0
+
+    def consume(self, block: ContentBlock):
+        if block.page_number != self.page_number:
+            self._record_page()
+            self.page_number = block.page_number
+        self.block_count += 1
+
+    def _record_page(self):
+        """Write the current page (if any) and start timing the next one."""
+        now = time.perf_counter()
+        if self.page_number is not None:
+            self.journal.record_page(self.job_id, self.page_number, self.block_count, now - self.page_started)
+            self.pages_recorded += 1
+        self.block_count = 0
+        self.page_started = now
+
+    def finish(self) -> int:
+        self._record_page()
+        return self.pages_recorded
+
+
+def _hash_file(path: str) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def convert_job(journal: JobJournal, job: Dict, memory_budget: Optional[int] = None,
+                classifier_backend: str = "regex", strip_headers: bool = False) -> bool:
+    """
+    Convert one claimed job and record the outcome in the journal.
+
+    The markdown and its section index are written to temporary files
+    and moved into place only when both are complete, the markdown
+    last, so a crash never leaves an output that looks finished (or a
+    finished output without its index).
+
+    Returns:
+        True if the document was converted
+    """
+    start_time = time.time()
+    output_path = job["output_path"]
+    temp_path = f"{output_path}.partial"
+    index_path = section_index_path(output_path)
+    temp_index_path = f"{index_path}.partial"
+
+    try:
+        with PDFProcessor() as pdf_processor:
+            if not pdf_processor.load_pdf(job["input_path"]):
+                journal.fail_job(job["id"], "Failed to load PDF", time.time() - start_time)
+                return False
+
+            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+            pipeline = ConversionPipeline(memory_budget=memory_budget, classifier_backend=classifier_backend,
+                                          header_filter=HeaderFooterFilter() if strip_headers else None)
+            result = pipeline.convert_to_file(
+                pdf_processor, temp_path, fallback_title=Path(job["input_path"]).stem,
+                save_section_index=False, extra_sinks=[PageJournalSink(journal, job["id"])]
+            )
+
+        result["heading_index"].save(temp_index_path)
+        os.replace(temp_index_path, index_path)
+        os.replace(temp_path, output_path)
+        journal.complete_job(job["id"], _hash_file(output_path), os.path.getsize(output_path),
+                             result["doc_info"].get("pages", 0), time.time() - start_time)
+        return True
+
+    except Exception as e:
+        for path in (temp_path, temp_index_path):
+            if os.path.exists(path):
+                os.remove(path)
+        journal.fail_job(job["id"], str(e), time.time() - start_time)
+        return False
+
+
+def run_worker(journal_path: str, memory_budget: Optional[int] = None,
+               lease_seconds: float = 600.0, classifier_backend: str = "regex",
+               strip_headers: bool = False, suspects: bool = False) -> Dict:
+    """
+    Claim and convert jobs from a journal until none are pending.
+
+    This lives at module level so worker processes can run it; any
+    number of workers (in this or other processes) can share a journal.
+    With suspects=True only jobs whose worker died in a shared pool are
+    claimed; run such a worker on its own (see JobJournal.claim_job()).
+
+    Returns:
+        The worker's name and how many documents it converted or failed
+    """
+    converted = failed = 0
+    worker = worker_name()
+
+    with JobJournal(journal_path, lease_seconds) as journal:
+        while True:
+            job = journal.claim_job(worker, suspect=suspects)
+            if job is None:
+                break
+            if convert_job(journal, job, memory_budget, classifier_backend, strip_headers):
+                converted += 1
+            else:
+                failed += 1
+
+    return {"worker": worker, "converted": converted, "failed": failed}
+
+
+class BatchConverter:
+    """
+    Converts a directory of PDFs in a way that survives being interrupted.
+
+    Every document is queued in a JobJournal before any work starts.
+    Worker processes claim documents from the journal, and the journal
+    records each page, the output hash and the timings as they go. If
+    the run dies (out of memory, a bad PDF, a reboot), running it again
+    skips everything that finished and picks up the rest.
+    """
+
+    def __init__(self, journal_path: str = "htb_jobs.sqlite3", max_workers: Optional[int] = None,
+                 use_processes: bool = True, memory_budget: Optional[int] = None,
+                 max_attempts: int = 2, lease_seconds: float = 600.0,
+                 classifier_backend: str = "regex", strip_headers: bool = False):
+        """
+        Initialize the batch converter.
+
+        Args:
+            journal_path: SQLite job journal (created if missing, resumed if not)
+            max_workers: Number of parallel workers (default: CPU count)
+            use_processes: Use worker processes (True) or threads (False)
+            memory_budget: Bytes of blocks, page texts and markdown each worker
+                           keeps in memory before spilling to disk (None: no limit)
+            max_attempts: Times a document may take down its worker, while
+                          running alone, before it is marked failed
+            lease_seconds: A running job without progress for this long is
+                           considered abandoned
+            classifier_backend: "regex" rules or the trained "ngram" model
+                                (see src/line_classifier.py)
+            strip_headers: Remove running headers, footers and page numbers
+                           (see src/header_footer_filter.py)
+        """
+        self.journal_path = journal_path
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.memory_budget = memory_budget
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.classifier_backend = classifier_backend
+        self.strip_headers = strip_headers
+
+    def enqueue_directory(self, input_dir: str, output_dir: str, retry_failed: bool = False) -> Dict:
+        """
+        Queue every PDF under a directory, mirroring the tree in output_dir.
+
+        Returns:
+            How many documents were queued and how many were skipped
+            because they are already done (or failed)
+        """
+        input_root = Path(input_dir)
+        queued = skipped = 0
+
+        with JobJournal(self.journal_path, self.lease_seconds) as journal:
+            for pdf_path in sorted(input_root.rglob("*")):
+                if not pdf_path.is_file() or pdf_path.suffix.lower() != ".pdf":
+                    continue
+                output_path = Path(output_dir) / pdf_path.relative_to(input_root).with_suffix(".md")
+                if journal.add_job(str(pdf_path), str(output_path), retry_failed):
+                    queued += 1
+                else:
+                    skipped += 1
+
+        return {"queued": queued, "skipped": skipped}
+
+    def run(self) -> Dict:
+        """
+        Work through the pending jobs of the journal with parallel workers.
+
+        Jobs left running by a dead worker are recovered first. Those
+        that died in a shared pool (where another document may have
+        brought the pool down) are converted one at a time, so a crash
+        can be blamed on the right document, and the rest by the pool.
+        When a pool dies, the jobs its workers were running are
+        recovered the same way, until nothing is pending.
+
+        Returns:
+            Batch processing summary
+        """
+        start_time = time.time()
+        recovered = self._recover_abandoned()
+        pool_size = self.max_workers or os.cpu_count() or 1
+
+        workers: List[Dict] = []
+        worker_crashed = False
+
+        while True:
+            queue = self._queue_statistics()
+            if queue["suspects"]:
+                batch_workers, crashed = self._run_workers(1, suspects=True)
+            elif queue["pending"]:
+                batch_workers, crashed = self._run_workers(pool_size)
+            else:
+                break
+            workers.extend(batch_workers)
+            if crashed:
+                # The killed workers' jobs are still "running"
+                worker_crashed = True
+                recovered += self._recover_abandoned()
+
+        with JobJournal(self.journal_path, self.lease_seconds) as journal:
+            summary = {
+                "recovered": recovered,
+                "converted": sum(worker["converted"] for worker in workers),
+                "failed": sum(worker["failed"] for worker in workers),
+                "worker_crashed": worker_crashed,
+                "total_time": time.time() - start_time,
+                "journal": journal.get_statistics(),
+                "failed_files": [(job["input_path"], job["error"]) for job in journal.jobs("failed")],
+                "workers": workers
+            }
+
+        self._print_summary(summary)
+        return summary
+
+    def _queue_statistics(self) -> Dict:
+        """Job counts of the journal (see JobJournal.get_statistics())."""
+        with JobJournal(self.journal_path, self.lease_seconds) as journal:
+            return journal.get_statistics()
+
+    def _recover_abandoned(self) -> int:
+        """Requeue (or fail) the jobs of dead workers; returns how many."""
+        with JobJournal(self.journal_path, self.lease_seconds) as journal:
+            return journal.recover_abandoned(self.max_attempts)
+
+    def _run_workers(self, worker_count: int, suspects: bool = False) -> Tuple[List[Dict], bool]:
+        """
+        Run run_worker() in a pool of worker_count workers.
+
+        Returns:
+            The summaries of the workers that finished, and whether a
+            worker process died
+        """
+        executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        workers = []
+        crashed = False
+
+        with executor_class(max_workers=worker_count) as executor:
+            futures = [executor.submit(run_worker, self.journal_path, self.memory_budget,
+                                       self.lease_seconds, self.classifier_backend, self.strip_headers,
+                                       suspects)
+                       for _ in range(worker_count)]
+            for future in futures:
+                try:
+                    workers.append(future.result())
+                except BrokenProcessPool:
+                    crashed = True
+        return workers, crashed
+
+    def process_directory(self, input_dir: str, output_dir: str, retry_failed: bool = False) -> Dict:
+        """
+        Queue a directory and convert it, resuming an earlier run of the same journal.
+
+        Returns:
+            Batch processing summary (see run()), with the queue counts
+        """
+        print(f"🚀 Starting batch conversion...")
+        print(f"   Input: {input_dir}")
+        print(f"   Output: {output_dir}")
+        print(f"   Journal: {self.journal_path}")
+
+        queue = self.enqueue_directory(input_dir, output_dir, retry_failed)
+        print(f"   Queued {queue['queued']} documents, {queue['skipped']} already finished")
+
+        summary = self.run()
+        summary.update(queue)
+        return summary
+
+    def _print_summary(self, summary: Dict):
+        """Print batch conversion summary."""
+        journal = summary["journal"]
+        print(f"\n{'='*60}")
+        print(f"📊 BATCH CONVERSION SUMMARY")
+        print(f"{'='*60}")
+        print(f"Converted this run: {summary['converted']}")
+        print(f"Failed this run: {summary['failed']}")
+        print(f"Recovered from earlier runs: {summary['recovered']}")
+        print(f"Journal: {journal['done']} done, {journal['failed']} failed, "
+              f"{journal['pending'] + journal['running']} remaining")
+        print(f"Total time: {summary['total_time']:.1f} seconds")
+
+        if summary["worker_crashed"]:
+            print(f"\n⚠️ A worker process died; its documents were retried one at a time")
+        if summary["failed_files"]:
+            print(f"\n❌ Failed files:")
+            for input_path, error in summary["failed_files"]:
+                print(f"   - {input_path}: {error}")
@@ -0,0 +1,201 @@
+# src/block_exporter.py
+import csv
+import json
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, TextIO
+from src.content_analyzer import ContentBlock
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    # Parquet export is optional - fall back to CSV without pyarrow
+    pa = None
+    pq = None
+
+
+# Column order shared by every export format
+EXPORT_FIELDS = ["doc_key", "page_number", "line_number", "content_type",
+                 "confidence", "text", "metadata"]
+
+
+class BlockExporter:
+    """
+    Exports classified content blocks as structured data.
+
+    This is like handing downstream tools a spreadsheet instead of a
+    printed report: every block becomes one record with its type,
+    confidence, metadata and position, written in a single pass.
+    """
+
+    def __init__(self, batch_size: int = 4096, include_empty: bool = False):
+        """
+        Initialize the exporter.
+
+        Args:
+            batch_size: Rows buffered per Parquet row group
+            include_empty: Also export "empty" blocks
+        """
+        self.batch_size = batch_size
+        self.include_empty = include_empty
+
+    def block_to_record(self, block: ContentBlock, doc_key: str = "") -> Dict:
+        """Convert one content block to a flat export record."""
+        return {
+            "doc_key": doc_key,
+            "page_number": block.page_number,
+            "line_number": block.line_number,
+            "content_type": block.content_type,
+            "confidence": block.confidence,
+            "text": block.text,
+            "metadata": block.metadata or {}
+        }
+
+    def exports(self, block: ContentBlock) -> bool:
+        """Whether a block is exported (never page separators, empty lines only with include_empty)."""
+        if block.page_marker:
+            return False
+        return block.content_type != "empty" or self.include_empty
+
+    def _iter_records(self, blocks: Iterable[ContentBlock], doc_key: str) -> Iterator[Dict]:
+        """Turn a block stream into a record stream, skipping empty lines if asked."""
+        for block in blocks:
+            if self.exports(block):
+                yield self.block_to_record(block, doc_key)
+
+    def write_jsonl_record(self, output: TextIO, block: ContentBlock, doc_key: str = "") -> bool:
+        """
+        Write one block as a JSON Lines record to an open text file.
+
+        Returns:
+            True if a record was written, False if the block isn't exported
+        """
+        if not self.exports(block):
+            return False
+        output.write(json.dumps(self.block_to_record(block, doc_key), ensure_ascii=False))
+        output.write("\n")
+        return True
+
+    def write_jsonl(self, blocks: Iterable[ContentBlock], output, doc_key: str = "") -> int:
+        """
+        Stream blocks to JSON Lines, one record per line.
+
+        Args:
+            blocks: Any iterable of blocks (a generator works - nothing is buffered)
+            output: File path, or an open text file to append several documents
+            doc_key: Document identifier stored in every record
+
+        Returns:
+            Number of records written
+        """
+        count = 0
+        with self._open_text(output, newline=None) as f:
+            for block in blocks:
+                count += self.write_jsonl_record(f, block, doc_key)
+        return count
+
+    def write_columnar(self, blocks: Iterable[ContentBlock], output_path: str, doc_key: str = "") -> str:
+        """
+        Stream blocks to a columnar file.
+
+        Uses Parquet when pyarrow is installed and CSV otherwise.
+
+        Args:
+            blocks: Any iterable of blocks
+            output_path: Destination file
+            doc_key: Document identifier stored in every record
+
+        Returns:
+            The format that was written ("parquet" or "csv")
+        """
+        if pq is not None:
+            self._write_parquet(blocks, output_path, doc_key)
+            return "parquet"
+        self._write_csv(blocks, output_path, doc_key)
+        return "csv"
+
+    def _write_parquet(self, blocks: Iterable[ContentBlock], output_path: str, doc_key: str):
+        """Write blocks as Parquet, one row group per batch."""
+        schema = pa.schema([
+            ("doc_key", pa.string()),
+            ("page_number", pa.int32()),
+            ("line_number", pa.int32()),
+            ("content_type", pa.string()),
+            ("confidence", pa.float32()),
+            ("text", pa.string()),
+            ("metadata", pa.string()),
+        ])
+        columns = {field: [] for field in EXPORT_FIELDS}
+
+        with pq.ParquetWriter(output_path, schema) as writer:
+            for record in self._iter_records(blocks, doc_key):
+                record["metadata"] = json.dumps(record["metadata"])
+                for field in EXPORT_FIELDS:
+                    columns[field].append(record[field])
+                if len(columns["text"]) >= self.batch_size:
+                    writer.write_table(pa.table(columns, schema=schema))
+                    columns = {field: [] for field in EXPORT_FIELDS}
+            if columns["text"]:
+                writer.write_table(pa.table(columns, schema=schema))
+
+    def _write_csv(self, blocks: Iterable[ContentBlock], output_path: str, doc_key: str):
+        """Write blocks as CSV with metadata stored as a JSON string."""
+        with self._open_text(output_path, newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(EXPORT_FIELDS)
+            for record in self._iter_records(blocks, doc_key):
+                record["metadata"] = json.dumps(record["metadata"])
+                writer.writerow([record[field] for field in EXPORT_FIELDS])
+
+    @contextmanager
+    def _open_text(self, output, newline):
+        """Open a path for writing, or pass an already open file through."""
+        if hasattr(output, "write"):
+            yield output
+        else:
+            with open(output, 'w', encoding='utf-8', newline=newline) as f:
+                yield f
+
+    def read_jsonl(self, input_path: str) -> Iterator[Dict]:
+        """Stream records back from a JSON Lines export."""
+        with open(input_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def read_columnar(self, input_path: str) -> Dict[str, List]:
+        """
+        Load a columnar export in bulk.
+
+        Returns:
+            Dictionary mapping column name to a list of values
+        """
+        if self._is_parquet_file(input_path):
+            if pq is None:
+                raise ImportError("pyarrow is required to read Parquet exports")
+            columns = pq.read_table(input_path).to_pydict()
+        else:
+            columns = self._read_csv_columns(input_path)
+
+        columns["metadata"] = [json.loads(value) for value in columns["metadata"]]
+        return columns
+
+    def _is_parquet_file(self, input_path: str) -> bool:
+        """Check the Parquet magic bytes so the file suffix doesn't matter."""
+        with open(input_path, 'rb') as f:
+            return f.read(4) == b"PAR1"
+
+    def _read_csv_columns(self, input_path: str) -> Dict[str, List]:
+        """Read a CSV export into typed columns."""
+        columns = {field: [] for field in EXPORT_FIELDS}
+        with open(input_path, 'r', encoding='utf-8', newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            for row in reader:
+                for field, value in zip(header, row):
+                    columns[field].append(value)
+
+        columns["page_number"] = [int(value) if value else None for value in columns["page_number"]]
+        columns["line_number"] = [int(value) for value in columns["line_number"]]
+        columns["confidence"] = [float(value) for value in columns["confidence"]]
+        return columns
@@ -0,0 +1,130 @@
+# src/compiled_rules.py
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+from src.content_analyzer import ClassifierBackend, CompiledRuleSet, ContentBlock, build_block
+from src.ruleset import load_ruleset
+
+
+def shared_rules() -> CompiledRuleSet:
+    """The process-wide rule set for the default rules, compiled on first use."""
+    return CompiledRuleSet.for_ruleset(load_ruleset())
+
+
+# Marks a cache miss (None can be a cached value)
+_MISSING = object()
+
+
+class ThreadLocalLRUCache:
+    """
+    A small LRU cache with a separate store for every thread.
+
+    Each thread only ever touches its own OrderedDict, so lookups need
+    no lock at all. The price is that threads don't share hits, which
+    is fine for caches that warm up quickly (e.g. repeated lines).
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        """
+        Args:
+            maxsize: Entries kept per thread
+        """
+        self.maxsize = maxsize
+        self._local = threading.local()
+
+    def _store(self) -> OrderedDict:
+        """This thread's entries, created on first use."""
+        store = getattr(self._local, "store", None)
+        if store is None:
+            store = self._local.store = OrderedDict()
+            self._local.hits = 0
+            self._local.misses = 0
+        return store
+
+    def get(self, key, default=None):
+        """Look up a key and mark it as recently used."""
+        store = self._store()
+        value = store.get(key, _MISSING)
+        if value is _MISSING:
+            self._local.misses += 1
+            return default
+        store.move_to_end(key)
+        self._local.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Add an entry, evicting this thread's least recently used one if full."""
+        store = self._store()
+        store[key] = value
+        store.move_to_end(key)
+        if len(store) > self.maxsize:
+            store.popitem(last=False)
+
+    def get_statistics(self) -> dict:
+        """Hits, misses and size of the calling thread's cache."""
+        store = self._store()
+        return {"hits": self._local.hits, "misses": self._local.misses, "size": len(store)}
+
+
+class SharedClassifier(ClassifierBackend):
+    """
+    A line classifier that one instance of a threaded service can share.
+
+    Built around an immutable CompiledRuleSet and a per-thread LRU cache
+    of line -> content type, so request handlers can classify without
+    constructing anything. Every call returns new ContentBlock objects,
+    since callers fill in page positions afterwards.
+
+    It is also a ClassifierBackend, so ContentAnalyzer(backend=...) can
+    use the shared rules and cache.
+    """
+
+    name = "shared"
+
+    def __init__(self, rules: Optional[CompiledRuleSet] = None, cache_size: int = 4096):
+        """
+        Args:
+            rules: Compiled rules (default: shared_rules())
+            cache_size: Lines cached per thread (0 disables the cache)
+        """
+        self.rules = rules or shared_rules()
+        self.cache = ThreadLocalLRUCache(cache_size) if cache_size else None
+
+    def classify_line(self, line: str) -> ContentBlock:
+        """Classify one line, like ContentAnalyzer.classify_line()."""
+        line = line.strip()
+        return build_block(line, self._content_type(line))
+
+    def _content_type(self, line: str) -> str:
+        """Content type of a stripped line, from the cache if possible."""
+        if self.cache is None:
+            return self.rules.content_type(line)
+        content_type = self.cache.get(line)
+        if content_type is None:
+            content_type = self.rules.content_type(line)
+            self.cache.put(line, content_type)
+        return content_type
+
+    def classify_lines(self, lines: List[str]) -> List[ContentBlock]:
+        """Classify a batch of lines, like ContentAnalyzer.classify_lines()."""
+        stripped = list(map(str.strip, lines))
+        return list(map(build_block, stripped, self.predict(stripped)))
+
+    def predict(self, lines: List[str]) -> List[str]:
+        """
+        Content types of stripped lines.
+
+        Cached lines are looked up; the rest are classified together
+        (see CompiledRuleSet.content_types()).
+        """
+        if self.cache is None:
+            return self.rules.content_types(lines)
+
+        content_types = [self.cache.get(line) for line in lines]
+        missing = [index for index, content_type in enumerate(content_types) if content_type is None]
+        if missing:
+            scanned = self.rules.content_types([lines[index] for index in missing])
+            for index, content_type in zip(missing, scanned):
+                content_types[index] = content_type
+                self.cache.put(lines[index], content_type)
+        return content_types
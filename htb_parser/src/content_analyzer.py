@@ -1,7 +1,52 @@
 # src/content_analyzer.py
+import operator
 import re
-from typing import Dict, List,  Optional
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from itertools import accumulate, compress, islice, repeat
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Tuple
 from dataclasses import dataclass
+from src.ruleset import FAMILY_ORDER, Ruleset, load_ruleset
+
+# A page separator line exactly as PDFProcessor writes it, found in
+# whole (unstripped) lines of joined text with finditer()
+PAGE_MARKER_PATTERN = re.compile(r'^--- Page ([0-9]+) ---$', re.MULTILINE)
+
+# A whole separator chunk, as PDFProcessor.iter_text_chunks() yields it
+# before every page
+PAGE_SEPARATOR_PATTERN = re.compile(r'\n--- Page ([0-9]+) ---\n')
+
+# (text, content type, page number, line number, page marker), see
+# ContentAnalyzer.iter_line_types()
+TypedLine = Tuple[str, str, Optional[int], int, bool]
+
+# Markdown image references, e.g. the ones ImageExporter puts into page text
+IMAGE_REF_PATTERN = re.compile(r'^!\[([^\]\n]*)\]\(([^)\s]+)\)$')
+
+# Put in front of the image references ImageExporter inserts (see
+# image_ref_line()); image syntax that is part of the PDF text has no
+# marker and is classified like any other line
+IMAGE_MARKER = "\x00"
+
+# Confidence assigned to each content type
+BLOCK_CONFIDENCE = {
+    "command": 0.9,
+    "code": 0.85,
+    "heading": 0.8,
+    "url": 0.95,
+    "network": 0.9,
+    "path": 0.85,
+    "text": 0.8,
+    "empty": 1.0,
+    "image": 1.0,
+}
+
+# Headings longer than this are treated as ordinary lines
+MAX_HEADING_LENGTH = 100
+
+# Numbered sections ("1. Recon") get heading level 2
+_NUMBERED_SECTION_PATTERN = re.compile(r'^[0-9]+\.')
 
 @dataclass
 class ContentBlock:
@@ -10,12 +55,289 @@ class ContentBlock:
     content_type: str
     confidence: float
     metadata: Optional[Dict] = None    
+    page_number: Optional[int] = None  # 1-based page, None without page markers
+    line_number: int = 0  # Line offset from the start of the page (or text)
+    page_marker: bool = False  # A page separator line PDFProcessor inserted, not page text
 
     def __post_init__(self):
         if self.metadata is None:
             self.metadata = {}
 
 
+def block_metadata(line: str, content_type: str) -> Optional[Dict]:
+    """Metadata attached to a block of the given type."""
+    if content_type == "command":
+        return {"shell_type": _shell_type(line)}
+    if content_type == "code":
+        return {"language": _code_language(line)}
+    if content_type == "heading":
+        return {"level": _heading_level(line)}
+    if content_type == "network":
+        return {"contains_ip": True}
+    if content_type == "path":
+        return {"contains_path": True}
+    if content_type == "url":
+        return {"contains_url": True}
+    if content_type == "image":
+        match = IMAGE_REF_PATTERN.match(line)
+        return {"alt": match.group(1), "src": match.group(2)}
+    return None
+
+
+def image_ref_line(alt: str, src: str) -> str:
+    """Marked markdown image reference, as ImageExporter inserts it into page text."""
+    return f"{IMAGE_MARKER}![{alt}]({src})"
+
+
+def is_image_ref(line: str) -> bool:
+    """Check if a stripped line is an image reference inserted by ImageExporter."""
+    return line.startswith(IMAGE_MARKER) and IMAGE_REF_PATTERN.match(line[len(IMAGE_MARKER):]) is not None
+
+
+def build_block(line: str, content_type: str, page_number: Optional[int] = None,
+                line_number: int = 0, page_marker: bool = False) -> ContentBlock:
+    """Create the ContentBlock for a line whose type (and position) is already known."""
+    if content_type == "image":
+        # The block keeps the plain reference, without the marker
+        line = line[len(IMAGE_MARKER):]
+    return ContentBlock(line, content_type, BLOCK_CONFIDENCE[content_type],
+                        block_metadata(line, content_type), page_number, line_number, page_marker)
+
+
+def _shell_type(line: str) -> str:
+    """Determine the type of shell based on the command."""
+    if line.startswith("python"):
+        return "python"
+    elif line.startswith("php"):
+        return "php"
+    else:
+        return "bash"
+
+
+def _code_language(line: str) -> str:
+    """Determine the language of the code."""
+    if "def " in line:
+        return "python"
+    if "function " in line:
+        return "javascript"
+    if "<?php" in line:
+        return "php"
+    if "public class" in line:
+        return "java"
+    return "unknown"
+
+
+def _heading_level(line: str) -> int:
+    """Determine the level of the heading."""
+    if _NUMBERED_SECTION_PATTERN.match(line):
+        return 2  # Numbered sections are usually H2
+    elif line.isupper() and len(line) < 30:
+        return 1  # Short ALL CAPS are usually H1
+    else:
+        return 2  # Default to H2
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledRuleSet:
+    """
+    The classification rules of a Ruleset, compiled and frozen.
+
+    This is like a laminated reference card: it is printed once, every
+    worker can read it at the same time, and nobody can scribble on it.
+    All fields are tuples, frozensets or read-only mappings of compiled
+    patterns, and classifying a line only uses local state, so one rule
+    set can be shared by any number of threads without locks.
+
+    Use for_ruleset() to get the one compiled copy per ruleset in this
+    process (shared_rules() in src/compiled_rules.py for the default rules).
+    """
+
+    command_patterns: Tuple[Pattern, ...]
+    code_patterns: Tuple[Pattern, ...]
+    heading_patterns: Tuple[Pattern, ...]
+    url_patterns: Tuple[Pattern, ...]
+    network_patterns: Tuple[Pattern, ...]
+    path_patterns: Tuple[Pattern, ...]
+
+    # (family, trigger or None, verify function) in priority order.
+    # A trigger is a cheap necessary condition derived from the family's
+    # patterns (see derive_trigger() in src/ruleset.py): if it doesn't
+    # match, the family's patterns can't either and are skipped.
+    checks: Tuple[Tuple[str, Optional[Pattern], Callable], ...]
+
+    @classmethod
+    def from_ruleset(cls, ruleset: Optional[Ruleset] = None) -> "CompiledRuleSet":
+        """
+        Compile the classification rules of a ruleset.
+
+        Args:
+            ruleset: Rules to compile (default: the shipped rules file)
+
+        Returns:
+            The compiled rule set
+        """
+        ruleset = ruleset or load_ruleset()
+        families = ruleset.families
+
+        def compile_family(family):
+            return tuple(re.compile(pattern, families[family]["flags"])
+                         for pattern in families[family]["patterns"])
+
+        checks = []
+        for family in FAMILY_ORDER:
+            spec = families[family]
+            verifier = re.compile(spec["verifier"], spec["flags"])
+            trigger = None
+            if spec["trigger"] is not None:
+                trigger = re.compile(spec["trigger"], spec["flags"])
+            checks.append((family, trigger, verifier.match if spec["anchored"] else verifier.search))
+
+        return cls(
+            command_patterns=compile_family("command"),
+            code_patterns=compile_family("code"),
+            heading_patterns=compile_family("heading"),
+            url_patterns=compile_family("url"),
+            network_patterns=compile_family("network"),
+            path_patterns=compile_family("path"),
+            checks=tuple(checks),
+        )
+
+    @classmethod
+    def for_ruleset(cls, ruleset: Ruleset) -> "CompiledRuleSet":
+        """
+        The compiled rules of a ruleset, compiled once per process.
+
+        Rulesets with the same hash share one CompiledRuleSet, so creating
+        analyzers doesn't compile any regexes after the first one.
+        """
+        with _compiled_rules_lock:
+            rules = _compiled_rules.get(ruleset.ruleset_hash)
+            if rules is None:
+                rules = _compiled_rules[ruleset.ruleset_hash] = cls.from_ruleset(ruleset)
+            return rules
+
+    def content_type(self, line: str) -> str:
+        """
+        Classify one line, like ContentAnalyzer.classify_line().
+
+        Args:
+            line: Text line (surrounding whitespace is ignored)
+
+        Returns:
+            The line's content type
+        """
+        line = line.strip()
+        if not line:
+            return "empty"
+        if is_image_ref(line):
+            return "image"
+
+        for family, trigger, verify in self.checks:
+            if family == "heading" and len(line) > MAX_HEADING_LENGTH:
+                continue
+            if (trigger is None or trigger.search(line)) and verify(line):
+                return family
+        return "text"
+
+    def content_types(self, lines: List[str]) -> List[str]:
+        """
+        Classify stripped lines in bulk, like content_type() on every line.
+
+        Each family is checked once for the whole batch. A family with a
+        trigger searches for it in the joined lines and only verifies
+        the lines it hits; an anchored family has no trigger and
+        verifies every line with map().
+        Higher priority families overwrite lower ones at the end.
+        Repeated lines (page headers, prompts, braces) are classified once.
+
+        Args:
+            lines: Stripped text lines
+
+        Returns:
+            One content type per line
+        """
+        unique = list(dict.fromkeys(lines))
+        if len(unique) == len(lines):
+            return self._unique_content_types(lines)
+        content_types = dict(zip(unique, self._unique_content_types(unique)))
+        return list(map(content_types.__getitem__, lines))
+
+    def _unique_content_types(self, lines: List[str]) -> List[str]:
+        """content_types() for lines without repeats."""
+        text = "\n".join(lines)
+        line_starts = None
+        hits = []
+
+        for family, trigger, verify in self.checks:
+            if trigger is None:
+                candidates = range(len(lines))
+                candidate_lines = lines
+            else:
+                if line_starts is None:
+                    # Offset of the first character of every line in the joined text
+                    line_starts = list(accumulate(map((1).__add__, map(len, lines)), initial=0))
+                # Triggers never match across a newline, so a hit belongs to one line
+                candidates = list(dict.fromkeys(bisect_right(line_starts, match.start()) - 1
+                                                for match in trigger.finditer(text)))
+                candidate_lines = [lines[index] for index in candidates]
+            hits.append((family, compress(candidates, map(verify, candidate_lines))))
+
+        # Lowest priority first, so higher priority families overwrite it
+        content_types = ["text"] * len(lines)
+        for family, indexes in reversed(hits):
+            if family == "heading":
+                indexes = [index for index in indexes if len(lines[index]) <= MAX_HEADING_LENGTH]
+            for index in indexes:
+                content_types[index] = family
+
+        for index in compress(range(len(lines)), map(operator.not_, lines)):
+            content_types[index] = "empty"
+        if IMAGE_MARKER in text:
+            for index, line in enumerate(lines):
+                if is_image_ref(line):
+                    content_types[index] = "image"
+        return content_types
+
+
+_compiled_rules: Dict[str, CompiledRuleSet] = {}
+_compiled_rules_lock = threading.Lock()
+
+
+class ClassifierBackend(ABC):
+    """
+    Interface for the part of ContentAnalyzer that decides line types.
+
+    A backend only has to name a content type for every line; the
+    analyzer turns those into ContentBlocks (metadata, confidence,
+    page positions) the same way for every backend.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def predict(self, lines: List[str]) -> List[str]:
+        """
+        Classify a batch of stripped lines.
+
+        Args:
+            lines: Stripped text lines (empty lines are never passed in)
+
+        Returns:
+            One content type per line
+        """
+
+
+class RegexBackend(ClassifierBackend):
+    """The hand-written regex rules, checked one pattern family at a time per batch."""
+
+    name = "regex"
+
+    def __init__(self, rules: CompiledRuleSet):
+        self.rules = rules
+
+    def predict(self, lines: List[str]) -> List[str]:
+        return self.rules.content_types(lines)
+
 
 class ContentAnalyzer:
     """
@@ -23,64 +345,27 @@ class ContentAnalyzer:
     
     This is like a smart librarian that can look at text and 
     immediately know what category it belongs to.
+    
+    The patterns come from a rules file (see src/ruleset.py) and are
+    compiled into a frozen CompiledRuleSet, which does the actual
+    classifying; to change them, load a different rules file.
     """
     
-    def __init__(self):
-        """Initialize the content analyzer with pattern definitions."""
-        self._setup_patterns()
-
-    def _setup_patterns(self):
-        """Define regex patterns for different content types."""
-        
-        # Command patterns - common HTB tools and syntax
-        self.command_patterns = [
-            r'^[a-zA-Z0-9_\-\.]+\s+\-[a-zA-Z0-9\-]+',  # tool with flags
-            r'^(nmap|gobuster|dirb|nikto|sqlmap|hydra|john|hashcat)',  # common tools
-            r'^(sudo|su|cd|ls|cat|grep|find|chmod|chown)',  # basic commands
-            r'^(python|python3|php|bash|sh|perl|ruby)',  # script execution
-            r'^\$\s+',  # shell prompt
-            r'^#\!s+',   # root prompt
-        ]
-        
-        # Code patterns - programming languages
-        self.code_patterns = [
-            r'def\s+\w+\s*\(',  # Python function
-            r'function\s+\w+\s*\(',  # JavaScript function
-            r'public\s+class\s+\w+',  # Java class
-            r'<\?php',  # PHP opening tag
-            r'#!/bin/(bash|sh|python)',  # Shebang
-            r'import\s+\w+',  # Import statements
-            r'from\s+\w+\s+import',  # Python imports
-        ]
-        
-        # Network patterns
-        self.network_patterns = [
-            r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b',  # IP addresses
-            r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}:[0-9]+\b',  # IP:port
-            r'\b[a-fA-F0-9]{1,4}(?::[a-fA-F0-9]{1,4}){7}\b',  # IPv6
-            r'\bport\s+[0-9]+\b',  # Port references
-        ]
-        
-        # File path patterns
-        self.path_patterns = [
-            r'/[a-zA-Z0-9_\-\./]+',  # Unix paths
-            r'[A-Za-z]:\\[a-zA-Z0-9_\-\\\./]+',  # Windows paths
-            r'~/[a-zA-Z0-9_\-\./]*',  # Home directory paths
-        ]
-        
-        # URL patterns
-        self.url_patterns = [
-            r'https?://[a-zA-Z0-9\-\._~:/?#\[\]@!$&\'()*+,;=%]+',
-            r'ftp://[a-zA-Z0-9\-\._~:/?#\[\]@!$&\'()*+,;=%]+',
-        ]
+    def __init__(self, batch_size: int = 2048, backend: Optional[ClassifierBackend] = None,
+                 ruleset: Optional[Ruleset] = None):
+        """
+        Initialize the content analyzer with pattern definitions.
         
-        # Heading patterns
-        self.heading_patterns = [
-            r'^#+\s+[A-Za-z0-9]',  # Markdown headings (# Title)
-            r'^[A-Z][A-Za-z\s]+$',  # Title case
-            r'^[0-9]+\.\s+[A-Z]',  # Numbered sections
-            r'^[A-Z\s]+$',  # ALL CAPS
-        ]
+        Args:
+            batch_size: Lines classified together as one batch
+            backend: Classifier used for batches of lines (default: the regex rules)
+            ruleset: Compiled rules to use (default: the shipped rules file,
+                     see src/ruleset.py)
+        """
+        self.batch_size = batch_size
+        self.ruleset = ruleset or load_ruleset()
+        self.rules = CompiledRuleSet.for_ruleset(self.ruleset)
+        self.backend = backend or RegexBackend(self.rules)
 
     def classify_line(self, line: str) -> ContentBlock:
         """
@@ -93,186 +378,59 @@ class ContentAnalyzer:
             ContentBlock with classification results
         """
         line = line.strip()
+        return self._build_block(line, self.rules.content_type(line))
+
+    def _build_block(self, line: str, content_type: str) -> ContentBlock:
+        """Create the ContentBlock for a line whose type is already known."""
+        return build_block(line, content_type)
+
+    def line_types(self, lines: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Classify a whole batch of lines without building blocks.
         
-        if not line:
-            return ContentBlock(line, "empty", 1.0)
+        With the default regex backend this gives the same types as
+        classify_line() on every line, but each pattern family is checked
+        once for the whole batch (see CompiledRuleSet.content_types())
+        instead of once per line. Other backends (e.g. a trained model)
+        decide the types their own way.
         
-        # Check for commands first (highest priority)
-        command_result = self._check_command(line)
-        if command_result:
-            return command_result
+        Args:
+            lines: Text lines to classify (e.g. a page)
+            
+        Returns:
+            (stripped lines, content types), one entry per line
+        """
+        stripped = list(map(str.strip, lines))
+        content_types = ["empty"] * len(stripped)
         
-        # Check for code
-        code_result = self._check_code(line)
-        if code_result:
-            return code_result
+        # Image references never reach the backend
+        images = set()
+        if any(map(operator.contains, stripped, repeat(IMAGE_MARKER))):
+            images = {index for index, line in enumerate(stripped) if is_image_ref(line)}
+            for index in images:
+                content_types[index] = "image"
         
-        # Check for headings
-        heading_result = self._check_heading(line)
-        if heading_result:
-            return heading_result
-
-         # Check for URLs
-        url_result = self._check_url(line)
-        if url_result:
-            return url_result       
-
-        # Check for network elements
-        network_result = self._check_network(line)
-        if network_result:
-            return network_result
+        classify = [index for index in compress(range(len(stripped)), stripped) if index not in images]
+        if classify:
+            predicted = self.backend.predict([stripped[index] for index in classify])
+            for index, content_type in zip(classify, predicted):
+                content_types[index] = content_type
         
-        # Check for file paths
-        path_result = self._check_path(line)
-        if path_result:
-            return path_result
+        return stripped, content_types
+
+    def classify_lines(self, lines: List[str]) -> List[ContentBlock]:
+        """
+        Classify a whole batch of lines at once.
         
-        # Default to regular text
-        return ContentBlock(line, "text", 0.8)
-
-    def _check_command(self, line: str) -> Optional[ContentBlock]:
-        """Check if line is a command."""
-        if self._line_matches_command_pattern(line):               
-            shell_type = self._determine_shell_type(line)                
-            return ContentBlock(
-                line, 
-                "command", 
-                0.9,
-                {"shell_type": shell_type}
-            )
-        return None
-
-    def _line_matches_command_pattern(self, line: str) -> bool:
-        """Check if line matches any command pattern."""
-        for pattern in self.command_patterns:
-            if re.match(pattern, line, re.IGNORECASE):
-                return True
-        return False
-
-    def _determine_shell_type(self, line: str) -> str:    
-        """Determine the type of shell based on the command."""
-        if line.startswith("python"):
-            return "python"
-        elif line.startswith("php"):
-            return "php"
-        else:
-            return "bash"
-
-    def _check_code(self, line: str) -> Optional[ContentBlock]:
-        """Check if line is code."""
-        if self._line_matches_code_pattern(line):
-            language = self._determine_code_language(line)                
-            return ContentBlock(
-                  line, 
-                  "code", 
-                  0.85,
-                  {"language": language}
-              )
-        return None
-    
-    def _line_matches_code_pattern(self, line: str) -> bool:
-        """Check if line matches any code pattern."""
-        for pattern in self.code_patterns:
-            if re.search(pattern, line):
-                return True
-        return False
-
-    def _determine_code_language(self, line: str) -> str:
-        """Determine the language of the code."""
-        if "def " in line:
-            return "python"
-        if "function " in line:
-            return "javascript"
-        if "<?php" in line:
-            return "php"
-        if "public class" in line:
-            return "java"
-        return "unknown"
-
-    def _check_heading(self, line: str) -> Optional[ContentBlock]:
-        """Check if line is a heading."""
-        # Skip very long lines (unlikely to be headings)
-        if len(line) > 100:
-            return None
-        if self._line_matches_heading_pattern(line):
-            level = self._determine_heading_level(line)
-            return ContentBlock(
-                line, 
-                "heading", 
-                0.8,
-                {"level": level}
-            )
-        return None
-     
-    def _line_matches_heading_pattern(self, line: str) -> bool:
-        """Check if line matches any heading pattern."""
-        for pattern in self.heading_patterns:
-            if re.match(pattern, line):
-                return True
-        return False
-
-    def _determine_heading_level(self, line: str) -> int:
-        """Determine the level of the heading."""
-        if re.match(r'^[0-9]+\.', line):
-            return 2  # Numbered sections are usually H2
-        elif line.isupper() and len(line) < 30:
-            return 1  # Short ALL CAPS are usually H1
-        else:
-            return 2  # Default to H2
-
-    def _check_network(self, line: str) -> Optional[ContentBlock]:
-        """Check if line contains network information."""
-        if self._line_matches_network_pattern(line):
-                return ContentBlock(
-                    line, 
-                    "network", 
-                    0.9,
-                    {"contains_ip": True}
-                )
-        return None
-    
-    def _line_matches_network_pattern(self, line: str) -> bool:
-        """Check if line matches any network pattern."""
-        for pattern in self.network_patterns:
-            if re.search(pattern, line):
-                return True
-        return False
-
-    def _check_path(self, line: str) -> Optional[ContentBlock]:
-        """Check if line contains file paths."""
-        if self._line_matches_path_pattern(line): 
-            return ContentBlock(
-                    line, 
-                    "path", 
-                    0.85,
-                    {"contains_path": True}
-                )
-        return None
-    
-    def _line_matches_path_pattern(self, line: str) -> bool:
-        """Check if line matches any path pattern."""
-        for pattern in self.path_patterns:
-            if re.search(pattern, line):
-                return True
-        return False
-
-    def _check_url(self, line: str) -> Optional[ContentBlock]:
-        """Check if line contains URLs."""
-        if self._line_matches_url_pattern(line):
-            return ContentBlock(
-                    line, 
-                    "url", 
-                    0.95,
-                    {"contains_url": True}
-                )
-        return None
-    
-    def _line_matches_url_pattern(self, line: str) -> bool:
-        """Check if line matches any URL pattern."""
-        for pattern in self.url_patterns:
-            if re.search(pattern, line):
-                return True
-        return False
+        Same types as line_types(), turned into blocks.
+        
+        Args:
+            lines: Text lines to classify (e.g. a page)
+            
+        Returns:
+            List of ContentBlock objects, one per line
+        """
+        return list(map(build_block, *self.line_types(lines)))
 
     def analyze_text(self, text: str) -> List[ContentBlock]:
         """
@@ -284,14 +442,138 @@ class ContentAnalyzer:
         Returns:
             List of ContentBlock objects
         """
-        lines = text.split('\n')
-        classified_blocks = []
+        return list(self.iter_analyze_text(text))
+
+    def iter_analyze_text(self, text: str) -> Iterator[ContentBlock]:
+        """
+        Classify lines in batches without building a list.
+        
+        Useful for streaming consumers such as exporters. Lines that are
+        exactly a page separator ("--- Page 3 ---") start a new page.
+        
+        Args:
+            text: Multi-line text to analyze
+            
+        Yields:
+            ContentBlock objects in document order
+        """
+        batches = ((batch, False) for batch in self._split_batches(text.split('\n')))
+        return self._iter_blocks(self._iter_typed_batches(batches))
+
+    def iter_analyze_chunks(self, chunks: Iterable[str]) -> Iterator[ContentBlock]:
+        """
+        Classify a (possibly lazy) stream of text chunks, e.g. pages.
+        
+        Each chunk is classified as one batch, and the next chunk is only
+        pulled once the previous one's blocks have been consumed. The
+        lines are those of the chunks joined with newlines. Pages start
+        at the separator chunks PDFProcessor.iter_text_chunks() yields;
+        text inside other chunks never starts a page.
+        
+        Args:
+            chunks: Multi-line text chunks
+            
+        Yields:
+            ContentBlock objects in document order
+        """
+        return self._iter_blocks(self.iter_line_types(chunks))
+
+    def iter_line_types(self, chunks: Iterable[str]) -> Iterator[TypedLine]:
+        """
+        Like iter_analyze_chunks(), but without building ContentBlocks.
+        
+        For consumers that only need the types and positions (counting,
+        indexing), this skips the metadata and block objects entirely.
+        
+        Args:
+            chunks: Multi-line text chunks
+            
+        Yields:
+            (stripped text, content type, page number, line number,
+            page marker) for every line, in document order
+        """
+        batches = (
+            (batch, PAGE_SEPARATOR_PATTERN.fullmatch(chunk) is not None)
+            for chunk in chunks
+            for batch in self._split_batches(chunk.split('\n'))
+        )
+        return self._iter_typed_batches(batches, markers_in_text=False)
+
+    def iter_analyze_lines(self, lines: Iterable[str]) -> Iterator[ContentBlock]:
+        """
+        Classify a (possibly lazy) stream of lines.
         
-        for line in lines:
-            block = self.classify_line(line)
-            classified_blocks.append(block)
+        Lines are pulled from the stream batch_size at a time. Lines that
+        are exactly a page separator start a new page.
         
-        return classified_blocks
+        Args:
+            lines: Text lines without trailing newlines
+            
+        Yields:
+            ContentBlock objects in document order
+        """
+        line_iterator = iter(lines)
+        batches = iter(lambda: list(islice(line_iterator, self.batch_size)), [])
+        return self._iter_blocks(self._iter_typed_batches((batch, False) for batch in batches))
+
+    def _split_batches(self, lines: List[str]) -> Iterator[List[str]]:
+        """Split a list of lines into batch_size pieces."""
+        for start in range(0, len(lines), self.batch_size):
+            yield lines[start:start + self.batch_size]
+
+    def _iter_blocks(self, typed_lines: Iterable[TypedLine]) -> Iterator[ContentBlock]:
+        """Build blocks one at a time, as the consumer pulls them."""
+        for typed_line in typed_lines:
+            yield build_block(*typed_line)
+
+    def _iter_typed_batches(self, batches: Iterable[Tuple[List[str], bool]],
+                            markers_in_text: bool = True) -> Iterator[TypedLine]:
+        """
+        Classify batches of lines and attach page and line positions.
+        
+        Line numbers count from the first line of a page's own text. The
+        lines of a page separator (the marker and, for a separator chunk,
+        the blank lines around it) are flagged as page_marker and don't
+        move the count.
+        
+        Args:
+            batches: (lines, whether the lines are a whole separator chunk)
+            markers_in_text: Also look for separator lines among ordinary
+                             lines (for plain text; chunk streams have
+                             separator chunks instead)
+        """
+        page_number = None
+        line_number = 0
+        
+        for batch, is_separator in batches:
+            texts, content_types = self.line_types(batch)
+            markers = self._find_page_markers(batch) if is_separator or markers_in_text else []
+            
+            start = 0
+            for end, marker_page in markers + [(len(batch), None)]:
+                # The lines up to the next marker, positioned in bulk
+                count = end - start
+                if is_separator:
+                    line_numbers = repeat(line_number, count)
+                else:
+                    line_numbers = range(line_number, line_number + count)
+                    line_number += count
+                yield from zip(texts[start:end], content_types[start:end], repeat(page_number, count),
+                               line_numbers, repeat(is_separator, count))
+                
+                if marker_page is not None:
+                    page_number = marker_page
+                    line_number = 0
+                    yield texts[end], content_types[end], page_number, 0, True
+                start = end + 1
+
+    def _find_page_markers(self, lines: List[str]) -> List[Tuple[int, int]]:
+        """(line index, page number) of the lines that are exactly a page separator."""
+        text = "\n".join(lines)
+        if "--- Page " not in text:
+            return []
+        return [(text.count("\n", 0, match.start()), int(match.group(1)))
+                for match in PAGE_MARKER_PATTERN.finditer(text)]
     
 
     def get_statistics(self, blocks: List[ContentBlock]) -> Dict:
@@ -0,0 +1,173 @@
+# src/document_pool.py
+import fitz  # PyMuPDF
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from contextlib import contextmanager
+
+
+class DocumentPool:
+    """
+    Keeps a small number of opened PDF documents around for reuse.
+
+    This is like a librarian's desk: the books people keep asking for
+    stay on the desk, and when the desk is full the one nobody has
+    touched for the longest time goes back on the shelf.
+
+    A fitz.Document must not be used by two threads at once, so each
+    pooled handle has at most one borrower. Anyone asking for a file
+    whose pooled handle is already lent out gets a private handle that
+    is closed again on release().
+    """
+
+    def __init__(self, max_documents: int = 4, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the document pool.
+
+        Args:
+            max_documents: Maximum number of documents kept open
+            max_bytes: Maximum estimated memory used by open documents
+        """
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+
+        # key -> {"document", "size", "users"}, least recently used first;
+        # "users" is 0 (idle) or 1 (lent out)
+        self._entries = OrderedDict()
+        self._keys_by_document = {}
+        self._lock = threading.RLock()
+
+        # Statistics tracking
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.private_opens = 0
+
+    def acquire(self, pdf_path) -> fitz.Document:
+        """
+        Get an open document for a file, reusing a pooled handle when possible.
+
+        Args:
+            pdf_path: Path to the PDF file
+
+        Returns:
+            Open fitz document (give it back with release()); no other
+            borrower holds the same handle at the same time
+        """
+        path = Path(pdf_path)
+        key = self._make_key(path)
+
+        with self._lock:
+            document = self._reuse_entry(key)
+            if document is not None:
+                return document
+
+            if key in self._entries:
+                # The pooled handle is lent out - open one just for this caller
+                self.private_opens += 1
+                return fitz.open(path)
+
+            self.misses += 1
+            document = fitz.open(path)
+            self._add_entry(key, document, path.stat().st_size)
+            return document
+
+    def _make_key(self, path: Path) -> str:
+        """Build a pool key that changes whenever the file on disk changes."""
+        stat = path.stat()
+        return f"{path.resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _reuse_entry(self, key: str) -> Optional[fitz.Document]:
+        """Return the idle pooled document for the key and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None or entry["users"] > 0:
+            return None
+        self._entries.move_to_end(key)
+        entry["users"] += 1
+        self.hits += 1
+        return entry["document"]
+
+    def _add_entry(self, key: str, document: fitz.Document, size: int):
+        """Register a freshly opened document and evict old ones if needed."""
+        self._entries[key] = {"document": document, "size": size, "users": 1}
+        self._keys_by_document[id(document)] = key
+        self._evict_if_needed()
+
+    def release(self, document: fitz.Document):
+        """
+        Give a document back to the pool.
+
+        The document stays open for the next caller unless the pool
+        is over its limits, in which case it may be closed right away.
+        """
+        with self._lock:
+            key = self._keys_by_document.get(id(document))
+            if key is None:
+                # A private handle (or not ours) - close it so it can't leak
+                document.close()
+                return
+            entry = self._entries[key]
+            entry["users"] = max(0, entry["users"] - 1)
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """Close least recently used idle documents until within limits."""
+        for key in list(self._entries.keys()):
+            if not self._is_over_limits():
+                return
+            if self._entries[key]["users"] == 0:
+                self._close_entry(key)
+                self.evictions += 1
+
+    def _is_over_limits(self) -> bool:
+        """Check whether the pool holds too many or too large documents."""
+        return (len(self._entries) > self.max_documents
+                or self.memory_in_use() > self.max_bytes)
+
+    def _close_entry(self, key: str):
+        """Close a pooled document and forget about it."""
+        entry = self._entries.pop(key)
+        self._keys_by_document.pop(id(entry["document"]), None)
+        entry["document"].close()
+
+    def memory_in_use(self) -> int:
+        """Estimated bytes held by all open documents."""
+        return sum(entry["size"] for entry in self._entries.values())
+
+    @contextmanager
+    def open(self, pdf_path):
+        """Use a pooled document inside a with-block and always release it."""
+        document = self.acquire(pdf_path)
+        try:
+            yield document
+        finally:
+            self.release(document)
+
+    def close_all(self):
+        """Close every pooled document, including ones still in use."""
+        with self._lock:
+            for key in list(self._entries.keys()):
+                self._close_entry(key)
+
+    def get_statistics(self) -> Dict:
+        """Get pool usage statistics."""
+        with self._lock:
+            return {
+                "open_documents": len(self._entries),
+                "in_use": sum(1 for entry in self._entries.values() if entry["users"] > 0),
+                "memory_bytes": self.memory_in_use(),
+                "max_documents": self.max_documents,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "private_opens": self.private_opens
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_all()
+        return False
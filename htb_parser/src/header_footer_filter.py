@@ -0,0 +1,152 @@
+# src/header_footer_filter.py
+import re
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# Page numbers change from page to page, so their digits are masked
+# before lines are compared: "Page 3 of 12" anywhere in a line, and
+# lines that are nothing but a number ("- 7 -", "3 / 12"). Other
+# numbers must repeat exactly, so "TASK 1" ... "TASK 5" stay.
+PAGE_REFERENCE_PATTERN = re.compile(r"\bpage\s+\d+(?:\s*(?:of|/)\s*\d+)?\b")
+BARE_NUMBER_PATTERN = re.compile(r"^[\W_]*\d+(?:\s*(?:of|/)\s*\d+)?[\W_]*$")
+NUMBER_PATTERN = re.compile(r"\d+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class HeaderFooterFilter:
+    """
+    Removes running headers, footers and page numbers from page texts.
+
+    This is like reading a stack of letters on the same letterhead: after
+    a few pages you stop reading the letterhead and the page numbers and
+    only read the body. A line counts as a running header or footer when
+    the same text (with page numbers masked) sits at the same position from
+    the top or bottom of the page on at least min_repeats pages of a
+    sliding window around its page. Headers and footers are the outermost
+    lines, so checking stops at the first line of an edge that doesn't
+    repeat; body text just inside a header is never removed.
+
+    Works in one streaming pass: pages are held back only until the
+    window ahead of them has been read, so at most window_size pages are
+    in memory and a page is yielded window_size // 2 pages late.
+    """
+
+    def __init__(self, window_size: int = 7, min_repeats: int = 3,
+                 edge_lines: int = 2, max_line_length: int = 120):
+        """
+        Initialize the filter.
+
+        Args:
+            window_size: Pages compared with each page (itself included)
+            min_repeats: Pages in the window that must share a line for it to be removed
+            edge_lines: Non-empty lines at the top and at the bottom that are checked
+            max_line_length: Longer lines are never treated as headers or footers
+        """
+        if min_repeats < 2 or min_repeats > window_size:
+            raise ValueError("min_repeats must be between 2 and window_size")
+
+        self.window_size = window_size
+        self.min_repeats = min_repeats
+        self.edge_lines = edge_lines
+        self.max_line_length = max_line_length
+
+        # Statistics tracking
+        self.pages_seen = 0
+        self.lines_removed = 0
+        self.chars_removed = 0
+        self.removed_lines: Dict[str, int] = {}
+
+    def normalize_line(self, line: str) -> str:
+        """Text used to compare lines between pages (page numbers become "#")."""
+        line = WHITESPACE_PATTERN.sub(" ", line.strip().lower())
+        if BARE_NUMBER_PATTERN.match(line):
+            return NUMBER_PATTERN.sub("#", line)
+        return PAGE_REFERENCE_PATTERN.sub(lambda match: NUMBER_PATTERN.sub("#", match.group()), line)
+
+    def edge_lines_of(self, text: str) -> Dict[str, List[Tuple[Optional[str], int]]]:
+        """
+        The lines that could be headers or footers.
+
+        Returns:
+            "top" and "bottom" -> (normalized line, line index in the text)
+            for the outermost edge_lines non-empty lines, outermost first;
+            lines that can't be headers have None instead of text
+        """
+        lines = text.split("\n")
+        non_empty = [index for index, line in enumerate(lines) if line.strip()]
+
+        edges = {}
+        for edge, indexes in (("top", non_empty[:self.edge_lines]),
+                              ("bottom", non_empty[::-1][:self.edge_lines])):
+            edges[edge] = []
+            for index in indexes:
+                line = lines[index].strip()
+                # Punctuation-only lines (e.g. code fences) stay
+                candidate = len(line) <= self.max_line_length and any(char.isalnum() for char in line)
+                edges[edge].append((self.normalize_line(line) if candidate else None, index))
+        return edges
+
+    def filter_pages(self, page_texts: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """
+        Strip running headers and footers from a stream of page texts.
+
+        Args:
+            page_texts: (page number, text) pairs, e.g. PDFProcessor.iter_page_texts()
+
+        Yields:
+            The same pairs, in order, without header and footer lines
+        """
+        half_window = self.window_size // 2
+        # (page number, text, edge keys) of the pages around the next one to yield
+        window: Deque[Tuple[int, str, Dict]] = deque()
+        next_index = 0  # position of the next page to yield within the window
+
+        for page_number, text in page_texts:
+            self.pages_seen += 1
+            window.append((page_number, text, self.edge_lines_of(text)))
+            if len(window) - 1 - next_index >= half_window:
+                yield self._strip_page(window, next_index)
+                next_index += 1
+                if next_index > half_window:
+                    window.popleft()
+                    next_index -= 1
+
+        while next_index < len(window):
+            yield self._strip_page(window, next_index)
+            next_index += 1
+
+    def _strip_page(self, window: Deque[Tuple[int, str, Dict]], index: int) -> Tuple[int, str]:
+        """Remove the lines of one page that repeat across its window."""
+        page_number, text, edges = window[index]
+        others = [other_edges for position, (_, _, other_edges) in enumerate(window) if position != index]
+
+        repeated = set()
+        for edge, edge_lines in edges.items():
+            for position, (normalized, line_index) in enumerate(edge_lines):
+                matches = sum(1 for other in others
+                              if position < len(other[edge]) and other[edge][position][0] == normalized)
+                if normalized is None or 1 + matches < self.min_repeats:
+                    break
+                repeated.add(line_index)
+        if not repeated:
+            return page_number, text
+
+        lines = text.split("\n")
+        for line_index in repeated:
+            line = lines[line_index].strip()
+            self.lines_removed += 1
+            self.chars_removed += len(line)
+            normalized = self.normalize_line(line)
+            self.removed_lines[normalized] = self.removed_lines.get(normalized, 0) + 1
+        return page_number, "\n".join(line for line_index, line in enumerate(lines)
+                                      if line_index not in repeated)
+
+    def get_statistics(self) -> Dict:
+        """Report how much header and footer text was removed."""
+        return {
+            "pages_seen": self.pages_seen,
+            "lines_removed": self.lines_removed,
+            "chars_removed": self.chars_removed,
+            "running_lines": sorted(self.removed_lines, key=self.removed_lines.get, reverse=True)[:10]
+        }
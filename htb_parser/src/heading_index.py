@@ -0,0 +1,263 @@
+# src/heading_index.py
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Characters GitHub drops when turning a heading into an anchor
+_SLUG_STRIP_PATTERN = re.compile(r'[^\w\- ]')
+
+
+@lru_cache(maxsize=4096)
+def github_slug(text: str) -> str:
+    """
+    Anchor GitHub generates for a heading, before duplicates are numbered.
+
+    Lowercase, drop punctuation (letters, digits, "_", "-" and spaces
+    stay), then turn spaces into hyphens: "1. Port Scan (TCP)" becomes
+    "1-port-scan-tcp". Cached, since writeups repeat the same headings.
+    """
+    return _SLUG_STRIP_PATTERN.sub("", text.strip().lower()).replace(" ", "-")
+
+
+def section_index_path(output_path: str) -> str:
+    """Where the section index of a rendered markdown file is stored."""
+    return os.path.splitext(output_path)[0] + ".sections.json"
+
+
+@dataclass
+class HeadingEntry:
+    """One heading in the rendered markdown."""
+    text: str
+    level: int
+    slug: str
+    parent: Optional[int] = None  # Index of the enclosing heading
+    byte_offset: Optional[int] = None  # Start of the heading line in the body
+    end_offset: Optional[int] = None  # End of the section in the body
+    page_number: Optional[int] = None
+    line_number: int = 0
+    last_page: Optional[int] = None  # Page of the section's last non-empty line
+    last_line: Optional[int] = None  # That line's position on its page
+
+
+class HeadingIndex:
+    """
+    Every heading of a document with its anchor, nesting and position.
+
+    This is like the table of contents a typesetter keeps while laying
+    out a book: it is filled in as the headings are rendered, gives every
+    heading a unique GitHub-style anchor ("enumeration", "enumeration-1",
+    ...), and remembers where each section starts and ends in the output
+    so a section can be read back without rendering the document again.
+
+    Byte offsets are relative to the markdown body; body_offset is the
+    size of whatever comes before it (document header and TOC). Page and
+    line positions point back into the PDF, so one section can also be
+    extracted and rendered again from just the pages it covers.
+    """
+
+    def __init__(self, reserved_headings: Iterable[str] = ()):
+        """
+        Initialize an empty index.
+
+        Args:
+            reserved_headings: Headings outside the body that also take
+                               an anchor (e.g. the title, "Table of Contents")
+        """
+        self.entries: List[HeadingEntry] = []
+        self.slug_counts: Dict[str, int] = {}
+        self.body_offset = 0
+        self.body_length: Optional[int] = None
+        self.reserved_headings = list(reserved_headings)
+
+        for heading in self.reserved_headings:
+            self._unique_slug(heading)
+
+    def _unique_slug(self, text: str) -> str:
+        """Slug for the next heading with this text, numbered like GitHub does."""
+        base = github_slug(text)
+        slug = base
+        while slug in self.slug_counts:
+            self.slug_counts[base] += 1
+            slug = f"{base}-{self.slug_counts[base]}"
+        self.slug_counts[slug] = 0
+        return slug
+
+    def add_heading(self, text: str, level: int, byte_offset: Optional[int] = None,
+                    page_number: Optional[int] = None, line_number: int = 0,
+                    previous_line: Optional[Tuple[int, int]] = None) -> HeadingEntry:
+        """
+        Append the next heading in document order.
+
+        Headings can keep being added after the TOC was built (e.g. for
+        appended pages); earlier anchors never change.
+
+        Args:
+            text: Heading text as rendered (without "#" marks)
+            level: Rendered heading level (1-6)
+            byte_offset: Start of the heading line in the markdown body
+            page_number: Page the heading came from
+            line_number: Line of the heading on that page
+            previous_line: (page, line) of the last non-empty line before
+                           this heading, where the sections it closes end
+
+        Returns:
+            The new entry
+        """
+        parent = None
+        for index in range(len(self.entries) - 1, -1, -1):
+            if self.entries[index].level < level:
+                parent = index
+                break
+
+        # The previous sections at this level or deeper end here
+        if byte_offset is not None or previous_line is not None:
+            for entry in self._open_sections(level):
+                self._end_section(entry, byte_offset, previous_line)
+
+        entry = HeadingEntry(text, level, self._unique_slug(text), parent,
+                             byte_offset, None, page_number, line_number)
+        self.entries.append(entry)
+        return entry
+
+    def _open_sections(self, level: int) -> Iterable[HeadingEntry]:
+        """Sections still open that a new heading at this level closes."""
+        for entry in reversed(self.entries):
+            if entry.end_offset is None and entry.last_page is None and entry.level >= level:
+                yield entry
+            if entry.level < level:
+                break
+
+    def _end_section(self, entry: HeadingEntry, end_offset: Optional[int],
+                     last_line: Optional[Tuple[int, int]]):
+        """Record where a section ends in the markdown and in the PDF."""
+        entry.end_offset = end_offset
+        if last_line is not None:
+            entry.last_page, entry.last_line = last_line
+
+    def close(self, body_length: Optional[int] = None, last_line: Optional[Tuple[int, int]] = None):
+        """
+        Mark the end of the document; all open sections end there.
+
+        Args:
+            body_length: Size of the markdown body in bytes
+            last_line: (page, line) of the document's last non-empty line
+        """
+        self.body_length = body_length
+        for entry in self.entries:
+            if entry.end_offset is None and entry.last_page is None:
+                self._end_section(entry, body_length, last_line)
+
+    def find(self, slug_or_text: str) -> Optional[HeadingEntry]:
+        """Look up a heading by anchor, or by text (first match, case-insensitive)."""
+        for entry in self.entries:
+            if entry.slug == slug_or_text:
+                return entry
+        wanted = slug_or_text.strip().lower()
+        for entry in self.entries:
+            if entry.text.lower() == wanted:
+                return entry
+        return None
+
+    def section_range(self, slug_or_text: str) -> Tuple[int, int]:
+        """
+        Absolute byte range of a section (heading included) in the output.
+
+        Raises:
+            KeyError: If the heading isn't in the index
+            ValueError: If the index was built without byte offsets
+        """
+        entry = self._find_entry(slug_or_text)
+        if entry.byte_offset is None or entry.end_offset is None:
+            raise ValueError("This index has no byte offsets")
+        return self.body_offset + entry.byte_offset, self.body_offset + entry.end_offset
+
+    def line_range(self, slug_or_text: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """
+        First and last (page, line) of a section, both inclusive.
+
+        Pages are 1-based like ContentBlock.page_number.
+
+        Raises:
+            KeyError: If the heading isn't in the index
+            ValueError: If the index was built without page positions
+        """
+        entry = self._find_entry(slug_or_text)
+        if entry.page_number is None or entry.last_page is None:
+            raise ValueError("This index has no page positions")
+        return (entry.page_number, entry.line_number), (entry.last_page, entry.last_line)
+
+    def page_range(self, slug_or_text: str) -> Tuple[int, int]:
+        """
+        Pages a section covers, as a 0-based (start_page, end_page) range.
+
+        The range can be passed straight to PDFProcessor.iter_page_texts().
+        """
+        (first_page, _), (last_page, _) = self.line_range(slug_or_text)
+        return first_page - 1, last_page
+
+    def _find_entry(self, slug_or_text: str) -> HeadingEntry:
+        """find(), raising KeyError for unknown headings."""
+        entry = self.find(slug_or_text)
+        if entry is None:
+            raise KeyError(f"No heading matches: {slug_or_text}")
+        return entry
+
+    def read_section(self, markdown_path: str, slug_or_text: str) -> str:
+        """Read one section straight out of a rendered markdown file."""
+        start, end = self.section_range(slug_or_text)
+        with open(markdown_path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start).decode("utf-8")
+
+    def toc_lines(self) -> List[str]:
+        """Table of contents entries, indented by heading level."""
+        return [self.toc_line(entry) for entry in self.entries]
+
+    def toc_line(self, entry: HeadingEntry) -> str:
+        """Table of contents entry of one heading."""
+        return f"{'  ' * (entry.level - 1)}- [{entry.text}](#{entry.slug})"
+
+    def children(self, index: Optional[int]) -> List[int]:
+        """Indexes of the headings directly below a heading (None for top level)."""
+        return [position for position, entry in enumerate(self.entries) if entry.parent == index]
+
+    def to_dict(self) -> Dict:
+        """Plain data for JSON storage."""
+        return {
+            "reserved_headings": self.reserved_headings,
+            "body_offset": self.body_offset,
+            "body_length": self.body_length,
+            "entries": [asdict(entry) for entry in self.entries]
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HeadingIndex":
+        """Rebuild an index stored with to_dict()."""
+        index = cls(data.get("reserved_headings", ()))
+        index.body_offset = data.get("body_offset", 0)
+        index.body_length = data.get("body_length")
+        for stored in data["entries"]:
+            entry = HeadingEntry(**stored)
+            index.entries.append(entry)
+            # Replay the slug counters so headings added later stay unique
+            index.slug_counts[entry.slug] = 0
+            base = github_slug(entry.text)
+            if entry.slug != base:
+                index.slug_counts[base] = max(index.slug_counts.get(base, 0),
+                                              int(entry.slug.rsplit("-", 1)[1]))
+        return index
+
+    def save(self, index_path: str):
+        """Write the index as JSON next to the rendered output."""
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, index_path: str) -> "HeadingIndex":
+        """Load an index written by save()."""
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
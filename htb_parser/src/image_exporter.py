@@ -0,0 +1,322 @@
+# src/image_exporter.py
+import hashlib
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+from src.content_analyzer import image_ref_line
+from src.page_context import PageContext
+
+
+# Formats markdown viewers can show as they are; others are converted to PNG
+WEB_IMAGE_FORMATS = {"png", "jpeg", "jpg", "gif"}
+
+
+class ImageExporter:
+    """
+    Writes a document's embedded images to disk and marks where they go.
+
+    This is like a photo editor going through a scrapbook: every photo
+    is scanned once, even if the same sticker is on every page, and a
+    note "photo goes here" is left in the text so the markdown shows it
+    at the right spot.
+
+    Images are identified by their xref, so an image used on many pages
+    is extracted and written exactly once. Extraction uses PyMuPDF and
+    stays on the calling thread (a document must not be shared between
+    threads); the files are written by a thread pool, with at most
+    max_pending_bytes of image data waiting to be written.
+
+    Files are named after the document's stem plus a short hash of its
+    full key, so documents with the same name in different folders
+    don't overwrite each other's images.
+    """
+
+    def __init__(self, output_dir: str, link_prefix: Optional[str] = None,
+                 max_workers: int = 4, max_pending_bytes: int = 32 * 1024 * 1024,
+                 min_pixels: int = 0, markdown_dir: Optional[str] = None):
+        """
+        Initialize the image exporter.
+
+        Args:
+            output_dir: Directory the images are written to
+            link_prefix: Path used in the markdown links (default: output_dir
+                         relative to markdown_dir)
+            max_workers: Threads writing image files
+            max_pending_bytes: Image bytes allowed to wait for a writer
+            min_pixels: Skip images smaller than this (width * height)
+            markdown_dir: Directory the markdown is written to (default: the
+                          parent of output_dir, i.e. images in a folder next
+                          to the markdown); see link_from()
+        """
+        self.output_dir = Path(output_dir)
+        self.fixed_link_prefix = link_prefix
+        self.markdown_dir = Path(markdown_dir) if markdown_dir is not None else self.output_dir.parent
+        self.max_workers = max_workers
+        self.max_pending_bytes = max_pending_bytes
+        self.min_pixels = min_pixels
+
+        self.file_prefix = "image"
+        self.exported: Dict[int, Optional[str]] = {}  # xref -> file name (None: skipped)
+        self.named: Dict[int, Optional[str]] = {}  # Same, for images only named (see annotate_page)
+        self.executor = None
+        self.pending = {}  # future -> bytes it holds
+        self.pending_bytes = 0
+
+        # Statistics tracking
+        self.references = 0
+        self.images_written = 0
+        self.bytes_written = 0
+        self.images_skipped = 0
+
+    @property
+    def link_prefix(self) -> str:
+        """Path of output_dir as seen from the markdown file."""
+        if self.fixed_link_prefix is not None:
+            return self.fixed_link_prefix
+        relative = os.path.relpath(self.output_dir.resolve(), self.markdown_dir.resolve())
+        return Path(relative).as_posix()
+
+    def link_from(self, markdown_path: str):
+        """Make the default links relative to the folder of this markdown file."""
+        self.markdown_dir = Path(markdown_path).parent
+
+    def begin_document(self, doc_key: str):
+        """Start a new document; its files are named after it."""
+        self.exported = {}
+        self.named = {}
+        key_hash = hashlib.sha1(doc_key.encode("utf-8")).hexdigest()[:8]
+        self.file_prefix = f"{Path(doc_key).stem or 'image'}_{key_hash}"
+
+    def collect_images(self, document: fitz.Document) -> Dict[int, List[int]]:
+        """
+        Find every image xref in the document and the pages using it.
+
+        Returns:
+            xref -> 0-based page numbers, in page order
+        """
+        pages_by_xref: Dict[int, List[int]] = {}
+        for page_number in range(len(document)):
+            for image in document.get_page_images(page_number, full=True):
+                pages = pages_by_xref.setdefault(image[0], [])
+                if not pages or pages[-1] != page_number:
+                    pages.append(page_number)
+        return pages_by_xref
+
+    def export_document(self, document: fitz.Document, doc_key: str = "") -> Dict:
+        """
+        Write every unique image of a document, without converting its text.
+
+        Returns:
+            The export statistics
+        """
+        self.begin_document(doc_key or document.name or "")
+        for xref in self.collect_images(document):
+            self._export(document, xref)
+        return self.finish()
+
+    def iter_annotated_pages(self, document: fitz.Document,
+                             page_texts: Iterable[Tuple[int, str]],
+                             page_context: Optional[Callable[[int], PageContext]] = None,
+                             write: bool = True) -> Iterator[Tuple[int, str]]:
+        """
+        Add image references to page texts, exporting images as they appear.
+
+        Args:
+            document: Open document the pages come from
+            page_texts: (page number (0-based), page text) pairs
+            page_context: Optional lookup of a page's PageContext (e.g.
+                          PDFProcessor.page_context), so the page parsed for
+                          its text isn't parsed again for line positions
+            write: Write the images (False only adds the references, e.g.
+                   for a preview of a document converted before)
+
+        Yields:
+            The same pairs, with a markdown image line before the first
+            text line below each image's top edge
+        """
+        for page_number, text in page_texts:
+            context = page_context(page_number) if page_context else None
+            yield page_number, self.annotate_page(document, page_number, text, context, write)
+
+    def annotate_page(self, document: fitz.Document, page_number: int, text: str,
+                      context: Optional[PageContext] = None, write: bool = True) -> str:
+        """
+        Insert image references into the plain text of one page.
+
+        With write=False the references get the same file names, but no
+        file is written and nothing is counted in the statistics.
+        """
+        context = context or PageContext(document[page_number])
+        page = context.page
+        placements = []
+        for image in context.get_images():
+            xref = image[0]
+            file_name = self._export(document, xref) if write else self._name(document, xref)
+            if file_name is None:
+                continue
+            for rect in page.get_image_rects(xref):
+                placements.append((rect.y0, rect.x0, xref, file_name))
+
+        if not placements:
+            return text
+
+        lines = text.split("\n")
+        line_tops = self._line_tops(context.get_layout(), lines)
+        # Images below all text go after the last text line
+        after_text = max((i + 1 for i, line_top in enumerate(line_tops) if line_top is not None), default=0)
+        # Insert from the bottom up so earlier indexes stay valid
+        for top, _, xref, file_name in sorted(placements, reverse=True):
+            index = next((i for i, line_top in enumerate(line_tops) if line_top is not None and line_top >= top),
+                         after_text)
+            lines.insert(index, self._image_ref(xref, page_number, file_name))
+        if write:
+            self.references += len(placements)
+        return "\n".join(lines)
+
+    def _line_tops(self, layout: Dict, lines: List[str]) -> List[Optional[float]]:
+        """
+        Top edge of every line of the page text (None if it isn't in the layout).
+
+        Text lines are matched to the layout lines in order by their text,
+        so lines removed from the text (e.g. running headers stripped by
+        HeaderFooterFilter) don't shift the others.
+        """
+        layout_lines = [(line["bbox"][1], "".join(span["text"] for span in line["spans"]).strip())
+                        for block in layout["blocks"] for line in block.get("lines", [])]
+        tops = []
+        position = 0
+        for line in lines:
+            line = line.strip()
+            match = next((index for index in range(position, len(layout_lines))
+                          if line and layout_lines[index][1] == line), None)
+            if match is None:
+                tops.append(None)
+                continue
+            tops.append(layout_lines[match][0])
+            position = match + 1
+        return tops
+
+    def _image_ref(self, xref: int, page_number: int, file_name: str) -> str:
+        """Marked markdown reference to an exported image (see image_ref_line())."""
+        link_prefix = self.link_prefix
+        link = f"{link_prefix.rstrip('/')}/{file_name}" if link_prefix not in ("", ".") else file_name
+        return image_ref_line(f"Image {xref} (page {page_number + 1})", link)
+
+    def _export(self, document: fitz.Document, xref: int) -> Optional[str]:
+        """Extract an image the first time its xref is seen and queue the write."""
+        if xref in self.exported:
+            return self.exported[xref]
+
+        image_data, extension = self._extract(document, xref)
+        if image_data is None:
+            self.exported[xref] = None
+            self.images_skipped += 1
+            return None
+
+        file_name = f"{self.file_prefix}_{xref:05d}.{extension}"
+        self.exported[xref] = file_name
+        self._submit(self.output_dir / file_name, image_data)
+        return file_name
+
+    def _name(self, document: fitz.Document, xref: int) -> Optional[str]:
+        """File name _export() gives an image, without writing it."""
+        if xref in self.exported:
+            return self.exported[xref]
+        if xref not in self.named:
+            info = self._image_info(document, xref)
+            # The extension _extract() would pick, without re-encoding anything
+            extension = info["ext"] if info and self._is_web_ready(info) else "png"
+            self.named[xref] = f"{self.file_prefix}_{xref:05d}.{extension}" if info else None
+        return self.named[xref]
+
+    def _image_info(self, document: fitz.Document, xref: int) -> Optional[Dict]:
+        """PyMuPDF's image info, or None for images that are skipped."""
+        try:
+            info = document.extract_image(xref)
+        except Exception:
+            return None
+        if not info or info["width"] * info["height"] < self.min_pixels:
+            return None
+        return info
+
+    def _is_web_ready(self, info: Dict) -> bool:
+        """Whether an image can be written as it is stored."""
+        return info["ext"] in WEB_IMAGE_FORMATS and not info.get("smask")
+
+    def _extract(self, document: fitz.Document, xref: int) -> Tuple[Optional[bytes], str]:
+        """Image bytes and file extension, converting to PNG where needed."""
+        info = self._image_info(document, xref)
+        if info is None:
+            return None, ""
+
+        if self._is_web_ready(info):
+            return info["image"], info["ext"]
+
+        # Transparency masks and formats like JPX/JBIG2 need a re-encode
+        pixmap = fitz.Pixmap(document, xref)
+        if info.get("smask"):
+            pixmap = fitz.Pixmap(pixmap, fitz.Pixmap(document, info["smask"]))
+        if pixmap.n - pixmap.alpha > 3:
+            pixmap = fitz.Pixmap(fitz.csRGB, pixmap)
+        return pixmap.tobytes("png"), "png"
+
+    def _submit(self, path: Path, image_data: bytes):
+        """Hand a file to the writer threads, waiting if too much is queued."""
+        if self.executor is None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        while self.pending and self.pending_bytes + len(image_data) > self.max_pending_bytes:
+            done, _ = wait(self.pending, return_when=FIRST_COMPLETED)
+            self._collect(done)
+
+        future = self.executor.submit(_write_file, path, image_data)
+        self.pending[future] = len(image_data)
+        self.pending_bytes += len(image_data)
+
+    def _collect(self, done):
+        """Account for finished writes (re-raising write errors)."""
+        for future in done:
+            self.pending_bytes -= self.pending.pop(future)
+            self.bytes_written += future.result()
+            self.images_written += 1
+
+    def finish(self) -> Dict:
+        """Wait for all queued writes and stop the writer threads."""
+        if self.pending:
+            done, _ = wait(list(self.pending))
+            self._collect(done)
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        return self.get_statistics()
+
+    def get_statistics(self) -> Dict:
+        """Report how many images were referenced, written and skipped."""
+        return {
+            "unique_images": sum(1 for file_name in self.exported.values() if file_name),
+            "references": self.references,
+            "images_written": self.images_written,
+            "bytes_written": self.bytes_written,
+            "images_skipped": self.images_skipped,
+            "output_dir": str(self.output_dir)
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish()
+        return False
+
+
+def _write_file(path: Path, data: bytes) -> int:
+    """Write one image file (runs on a writer thread)."""
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(data)
@@ -0,0 +1,338 @@
+# src/job_journal.py
+import os
+import socket
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# A job moves pending -> running -> done or failed; a running job whose
+# worker died goes back to pending (see JobJournal.recover_abandoned)
+JOB_STATES = ["pending", "running", "done", "failed"]
+
+# Changes every time a Linux host boots
+BOOT_ID_PATH = Path("/proc/sys/kernel/random/boot_id")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    input_path TEXT UNIQUE NOT NULL,
+    input_size INTEGER NOT NULL,
+    input_mtime_ns INTEGER NOT NULL,
+    output_path TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    claimed_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL,
+    page_count INTEGER,
+    output_hash TEXT,
+    output_size INTEGER,
+    processing_time REAL,
+    error TEXT,
+    suspect INTEGER NOT NULL DEFAULT 0,
+    boot_id TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_state ON jobs (state, id);
+CREATE TABLE IF NOT EXISTS pages (
+    job_id INTEGER NOT NULL,
+    page_number INTEGER NOT NULL,
+    block_count INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (job_id, page_number)
+);
+"""
+
+
+def worker_name() -> str:
+    """Identify the calling process as "host:pid"."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def boot_id() -> Optional[str]:
+    """Identify the current boot of this host (None where unknown)."""
+    try:
+        return BOOT_ID_PATH.read_text().strip()
+    except OSError:
+        return None
+
+
+def _file_signature(path: Path) -> tuple:
+    """Size and modification time, which change whenever the file does."""
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+class JobJournal:
+    """
+    A local SQLite record of a batch conversion, document by document.
+
+    This is like the logbook on a factory floor: every order is written
+    down before work starts, each worker signs an order out, notes every
+    step as it is done, and signs it back in with the result. After a
+    power cut the next shift reads the logbook and picks up exactly the
+    orders nobody finished.
+
+    Several processes can share one journal. Claiming a job happens in
+    an immediate (write-locked) transaction, so two workers never get
+    the same document. Workers refresh a heartbeat with every page, and
+    jobs whose worker died (or went silent for lease_seconds) can be
+    handed out again.
+
+    A worker that dies doesn't say why, and one process running out of
+    memory takes its whole pool down, so a dead worker only counts
+    against its document when the document ran alone: a job abandoned
+    in a shared pool becomes a "suspect" that is retried on its own
+    (see claim_job()), and a job abandoned because the host rebooted is
+    simply queued again.
+    """
+
+    def __init__(self, db_path: str = "htb_jobs.sqlite3", lease_seconds: float = 600.0):
+        """
+        Open (or create) the job journal.
+
+        Args:
+            db_path: SQLite database file
+            lease_seconds: A running job without a heartbeat for this long
+                           counts as abandoned
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.connection = sqlite3.connect(db_path, timeout=60.0)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def add_job(self, input_path: str, output_path: str, retry_failed: bool = False) -> bool:
+        """
+        Queue one document for conversion.
+
+        A document that is already done is only queued again if the PDF
+        changed or its output is missing; a failed one only with retry_failed.
+
+        Args:
+            input_path: PDF to convert
+            output_path: Markdown file to write
+            retry_failed: Queue documents that failed before again
+
+        Returns:
+            True if the document is (now) pending, False if it is skipped
+        """
+        input_size, input_mtime_ns = _file_signature(Path(input_path))
+
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT * FROM jobs WHERE input_path = ?", (input_path,)
+            ).fetchone()
+            if row is None:
+                self.connection.execute(
+                    "INSERT INTO jobs (input_path, input_size, input_mtime_ns, output_path) "
+                    "VALUES (?, ?, ?, ?)",
+                    (input_path, input_size, input_mtime_ns, output_path)
+                )
+                return True
+
+            unchanged = (row["input_size"], row["input_mtime_ns"], row["output_path"]) == \
+                (input_size, input_mtime_ns, output_path)
+            if row["state"] in ("pending", "running"):
+                return True
+            if unchanged and row["state"] == "done" and Path(output_path).exists():
+                return False
+            if unchanged and row["state"] == "failed" and not retry_failed:
+                return False
+
+            self.connection.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0, suspect = 0, error = NULL, "
+                "input_size = ?, input_mtime_ns = ?, output_path = ? WHERE id = ?",
+                (input_size, input_mtime_ns, output_path, row["id"])
+            )
+            return True
+
+    def recover_abandoned(self, max_attempts: int = 2) -> int:
+        """
+        Hand running jobs whose worker is gone back to the queue.
+
+        A worker is gone if it ran on this host and its process no longer
+        exists, or if its heartbeat is older than the lease. Only a
+        suspect job (one that ran alone) uses up the attempt: after
+        max_attempts of those it is marked failed, so one PDF that
+        crashes workers can't stall the batch. Any other job may have
+        been killed with its pool or by a reboot, so its attempt is
+        given back; a job that died in a pool becomes a suspect.
+
+        Returns:
+            Number of jobs recovered (requeued or failed)
+        """
+        now = time.time()
+        current_boot = boot_id()
+        recovered = 0
+
+        with self.connection:
+            rows = self.connection.execute(
+                "SELECT id, worker, attempts, heartbeat_at, suspect, boot_id FROM jobs "
+                "WHERE state = 'running'"
+            ).fetchall()
+            for row in rows:
+                if not self._is_abandoned(row["worker"], row["heartbeat_at"], now):
+                    continue
+                rebooted = self._on_this_host(row["worker"]) and current_boot is not None \
+                    and row["boot_id"] not in (None, current_boot)
+                charged = row["suspect"] and not rebooted
+                if charged and row["attempts"] >= max_attempts:
+                    self.connection.execute(
+                        "UPDATE jobs SET state = 'failed', finished_at = ?, error = ? WHERE id = ?",
+                        (now, f"Worker {row['worker']} stopped during attempt {row['attempts']}", row["id"])
+                    )
+                elif charged:
+                    self.connection.execute(
+                        "UPDATE jobs SET state = 'pending', worker = NULL WHERE id = ?", (row["id"],)
+                    )
+                else:
+                    # Maybe not this document's fault: give the attempt back
+                    self.connection.execute(
+                        "UPDATE jobs SET state = 'pending', worker = NULL, attempts = attempts - 1, "
+                        "suspect = ? WHERE id = ?",
+                        (int(row["suspect"] or not rebooted), row["id"])
+                    )
+                recovered += 1
+        return recovered
+
+    def _on_this_host(self, worker: Optional[str]) -> bool:
+        """Check if a worker name ("host:pid") belongs to this host."""
+        return (worker or "").rpartition(":")[0] == socket.gethostname()
+
+    def _is_abandoned(self, worker: Optional[str], heartbeat_at: Optional[float], now: float) -> bool:
+        """Check if a running job's worker is dead or silent for too long."""
+        if heartbeat_at is None or now - heartbeat_at > self.lease_seconds:
+            return True
+        host, _, pid = (worker or "").rpartition(":")
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def claim_job(self, worker: Optional[str] = None, suspect: bool = False) -> Optional[Dict]:
+        """
+        Take the next pending job and mark it as running.
+
+        Args:
+            worker: Name recorded as the job's owner (default: worker_name())
+            suspect: Take a job whose worker died in a shared pool instead of
+                     a fresh one; the caller must run it without other jobs
+                     in the same process pool
+
+        Returns:
+            The claimed job as a dictionary, or None if nothing is pending
+        """
+        worker = worker or worker_name()
+        now = time.time()
+
+        # BEGIN IMMEDIATE takes the write lock before reading, so no other
+        # process can claim the same row in between
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.connection.execute(
+                "SELECT id FROM jobs WHERE state = 'pending' AND suspect = ? ORDER BY id LIMIT 1",
+                (int(suspect),)
+            ).fetchone()
+            if row is None:
+                self.connection.commit()
+                return None
+
+            self.connection.execute(
+                "UPDATE jobs SET state = 'running', attempts = attempts + 1, worker = ?, "
+                "claimed_at = ?, heartbeat_at = ?, boot_id = ?, error = NULL WHERE id = ?",
+                (worker, now, now, boot_id(), row["id"])
+            )
+            # Pages from an earlier, interrupted attempt are done again
+            self.connection.execute("DELETE FROM pages WHERE job_id = ?", (row["id"],))
+            job = self.connection.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            self.connection.commit()
+        except BaseException:
+            self.connection.rollback()
+            raise
+        return dict(job)
+
+    def record_page(self, job_id: int, page_number: int, block_count: int, seconds: float):
+        """Note that a page of a running job is finished (and refresh the heartbeat)."""
+        now = time.time()
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO pages (job_id, page_number, block_count, seconds, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, page_number, block_count, seconds, now)
+            )
+            self.connection.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", (now, job_id))
+
+    def complete_job(self, job_id: int, output_hash: str, output_size: int,
+                     page_count: int, processing_time: float):
+        """Mark a job as done, with the hash and size of the output it wrote."""
+        with self.connection:
+            self.connection.execute(
+                "UPDATE jobs SET state = 'done', finished_at = ?, output_hash = ?, output_size = ?, "
+                "page_count = ?, processing_time = ?, error = NULL WHERE id = ?",
+                (time.time(), output_hash, output_size, page_count, processing_time, job_id)
+            )
+
+    def fail_job(self, job_id: int, error: str, processing_time: float):
+        """Mark a job as failed; it is not retried unless queued with retry_failed."""
+        with self.connection:
+            self.connection.execute(
+                "UPDATE jobs SET state = 'failed', finished_at = ?, processing_time = ?, error = ? "
+                "WHERE id = ?",
+                (time.time(), processing_time, error, job_id)
+            )
+
+    def get_job(self, input_path: str) -> Optional[Dict]:
+        """The journal entry of one document, or None."""
+        row = self.connection.execute(
+            "SELECT * FROM jobs WHERE input_path = ?", (input_path,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def jobs(self, state: Optional[str] = None) -> List[Dict]:
+        """All jobs, or the jobs in one state, in the order they were queued."""
+        if state is None:
+            rows = self.connection.execute("SELECT * FROM jobs ORDER BY id")
+        else:
+            rows = self.connection.execute("SELECT * FROM jobs WHERE state = ? ORDER BY id", (state,))
+        return [dict(row) for row in rows]
+
+    def pages(self, job_id: int) -> List[Dict]:
+        """Finished pages of a job (1-based page numbers) with their timings."""
+        rows = self.connection.execute(
+            "SELECT page_number, block_count, seconds FROM pages WHERE job_id = ? ORDER BY page_number",
+            (job_id,)
+        )
+        return [dict(row) for row in rows]
+
+    def get_statistics(self) -> Dict:
+        """Number of jobs in each state, pending suspects, and pages recorded."""
+        counts = {state: 0 for state in JOB_STATES}
+        for row in self.connection.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state"):
+            counts[row["state"]] = row["n"]
+        counts["suspects"] = self.connection.execute(
+            "SELECT COUNT(*) FROM jobs WHERE state = 'pending' AND suspect = 1"
+        ).fetchone()[0]
+        counts["pages"] = self.connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return counts
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,341 @@
+# src/line_classifier.py
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.content_analyzer import BLOCK_CONFIDENCE, ClassifierBackend, ContentAnalyzer
+
+try:
+    import numpy as np
+except ImportError:
+    # The trained model is optional - the regex rules work without numpy
+    np = None
+
+
+# Where train_line_classifier.py writes the model by default
+DEFAULT_MODEL_PATH = Path(__file__).parent / "models" / "line_classifier.npz"
+
+# Names accepted by load_backend() (and ConversionPipeline's classifier_backend)
+CLASSIFIER_BACKENDS = ["regex", "ngram"]
+
+# Types the model can predict (empty lines and image references never reach a backend)
+MODEL_CONTENT_TYPES = [content_type for content_type in BLOCK_CONFIDENCE
+                       if content_type not in ("empty", "image")]
+
+# Markers around every line so n-grams can see where a line starts and ends
+LINE_START = "\x02"
+LINE_END = "\x03"
+
+# N-gram sizes hashed at every position. "char" n-grams use the raw
+# characters, "shape" n-grams replace letters, digits and spaces by
+# their category, so "10.10.14.7" and "NMAP SCAN" generalise to new values.
+NGRAM_FEATURES = [("char", (3,)), ("shape", (4,))]
+NGRAM_COLUMNS = sum(len(sizes) for _, sizes in NGRAM_FEATURES)
+
+# Character categories used for shapes and whole-line features
+# (line markers and newlines get their own category, which is ignored)
+CATEGORY_LOWER, CATEGORY_UPPER, CATEGORY_DIGIT, CATEGORY_SPACE, CATEGORY_OTHER, CATEGORY_NON_ASCII = range(6)
+CATEGORY_COUNT = 6
+CATEGORY_MARKER = CATEGORY_COUNT
+
+# Shape codes for categories start past the Unicode range, so they
+# never collide with a punctuation character that is kept as-is
+_SHAPE_OFFSET = 0x110000
+
+_HASH_MULTIPLIER = 1000003
+_HASH_SCRAMBLE = 0x9E3779B1
+
+
+def _build_category_table():
+    """Category of every ASCII code, plus one entry (128) for all non-ASCII characters."""
+    table = [CATEGORY_OTHER] * 129
+    for code in range(128):
+        char = chr(code)
+        if "a" <= char <= "z":
+            table[code] = CATEGORY_LOWER
+        elif "A" <= char <= "Z":
+            table[code] = CATEGORY_UPPER
+        elif "0" <= char <= "9":
+            table[code] = CATEGORY_DIGIT
+        elif char == " ":
+            table[code] = CATEGORY_SPACE
+        elif char in ("\n", LINE_START, LINE_END):
+            table[code] = CATEGORY_MARKER
+    table[128] = CATEGORY_NON_ASCII
+    return table
+
+
+class NgramLineClassifier(ClassifierBackend):
+    """
+    A small linear model over hashed character n-grams.
+
+    This is like teaching an apprentice by letting them watch the
+    regex rules at work: the model is trained on lines labelled by the
+    rules, and then classifies a whole batch of lines with a handful of
+    numpy array operations instead of running dozens of regexes.
+    """
+
+    name = "ngram"
+
+    def __init__(self, hash_bits: int = 16, weights=None, bias=None):
+        """
+        Initialize an (untrained) classifier.
+
+        Args:
+            hash_bits: Features are hashed into 2**hash_bits buckets
+            weights: Trained weight matrix (content types x buckets)
+            bias: Trained bias vector (one per content type)
+        """
+        if np is None:
+            raise ImportError("numpy is required for the n-gram line classifier")
+
+        self.hash_bits = hash_bits
+        self.content_types = list(MODEL_CONTENT_TYPES)
+        class_count = len(self.content_types)
+
+        self.weights = weights if weights is not None else \
+            np.zeros((class_count, 1 << hash_bits), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(class_count, dtype=np.float32)
+        self.category_table = np.array(_build_category_table(), dtype=np.uint32)
+
+    def _features(self, lines: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Hash the features of every line in one vectorised pass.
+
+        Returns:
+            (ngram_buckets, line_starts, line_buckets): a (positions x
+            NGRAM_COLUMNS) matrix of buckets in line order, the first
+            position of every line, and a (lines x 2) matrix of
+            whole-line feature buckets. Bucket 0 means "no feature".
+        """
+        text = LINE_START + (LINE_END + "\n" + LINE_START).join(lines) + LINE_END
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        categories = self.category_table[np.minimum(codes, 128)]
+
+        # newline_counts[i] = number of newlines before position i
+        is_newline = codes == 10
+        newline_counts = np.zeros(len(codes) + 1, dtype=np.int32)
+        np.cumsum(is_newline, out=newline_counts[1:])
+        line_starts = np.concatenate(([0], np.flatnonzero(is_newline) + 1))
+        if len(line_starts) != len(lines):
+            # A line with an embedded newline would shift every later line
+            return self._features([line.replace("\n", " ") for line in lines])
+
+        keep_char = (categories == CATEGORY_OTHER) | (categories == CATEGORY_MARKER)
+        sequences = {
+            "char": codes,
+            "shape": np.where(keep_char, codes, categories + np.uint32(_SHAPE_OFFSET)),
+        }
+
+        ngram_buckets = np.zeros((len(codes), NGRAM_COLUMNS), dtype=np.intp)
+        column = 0
+        for family_index, (family, sizes) in enumerate(NGRAM_FEATURES):
+            sequence = sequences[family]
+            # Rolling hash: the hash of an n-gram extends the (n-1)-gram's
+            hashes = (sequence + np.uint32(family_index + 1)) * np.uint32(_HASH_MULTIPLIER)
+            for size in range(2, max(sizes) + 1):
+                count = len(codes) - size + 1
+                if count <= 0:
+                    break
+                hashes = (hashes[:count] ^ sequence[size - 1:]) * np.uint32(_HASH_MULTIPLIER)
+                if size not in sizes:
+                    continue
+
+                # N-grams that cross a line break keep bucket 0
+                inside_line = newline_counts[size:size + count] == newline_counts[:count]
+                ngram_buckets[:count, column] = np.where(inside_line, self._bucket(hashes), 0)
+                column += 1
+
+        line_buckets = self._line_features(lines, categories, line_starts)
+        return ngram_buckets, line_starts, line_buckets
+
+    def _line_features(self, lines: List[str], categories: "np.ndarray",
+                       line_starts: "np.ndarray") -> "np.ndarray":
+        """
+        Whole-line features: which character categories occur, and how long the line is.
+
+        N-grams only see a few characters at a time; rules like "only
+        capital letters and spaces" or "at most 100 characters" need a
+        view of the entire line.
+        """
+        category_bits = np.left_shift(np.uint32(1), categories)
+        signature = np.bitwise_or.reduceat(category_bits, line_starts)
+        signature &= np.uint32((1 << CATEGORY_COUNT) - 1)
+
+        lengths = np.fromiter(map(len, lines), dtype=np.uint32, count=len(lines))
+        length_bucket = np.minimum(lengths // np.uint32(10), np.uint32(11))
+
+        tags = [signature | np.uint32(1 << 16), signature | (length_bucket + np.uint32(2)) << np.uint32(16)]
+        return np.stack([self._bucket(tag * np.uint32(_HASH_MULTIPLIER)) for tag in tags], axis=1)
+
+    def _bucket(self, hashes: "np.ndarray") -> "np.ndarray":
+        """Scramble 32-bit hashes into 2**hash_bits buckets."""
+        return ((hashes * np.uint32(_HASH_SCRAMBLE)) >> np.uint32(32 - self.hash_bits)).astype(np.intp)
+
+    def _scores(self, features) -> "np.ndarray":
+        """Sum the weights of each line's features (n-grams scaled by line length)."""
+        ngram_buckets, line_starts, line_buckets = features
+        line_count = len(line_starts)
+
+        # Features are in line order, so one reduceat sums every line
+        # (weights are stored per class, which keeps each row contiguous)
+        gathered = np.take(self.weights, ngram_buckets.ravel(), axis=1)
+        scores = np.add.reduceat(gathered, line_starts * NGRAM_COLUMNS, axis=1)
+
+        # Long lines have more n-grams; normalise so they don't dominate
+        scores /= self._length_scale(line_starts, len(ngram_buckets))
+        line_scores = np.take(self.weights, line_buckets.ravel(), axis=1)
+        scores += line_scores.reshape(len(self.content_types), line_count, -1).sum(axis=2)
+        scores += self.bias[:, None]
+        return scores.T
+
+    def _length_scale(self, line_starts: "np.ndarray", position_count: int) -> "np.ndarray":
+        """Square root of the number of positions of each line."""
+        positions = np.diff(np.append(line_starts, position_count))
+        return np.sqrt(positions).astype(np.float32)
+
+    def predict(self, lines: List[str]) -> List[str]:
+        """
+        Classify a batch of stripped lines.
+
+        Args:
+            lines: Stripped, non-empty text lines
+
+        Returns:
+            One content type per line
+        """
+        if not lines:
+            return []
+        best = np.argmax(self._scores(self._features(lines)), axis=1)
+        return [self.content_types[index] for index in best]
+
+    def train(self, lines: List[str], labels: List[str], epochs: int = 8,
+              learning_rate: float = 0.5, batch_size: int = 256, seed: int = 0) -> Dict:
+        """
+        Fit the model with mini-batch softmax regression (AdaGrad steps).
+
+        Args:
+            lines: Stripped, non-empty training lines
+            labels: Content type of each line
+            epochs: Passes over the training data
+            learning_rate: Step size for gradient descent
+            batch_size: Lines per gradient step
+            seed: Seed for shuffling, so training is reproducible
+
+        Returns:
+            Dictionary with the training set size and agreement
+        """
+        targets = np.array([self.content_types.index(label) for label in labels])
+        order = list(range(len(lines)))
+        shuffler = random.Random(seed)
+        squared_gradients = np.full_like(self.weights, 1e-6)
+
+        for _ in range(epochs):
+            shuffler.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                self._gradient_step([lines[index] for index in batch], targets[batch],
+                                    learning_rate, squared_gradients)
+
+        return {"lines": len(lines), "agreement": self.evaluate(lines, labels)}
+
+    def _gradient_step(self, lines: List[str], targets: "np.ndarray", learning_rate: float,
+                       squared_gradients: "np.ndarray"):
+        """One softmax regression update on a batch of lines."""
+        features = self._features(lines)
+        ngram_buckets, line_starts, line_buckets = features
+        scores = self._scores(features)
+
+        probabilities = np.exp(scores - scores.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        error = probabilities
+        error[np.arange(len(lines)), targets] -= 1.0
+        error = (error / len(lines)).astype(np.float32)
+
+        # Every n-gram of a line shares the line's (length scaled) error
+        positions = np.diff(np.append(line_starts, len(ngram_buckets)))
+        ngram_error = error / self._length_scale(line_starts, len(ngram_buckets))[:, None]
+        gradient = np.zeros_like(self.weights)
+        np.add.at(gradient, (slice(None), ngram_buckets.ravel()),
+                  np.repeat(ngram_error, positions * NGRAM_COLUMNS, axis=0).T)
+        np.add.at(gradient, (slice(None), line_buckets.ravel()),
+                  np.repeat(error, line_buckets.shape[1], axis=0).T)
+
+        # Bucket 0 stands for "no feature" and must stay neutral
+        gradient[:, 0] = 0.0
+
+        squared_gradients += gradient * gradient
+        self.weights -= learning_rate * gradient / np.sqrt(squared_gradients)
+        self.bias -= learning_rate * error.sum(axis=0)
+
+    def evaluate(self, lines: List[str], labels: List[str]) -> float:
+        """Fraction of lines where the model agrees with the given labels."""
+        if not lines:
+            return 1.0
+        predicted = self.predict(lines)
+        return sum(1 for got, want in zip(predicted, labels) if got == want) / len(lines)
+
+    @classmethod
+    def train_from_regex(cls, lines: Iterable[str], analyzer: Optional[ContentAnalyzer] = None,
+                         hash_bits: int = 16, **train_options) -> Tuple["NgramLineClassifier", Dict]:
+        """
+        Bootstrap a model from lines labelled by the regex rules.
+
+        Args:
+            lines: Raw text lines (empty lines are skipped)
+            analyzer: Analyzer whose regex rules provide the labels
+            hash_bits: Size of the hashed feature space
+            train_options: Passed on to train()
+
+        Returns:
+            (trained classifier, training report)
+        """
+        analyzer = analyzer or ContentAnalyzer()
+        stripped = [line.strip() for line in lines if line.strip()]
+        labels = analyzer.rules.content_types(stripped)
+
+        classifier = cls(hash_bits=hash_bits)
+        report = classifier.train(stripped, labels, **train_options)
+        return classifier, report
+
+    def save(self, model_path: str):
+        """Store the trained weights in a compressed .npz file."""
+        config = json.dumps({"hash_bits": self.hash_bits, "content_types": self.content_types})
+        with open(model_path, 'wb') as f:
+            np.savez_compressed(f, weights=self.weights, bias=self.bias, config=np.array(config))
+
+    @classmethod
+    def load(cls, model_path: str) -> "NgramLineClassifier":
+        """Load a model written by save()."""
+        if np is None:
+            raise ImportError("numpy is required for the n-gram line classifier")
+
+        with np.load(model_path, allow_pickle=False) as data:
+            config = json.loads(str(data["config"]))
+            if config["content_types"] != MODEL_CONTENT_TYPES:
+                raise ValueError(f"Model was trained for other content types: {config['content_types']}")
+            return cls(config["hash_bits"], data["weights"], data["bias"])
+
+
+def load_backend(name: str = "regex", model_path: Optional[str] = None) -> Optional[ClassifierBackend]:
+    """
+    Look up a classifier backend by name.
+
+    Args:
+        name: One of CLASSIFIER_BACKENDS
+        model_path: Trained model for "ngram" (default: DEFAULT_MODEL_PATH)
+
+    Returns:
+        Backend for ContentAnalyzer(backend=...), or None for the regex
+        rules (ContentAnalyzer's default)
+    """
+    if name not in CLASSIFIER_BACKENDS:
+        raise ValueError(f"Unknown classifier backend: {name} (expected one of {CLASSIFIER_BACKENDS})")
+    if name == "regex":
+        return None
+
+    model_path = Path(model_path or DEFAULT_MODEL_PATH)
+    if not model_path.exists():
+        raise FileNotFoundError(f"No trained model at {model_path} - build it with "
+                                f"'python train_line_classifier.py'")
+    return NgramLineClassifier.load(str(model_path))
@@ -1,64 +1,70 @@
 # src/markdown_generator.py
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 from src.content_analyzer import ContentBlock
+from src.heading_index import HeadingEntry, HeadingIndex
+from src.ruleset import Ruleset, load_ruleset
 import re
 
+# Heading of the table of contents section
+TOC_TITLE = "Table of Contents"
+
 class MarkdownGenerator:
     """
     Converts classified content blocks into properly formatted markdown.
     
     This is like a skilled translator that knows exactly how to 
     format each type of content in markdown.
+    
+    Rendering only reads the rules set up in __init__, so one instance
+    can be shared between threads as long as nobody changes them.
     """
     
-    def __init__(self):
-        """Initialize the markdown generator with formatting rules."""
+    def __init__(self, ruleset: Optional[Ruleset] = None):
+        """
+        Initialize the markdown generator with formatting rules.
+        
+        Args:
+            ruleset: Compiled rules to use (default: the shipped rules file,
+                     see src/ruleset.py)
+        """
+        self.ruleset = ruleset or load_ruleset()
         self.setup_formatting_rules()
         self.setup_pattern_matches()
     
 
     def setup_formatting_rules(self):
-        """Define how each content type should be formatted."""
+        """Load how each content type should be formatted from the ruleset."""
+        rules = self.ruleset.markdown
         
         # Language mappings for code blocks
-        self.language_mappings = {
-            "bash": ["nmap", "gobuster", "dirb", "nikto", "curl", "wget"],
-            "python": ["python", "python3", "pip"],
-            "sql": ["select", "insert", "update", "delete", "union"],
-            "php": ["<?php", "php"],
-            "javascript": ["function", "var", "let", "const"],
-            "powershell": ["powershell", "ps1"],
-        }
+        self.language_mappings = {language: list(tools)
+                                  for language, tools in rules["language_mappings"].items()}
+        
+        # All tools as one regex; the ruleset lists them by language priority
+        self.language_regex = re.compile(rules["language_pattern"])
+        self.tool_languages = rules["tool_languages"]
+        self.language_ranks = {language: rank for rank, language in enumerate(self.language_mappings)}
         
         # Inline vs block code thresholds
-        self.inline_code_max_length = 50
+        self.inline_code_max_length = rules["inline_code_max_length"]
         
         # Heading level mappings
-        self.heading_keywords = {
-            1: ["reconnaissance", "enumeration", "exploitation", "privilege escalation", "conclusion"],
-            2: ["initial scan", "service enumeration", "web enumeration", "vulnerability assessment"],
-            3: ["port scan", "directory enumeration", "subdomain enumeration"]
-        }
+        self.heading_keywords = {level: list(keywords)
+                                 for level, keywords in rules["heading_keywords"].items()}
+        
+        # Terms made bold in regular text
+        self.important_terms_regex = re.compile(rules["important_terms_pattern"], re.IGNORECASE)
     
 
     def setup_pattern_matches(self):
-        """Define regex patterns for different content types."""
-        
-        # Command patterns - common HTB tools and syntax
-        self.command_patterns = [
-            r'^[a-zA-Z0-9_\-\.]+\s+\-[a-zA-Z0-9\-]+',  # tool with flags
-            r'^(nmap|gobuster|dirb|nikto|sqlmap|hydra|john|hashcat)'  # common tools
-        ]
-
-        self.path_patterns = [
-            r'^/[a-zA-Z0-9_\-\./]+$',  # Unix path only
-            r'^[A-Za-z]:\\[a-zA-Z0-9_\-\\\./]+$',  # Windows path only
-            r'^~/[a-zA-Z0-9_\-\./]*$',  # Home directory path only
-        ]
-
-        self.ip_pattern = r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}(?::[0-9]+)?\b'
+        """Load regex patterns for different content types from the ruleset."""
+        rules = self.ruleset.markdown
         
-        self.url_pattern = r'(https?://[a-zA-Z0-9\-\._~:/?#\[\]@!$&\'()*+,;=%]+)'
+        # Shared with ContentAnalyzer through the rules file
+        self.command_patterns = list(rules["command_patterns"])
+        self.path_patterns = list(rules["path_patterns"])
+        self.ip_pattern = rules["ip_pattern"]
+        self.url_pattern = rules["url_pattern"]
 
 
     def generate_markdown(self, content_blocks: List[ContentBlock]) -> str:
@@ -71,33 +77,59 @@ class MarkdownGenerator:
         Returns:
             Formatted markdown string
         """
-        markdown_lines = []
+        return "\n".join(self.iter_markdown_lines(content_blocks))
+
+    def iter_markdown_lines(self, content_blocks: Iterable[ContentBlock]) -> Iterator[str]:
+        """
+        Render content blocks lazily, one markdown chunk at a time.
+        
+        Joining the chunks with newlines gives generate_markdown()'s
+        output. A chunk can span several lines (e.g. a fenced code block).
+        
+        Args:
+            content_blocks: Any iterable of classified content blocks
+            
+        Yields:
+            Markdown chunks in document order
+        """
         previous_block_type = None
         
         for block in content_blocks:
-            if self._handle_empty_block(block, previous_block_type, markdown_lines):
-                continue
-           
-            # Generate markdown for this block
-            markdown_content = self._format_block(block)
-            
-            # Add appropriate spacing
-            if self._needs_spacing(previous_block_type, block.content_type):
-                markdown_lines.append("")
-            
-            markdown_lines.append(markdown_content)
-            previous_block_type = block.content_type
+            chunks, previous_block_type = self.render_block(block, previous_block_type)
+            yield from chunks
+
+    def render_block(self, block: ContentBlock,
+                     previous_block_type: Optional[str]) -> Tuple[List[str], Optional[str]]:
+        """
+        Render one block given the type of the last rendered block.
         
-        return "\n".join(markdown_lines)
-    
-    def _handle_empty_block(self, block, previous_block_type, markdown_lines):
-        """Handle empty blocks and add appropriate spacing."""
-        if not block.text.strip():
+        This is the step iter_markdown_lines() repeats for every block;
+        it is public so renderers that see one block at a time can use it.
+        
+        Args:
+            block: Block to render
+            previous_block_type: Type of the previous non-empty block (None at the start)
+            
+        Returns:
+            (markdown chunks, type to pass in with the next block)
+        """
+        if self._is_empty_block(block):
             # Add spacing between sections
             if previous_block_type and previous_block_type != "empty":
-                markdown_lines.append("")
-            return True  # Indicates this was an empty block
-        return False  # Not an empty block
+                return [""], previous_block_type
+            return [], previous_block_type
+        
+        # Generate markdown for this block
+        markdown_content = self._format_block(block)
+        
+        # Add appropriate spacing
+        if self._needs_spacing(previous_block_type, block.content_type):
+            return ["", markdown_content], block.content_type
+        return [markdown_content], block.content_type
+    
+    def _is_empty_block(self, block: ContentBlock) -> bool:
+        """Check if a block has no visible text."""
+        return not block.text.strip()
 
 
     def _format_block(self, block: ContentBlock) -> str:
@@ -121,17 +153,25 @@ class MarkdownGenerator:
         elif block.content_type == "url":
             return self._format_url(block)
         
+        elif block.content_type == "image":
+            return self._format_image(block)
+        
         else:  # Regular text
             return self._format_text(block)
    
 
     def _format_heading(self, block: ContentBlock) -> str:
         """Format heading blocks."""
+        text, level = self.heading_text_and_level(block)
+        return f"{'#' * level} {text}"
+
+    def heading_text_and_level(self, block: ContentBlock) -> Tuple[str, int]:
+        """Text and level a heading block is rendered with."""
         text = block.text.strip()
         text = self._remove_common_prefixes(text)
         assert block.metadata is not None
         level = self._determine_heading_level(text, block.metadata.get("level", 2))
-        return f"{'#' * level} {text}"
+        return text, level
 
 
     def _remove_common_prefixes(self, text: str) -> str:
@@ -248,18 +288,19 @@ class MarkdownGenerator:
         return formatted
     
 
+    def _format_image(self, block: ContentBlock) -> str:
+        """Format image references."""
+        if "src" not in block.metadata:
+            return block.text.strip()
+        return f"![{block.metadata.get('alt', '')}]({block.metadata['src']})"
+
     def _format_text(self, block: ContentBlock) -> str:
         """Format regular text content."""
         text = block.text.strip()
         
         # Apply basic formatting enhancements
         # Bold for important terms
-        important_terms = ["important", "note", "warning", "critical", "vulnerable", "exploit"]
-        for term in important_terms:
-            pattern = rf'\b({term})\b'
-            text = re.sub(pattern, r'**\1**', text, flags=re.IGNORECASE)
-        
-        return text
+        return self.important_terms_regex.sub(r'**\1**', text)
     
 
     def _detect_command_language(self, command: str) -> str:
@@ -278,15 +319,17 @@ class MarkdownGenerator:
         return command.lower()
 
     def _find_matching_language(self, command_lower: str) -> str:
-        """Find the language that matches the command based on tools."""
-        for language, tools in self.language_mappings.items():
-            if self._command_contains_any_tool(command_lower, tools):
-                return language
-        return ""
-
-    def _command_contains_any_tool(self, command_lower: str, tools: list) -> bool:
-        """Check if command contains any of the specified tools."""
-        return any(tool in command_lower for tool in tools)
+        """
+        Find the language that matches the command based on tools.
+        
+        The first language (in language_mappings order) with a tool
+        anywhere in the command wins. One scan finds every tool.
+        """
+        languages = {self.tool_languages[match.group(1)]
+                     for match in self.language_regex.finditer(command_lower)}
+        if not languages:
+            return ""
+        return min(languages, key=self.language_ranks.__getitem__)
 
     def _needs_spacing(self, previous_type: Optional[str], current_type: str) -> bool:
         """Determine if spacing is needed between content blocks."""
@@ -343,22 +386,38 @@ class MarkdownGenerator:
         return "\n".join(header_lines)
     
 
-    def generate_table_of_contents(self, content_blocks: List[ContentBlock]) -> str:
-        """Generate a table of contents from headings."""
+    def generate_table_of_contents(self, content_blocks: List[ContentBlock],
+                                   reserved_headings: Iterable[str] = ()) -> str:
+        """
+        Generate a table of contents from headings.
         
-        toc_lines = ["## Table of Contents", ""]
+        Links use the anchors GitHub gives the rendered headings, with
+        repeated headings numbered ("enumeration", "enumeration-1").
         
+        Args:
+            content_blocks: Classified content blocks
+            reserved_headings: Headings before the body (e.g. the title)
+                               whose anchors are already taken
+        """
+        heading_index = self.new_heading_index(reserved_headings)
         for block in content_blocks:
             if block.content_type == "heading":
-                assert block.metadata is not None
-                level = block.metadata.get("level", 2)
-                text = block.text.strip().lstrip("#").strip()
-                
-                # Create anchor link
-                anchor = text.lower().replace(" ", "-").replace(".", "")
-                indent = "  " * (level - 1)
-                toc_lines.append(f"{indent}- [{text}](#{anchor})")
-        
-        toc_lines.append("")
-        return "\n".join(toc_lines)
+                self.add_to_heading_index(heading_index, block)
+        return self.format_table_of_contents(heading_index)
+
+    def new_heading_index(self, reserved_headings: Iterable[str] = ()) -> HeadingIndex:
+        """Empty heading index; the TOC heading itself also takes an anchor."""
+        return HeadingIndex(list(reserved_headings) + [TOC_TITLE])
+
+    def add_to_heading_index(self, heading_index: HeadingIndex, block: ContentBlock,
+                             byte_offset: Optional[int] = None,
+                             previous_line: Optional[Tuple[int, int]] = None) -> HeadingEntry:
+        """Record a heading block as it is rendered, returning its index entry."""
+        text, level = self.heading_text_and_level(block)
+        return heading_index.add_heading(text, level, byte_offset, block.page_number,
+                                         block.line_number, previous_line)
+
+    def format_table_of_contents(self, heading_index: HeadingIndex) -> str:
+        """Render the table of contents section from a heading index."""
+        return "\n".join([f"## {TOC_TITLE}", ""] + heading_index.toc_lines() + [""])
 
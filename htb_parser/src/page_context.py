@@ -0,0 +1,130 @@
+# src/page_context.py
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+import fitz  # PyMuPDF
+
+
+@dataclass(frozen=True)
+class ExtractionProfile:
+    """
+    Which parts of a page the text parse keeps.
+
+    Every flag makes MuPDF do (and keep) more work per page, so a
+    profile only turns on what its callers read.
+    """
+
+    name: str
+    flags: int
+
+    def covers(self, other: "ExtractionProfile") -> bool:
+        """Check if a parse with this profile can answer queries made with the other."""
+        return other.flags & ~self.flags == 0
+
+
+EXTRACTION_PROFILES = {
+    # Plain text and line positions; image blocks are skipped
+    "text": ExtractionProfile("text", fitz.TEXTFLAGS_TEXT),
+    # Also keeps image blocks, which get_page_info() counts
+    "full": ExtractionProfile("full", fitz.TEXTFLAGS_DICT),
+}
+
+
+def get_profile(profile: Union[str, ExtractionProfile]) -> ExtractionProfile:
+    """Look up a profile by name (profiles pass through unchanged)."""
+    if isinstance(profile, ExtractionProfile):
+        return profile
+    if profile not in EXTRACTION_PROFILES:
+        raise ValueError(f"Unknown extraction profile: {profile} (choose from {list(EXTRACTION_PROFILES)})")
+    return EXTRACTION_PROFILES[profile]
+
+
+def new_extraction_stats() -> Dict:
+    """Counters shared by the page contexts of one processor."""
+    return {"textpages_built": 0, "queries": 0, "parse_seconds": 0.0, "query_seconds": 0.0}
+
+
+class PageContext:
+    """
+    Everything extracted from one page, parsed only once.
+
+    This is like photocopying a page before handing it round: the
+    content stream is interpreted into a fitz TextPage the first time
+    anybody asks, and the plain text, the layout dictionary and the
+    page info are all read from that copy instead of from the page.
+
+    A context belongs to one page of an open document; drop it (or let
+    PDFProcessor replace it) when moving on, so the TextPage is freed.
+    """
+
+    def __init__(self, page: fitz.Page, profile: Union[str, ExtractionProfile] = "text",
+                 stats: Optional[Dict] = None):
+        """
+        Args:
+            page: Page to extract from
+            profile: Extraction profile (name or ExtractionProfile)
+            stats: Counters to add parse and query timings to
+        """
+        self.page = page
+        self.profile = get_profile(profile)
+        self.stats = stats if stats is not None else new_extraction_stats()
+        self._textpage = None
+        self._text = None
+        self._layout = None
+        self._images = None
+
+    @property
+    def page_number(self) -> int:
+        """0-based number of the page."""
+        return self.page.number
+
+    @property
+    def textpage(self) -> fitz.TextPage:
+        """The parsed page, built on first use."""
+        if self._textpage is None:
+            start = time.perf_counter()
+            self._textpage = self.page.get_textpage(flags=self.profile.flags)
+            self.stats["parse_seconds"] += time.perf_counter() - start
+            self.stats["textpages_built"] += 1
+        return self._textpage
+
+    def get_text(self) -> str:
+        """Plain text, like page.get_text()."""
+        if self._text is None:
+            self._text = self._query("text")
+        return self._text
+
+    def get_layout(self) -> Dict:
+        """Blocks, lines and spans with their positions, like page.get_text("dict")."""
+        if self._layout is None:
+            self._layout = self._query("dict")
+        return self._layout
+
+    def get_images(self) -> List:
+        """Images the page uses, like page.get_images(full=True)."""
+        if self._images is None:
+            self._images = self.page.get_images(full=True)
+        return self._images
+
+    def _query(self, option: str):
+        """Read one output format from the shared TextPage."""
+        textpage = self.textpage
+        start = time.perf_counter()
+        result = self.page.get_text(option, textpage=textpage)
+        self.stats["query_seconds"] += time.perf_counter() - start
+        self.stats["queries"] += 1
+        return result
+
+    def get_info(self) -> Dict:
+        """Size, block count and image count of the page."""
+        rect = self.page.rect
+        image_count = len(self.get_images())
+        return {
+            "page_number": self.page_number,
+            "width": rect.width,
+            "height": rect.height,
+            "text_blocks": len(self.get_layout()["blocks"]),
+            "has_images": image_count > 0,
+            "image_count": image_count
+        }
@@ -0,0 +1,279 @@
+# src/page_deduplicator.py
+import hashlib
+import re
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # SimHash falls back to counting bits in pure Python without numpy
+    np = None
+
+
+SIMHASH_BITS = 64
+BAND_COUNT = 8
+BAND_BITS = SIMHASH_BITS // BAND_COUNT
+
+# One indexed column per SimHash band: two fingerprints within
+# BAND_COUNT - 1 bits of each other always share at least one band
+BAND_COLUMNS = [f"band{i}" for i in range(BAND_COUNT)]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS fingerprints (
+    exact_hash TEXT NOT NULL,
+    simhash INTEGER NOT NULL,
+    {" ".join(f"{column} INTEGER NOT NULL," for column in BAND_COLUMNS)}
+    doc_key TEXT NOT NULL,
+    page_number INTEGER NOT NULL,
+    char_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fingerprints_exact ON fingerprints (exact_hash);
+CREATE INDEX IF NOT EXISTS fingerprints_doc ON fingerprints (doc_key);
+{chr(10).join(f"CREATE INDEX IF NOT EXISTS fingerprints_{column} ON fingerprints ({column});" for column in BAND_COLUMNS)}
+"""
+
+
+class PageDeduplicator:
+    """
+    Finds pages that were already seen, exactly or almost exactly.
+
+    This is like a stamp collector checking the album before filing a
+    new stamp: cover pages, legal footers and repeated tool output get
+    recognised and linked to the first copy instead of being processed
+    again. Fingerprints are kept in SQLite so this works across runs.
+
+    Only exact copies are linked or skipped. A near-duplicate can differ
+    in exactly the words that matter (an IP address, a flag), so it is
+    kept and only reported (see get_statistics()).
+    """
+
+    def __init__(self, store_path: str = ":memory:", max_distance: int = 6, min_chars: int = 80):
+        """
+        Initialize the deduplicator.
+
+        Args:
+            store_path: SQLite file for persisted fingerprints (":memory:" for one run)
+            max_distance: Largest SimHash bit difference counted as a near-duplicate
+                          (below BAND_COUNT, so one band is guaranteed to match)
+            min_chars: Pages shorter than this are only checked for exact copies
+        """
+        if max_distance >= BAND_COUNT:
+            raise ValueError(f"max_distance must be below {BAND_COUNT}")
+
+        self.max_distance = max_distance
+        self.min_chars = min_chars
+        self.connection = sqlite3.connect(store_path)
+        self.connection.executescript(SCHEMA)
+
+        # Statistics tracking
+        self.pages_seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.chars_skipped = 0
+        self.near_matches: List[Dict] = []
+
+    def normalize_text(self, text: str) -> str:
+        """Lowercase the text and collapse whitespace so layout noise doesn't matter."""
+        return " ".join(text.lower().split())
+
+    def exact_hash(self, normalized_text: str) -> str:
+        """Hash of the normalized page text."""
+        return hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+
+    def simhash(self, normalized_text: str) -> int:
+        """
+        64-bit SimHash over word trigrams.
+
+        Pages that differ in a few words get hashes that differ in a
+        few bits, so near-duplicates can be found by Hamming distance.
+        """
+        words = re.findall(r'\w+', normalized_text)
+        shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+        digests = [hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles]
+
+        # A fingerprint bit is set where most shingle hashes have it set.
+        # Bits are counted per column, most significant bit first.
+        if np is not None:
+            bits = np.unpackbits(np.frombuffer(b"".join(digests), dtype=np.uint8)).reshape(-1, SIMHASH_BITS)
+            majority = bits.sum(axis=0) * 2 > len(digests)
+            return int.from_bytes(np.packbits(majority).tobytes(), "big")
+
+        rows = (format(int.from_bytes(digest, "big"), f"0{SIMHASH_BITS}b") for digest in digests)
+        majority = ("1" if column.count("1") * 2 > len(digests) else "0" for column in zip(*rows))
+        return int("".join(majority), 2)
+
+    def begin_document(self, doc_key: str, start_page: int = 0, end_page: Optional[int] = None):
+        """
+        Forget the fingerprints of the pages about to be (re)processed.
+
+        Without this a re-converted document would match its own pages
+        from an earlier run. Only the given page range is forgotten, so
+        converting part of a document keeps the fingerprints of the rest.
+
+        Args:
+            doc_key: Document about to be processed
+            start_page: First page that is processed (0-based)
+            end_page: Stop before this page (default: end of document)
+        """
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM fingerprints WHERE doc_key = ? AND page_number >= ? AND page_number < ?",
+                (doc_key, start_page, end_page if end_page is not None else 2 ** 63 - 1)
+            )
+
+    def check_page(self, doc_key: str, page_number: int, text: str, record: bool = True) -> Optional[Dict]:
+        """
+        Check one page and remember it if it isn't an exact copy.
+
+        Args:
+            doc_key: Document the page belongs to
+            page_number: Page number (0-based)
+            text: Extracted page text
+            record: Remember the page and count it in the statistics
+                    (False only looks up earlier exact copies)
+
+        Returns:
+            None for a new page, otherwise a dictionary describing the
+            earlier page it duplicates ("doc_key", "page_number", "match", "distance");
+            "match" is "exact" for a copy and "near" for a similar page
+        """
+        normalized = self.normalize_text(text)
+        if not normalized:
+            return None
+
+        exact = self.exact_hash(normalized)
+        duplicate = self._find_exact(exact, doc_key, page_number)
+        if duplicate is not None:
+            # An exact copy needs no SimHash: it is neither compared nor stored
+            if record:
+                self.pages_seen += 1
+                self.exact_duplicates += 1
+                self.chars_skipped += len(text)
+            return duplicate
+
+        if not record:
+            # Near-duplicates are kept anyway, so only exact copies matter here
+            return None
+
+        fingerprint = self.simhash(normalized)
+        if len(normalized) >= self.min_chars:
+            duplicate = self._find_near(fingerprint, doc_key, page_number)
+
+        self.pages_seen += 1
+        self._store(exact, fingerprint, doc_key, page_number, len(normalized))
+        if duplicate is not None:
+            self.near_duplicates += 1
+            self.near_matches.append({"doc_key": doc_key, "page_number": page_number,
+                                      "similar_to": duplicate})
+        return duplicate
+
+    # Pages of the same document only count as earlier copies if they come first
+    _EARLIER_PAGE = "NOT (doc_key = ? AND page_number >= ?)"
+
+    def _find_exact(self, exact: str, doc_key: str, page_number: int) -> Optional[Dict]:
+        """Look up the first stored page with identical normalized text."""
+        row = self.connection.execute(
+            "SELECT doc_key, page_number FROM fingerprints "
+            f"WHERE exact_hash = ? AND {self._EARLIER_PAGE} ORDER BY rowid LIMIT 1",
+            (exact, doc_key, page_number)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"doc_key": row[0], "page_number": row[1], "match": "exact", "distance": 0}
+
+    def _find_near(self, fingerprint: int, doc_key: str, page_number: int) -> Optional[Dict]:
+        """Look up a page whose SimHash is within max_distance bits."""
+        bands = self._bands(fingerprint)
+        rows = self.connection.execute(
+            "SELECT simhash, doc_key, page_number FROM fingerprints "
+            "WHERE (" + " OR ".join(f"{column} = ?" for column in BAND_COLUMNS) + ") "
+            f"AND {self._EARLIER_PAGE} ORDER BY rowid", (*bands, doc_key, page_number)
+        )
+        best = None
+        for stored, stored_doc, stored_page in rows:
+            distance = bin(fingerprint ^ self._to_unsigned(stored)).count("1")
+            if distance <= self.max_distance and (best is None or distance < best["distance"]):
+                best = {"doc_key": stored_doc, "page_number": stored_page, "match": "near", "distance": distance}
+        return best
+
+    def _store(self, exact: str, fingerprint: int, doc_key: str, page_number: int, char_count: int):
+        """Persist the fingerprint of a new page."""
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO fingerprints VALUES ({', '.join('?' * (BAND_COUNT + 5))})",
+                (exact, self._to_signed(fingerprint), *self._bands(fingerprint),
+                 doc_key, page_number, char_count)
+            )
+
+    def _bands(self, fingerprint: int) -> Tuple[int, ...]:
+        """Split a 64-bit fingerprint into BAND_COUNT bands."""
+        mask = (1 << BAND_BITS) - 1
+        return tuple((fingerprint >> (BAND_BITS * i)) & mask for i in range(BAND_COUNT))
+
+    def _to_signed(self, value: int) -> int:
+        """SQLite integers are signed 64-bit."""
+        return value - (1 << 64) if value >= 1 << 63 else value
+
+    def _to_unsigned(self, value: int) -> int:
+        """Undo _to_signed."""
+        return value + (1 << 64) if value < 0 else value
+
+    def filter_pages(self, doc_key: str, page_texts: Iterable[Tuple[int, str]],
+                     mode: str = "link", record: bool = True) -> Iterator[Tuple[int, str]]:
+        """
+        Drop or link exact duplicate pages in a stream of page texts.
+
+        Near-duplicates pass through unchanged (they are only reported).
+        Call begin_document() first when the pages are being re-converted.
+
+        Args:
+            doc_key: Document the pages belong to
+            page_texts: (page number, text) pairs, e.g. PDFProcessor.iter_page_texts()
+            mode: "skip" to drop duplicate text, "link" to replace it with a reference
+            record: Remember new pages (False for previews and other
+                    read-only passes, which only look up earlier copies)
+
+        Yields:
+            (page number, text) pairs with duplicates handled
+        """
+        if mode not in ("skip", "link"):
+            raise ValueError(f"Unknown dedup mode: {mode}")
+
+        for page_number, text in page_texts:
+            duplicate = self.check_page(doc_key, page_number, text, record)
+            if duplicate is None or duplicate["match"] != "exact":
+                yield page_number, text
+            elif mode == "link":
+                yield page_number, self._format_link(doc_key, duplicate)
+            else:
+                yield page_number, ""
+
+    def _format_link(self, doc_key: str, duplicate: Dict) -> str:
+        """Text that replaces a duplicate page."""
+        page = duplicate["page_number"] + 1
+        if duplicate["doc_key"] == doc_key:
+            return f"(Duplicate of page {page})"
+        source = duplicate["doc_key"].replace("\\", "/").rsplit("/", 1)[-1]
+        return f"(Duplicate of page {page} in {source})"
+
+    def get_statistics(self) -> Dict:
+        """
+        Report how much work deduplication saved.
+
+        "near_matches" lists the near-duplicate pages that were kept,
+        each with the earlier page it resembles ("similar_to").
+        """
+        return {
+            "pages_seen": self.pages_seen,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "near_matches": list(self.near_matches),
+            "pages_skipped": self.exact_duplicates,
+            "chars_skipped": self.chars_skipped,
+            "skipped_ratio": self.exact_duplicates / self.pages_seen if self.pages_seen else 0.0
+        }
+
+    def close(self):
+        """Close the fingerprint store."""
+        self.connection.close()
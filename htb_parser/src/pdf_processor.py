@@ -1,7 +1,10 @@
 # src/pdf_processor.py
 import fitz  # PyMuPDF
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+from src.document_pool import DocumentPool
+from src.page_context import ExtractionProfile, PageContext, get_profile, new_extraction_stats
 
 class PDFProcessor:
     """
@@ -11,10 +14,36 @@ class PDFProcessor:
     tell us information about the document.
     """
     
-    def __init__(self):
-        """Initialize the PDF processor."""
+    def __init__(self, pool: Optional[DocumentPool] = None,
+                 profile: Union[str, ExtractionProfile] = "auto"):
+        """
+        Initialize the PDF processor.
+
+        Args:
+            pool: Optional shared DocumentPool to borrow open documents from
+            profile: Extraction profile for text queries (see src/page_context.py).
+                     "auto" uses "text" until page info is asked for and
+                     "full" from then on, so a page whose text and info are
+                     both wanted is parsed once
+        """
         self.current_document = None
         self.document_path = None
+        self.document_size = 0
+        self.pool = pool
+        self.document_is_pooled = False
+        self.auto_profile = profile == "auto"
+        self.extraction_profile = get_profile("text" if self.auto_profile else profile)
+        self.page_contexts: "OrderedDict[int, PageContext]" = OrderedDict()
+        self.page_context_limit = 1
+        self.extraction_stats = new_extraction_stats()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Always release the document, even when processing failed
+        self.close_document()
+        return False
 
     def load_pdf(self, pdf_path: str) -> bool:
         """
@@ -27,6 +56,8 @@ class PDFProcessor:
             True if successful, False if there was an error
         """
         try:
+            # Don't leak a previously loaded document
+            self.close_document()
             self._convert_string_path(pdf_path)
             if self._check_if_file_exists():
                 self._load_pdf(pdf_path)
@@ -37,6 +68,31 @@ class PDFProcessor:
             print(f"❌ Error loading PDF: {e}")
             return False
 
+    def load_pdf_from_bytes(self, pdf_data: bytes, name: str = "document.pdf") -> bool:
+        """
+        Load a PDF that is already in memory (for example an archive member).
+        
+        Args:
+            pdf_data: Raw bytes of the PDF file
+            name: Name used for messages and the output file name
+            
+        Returns:
+            True if successful, False if there was an error
+        """
+        try:
+            self.close_document()
+            self.document_path = Path(name)
+            self.current_document = fitz.open(stream=pdf_data, filetype="pdf")
+            self.document_is_pooled = False
+            self.document_size = len(pdf_data)
+            print(f"✅ Successfully loaded PDF from memory: {self.document_path.name}")
+            print(f"   Pages: {len(self.current_document)}")
+            return True
+        except Exception as e:
+            print(f"❌ Error loading PDF from memory: {e}")
+            self.current_document = None
+            return False
+
     def _convert_string_path(self, pdf_path: str):
         """Convert string path to Path object."""
         if not pdf_path or pdf_path.strip() == "":
@@ -52,7 +108,12 @@ class PDFProcessor:
 
     def _load_pdf(self, pdf_path: str):
         """Load the PDF document using PyMuPDF."""
-        self.current_document = fitz.open(self.document_path)
+        self.document_is_pooled = self.pool is not None
+        if self.document_is_pooled:
+            self.current_document = self.pool.acquire(self.document_path)
+        else:
+            self.current_document = fitz.open(self.document_path)
+        self.document_size = self.document_path.stat().st_size
         if not self.document_path or not self.document_path.name:
             print("❌ Error: Invalid document path")
             return
@@ -79,7 +140,7 @@ class PDFProcessor:
             "subject": metadata.get("subject", "Unknown"),
             "creator": metadata.get("creator", "Unknown"),
             "pages": len(self.current_document),
-            "file_size": self.document_path.stat().st_size if self.document_path else 0
+            "file_size": self.document_size
         }
 
     def extract_text_from_page(self, page_number: int) -> str:
@@ -99,9 +160,7 @@ class PDFProcessor:
             return f"Error: Page {page_number} doesn't exist"
         
         try:
-            page = self._get_page(page_number)
-            text = self._extract_text_from_page(page)
-            return text
+            return self.page_context(page_number).get_text()
         except Exception as e:
             return f"Error extracting text from page {page_number}: {e}"
     
@@ -110,33 +169,127 @@ class PDFProcessor:
         if not self.current_document:
             return None
         return self.current_document[page_number]
-    
-    def _extract_text_from_page(self, page):
-        """Extract text from a page object."""
-        return page.get_text()
 
-    def extract_all_text(self) -> str:
+    def page_context(self, page_number: int,
+                     profile: Optional[Union[str, ExtractionProfile]] = None) -> PageContext:
+        """
+        Get the parsed context of a page, reusing it for repeated queries.
+
+        The contexts of the last pages asked for are kept (one unless
+        keep_page_contexts() asked for more), so text, layout and page
+        info of the same page share one TextPage as long as its profile
+        covers the one requested.
+
+        Args:
+            page_number: Page number (0-based)
+            profile: Extraction profile (default: the processor's profile)
+
+        Returns:
+            The page's PageContext
+        """
+        profile = get_profile(profile) if profile is not None else self.extraction_profile
+        context = self.page_contexts.get(page_number)
+        if context is not None and context.profile.covers(profile):
+            self.page_contexts.move_to_end(page_number)
+            return context
+
+        context = PageContext(self._get_page(page_number), profile, self.extraction_stats)
+        self.page_contexts[page_number] = context
+        self.page_contexts.move_to_end(page_number)
+        while len(self.page_contexts) > self.page_context_limit:
+            self.page_contexts.popitem(last=False)
+        return context
+
+    def keep_page_contexts(self, count: int):
+        """
+        Keep the contexts of at least the last count pages asked for.
+
+        For page streams that hand pages on late, e.g. HeaderFooterFilter
+        yields a page window_size // 2 pages after reading it: with the
+        window's contexts kept, the image references added afterwards
+        reuse the parse the text came from.
+        """
+        self.page_context_limit = max(self.page_context_limit, count)
+
+    def get_extraction_statistics(self) -> Dict:
+        """
+        Report how often pages were parsed and how often a parse was reused.
+
+        Returns:
+            TextPages built, queries answered, parses avoided, and seconds
+            spent parsing and querying
+        """
+        stats = dict(self.extraction_stats)
+        stats["reparses_avoided"] = max(0, stats["queries"] - stats["textpages_built"])
+        return stats
+
+    def extract_all_text(self, start_page: int = 0, end_page: Optional[int] = None) -> str:
         """
         Extract text from all pages in the document.
         
+        Args:
+            start_page: First page to extract (0-based)
+            end_page: Stop before this page (default: end of document)
+            
         Returns:
             All text combined as a single string
         """
         if not self.current_document:
             return "Error: No document loaded"
         
-        all_text = []
+        return self.join_page_texts(self.iter_page_texts(start_page, end_page))
+
+    def iter_page_texts(self, start_page: int = 0, end_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """
+        Extract pages one at a time, only when they are asked for.
         
-        for page_num in range(len(self.current_document)):
-            self._report_progress(page_num)
+        Stopping the iteration early means the remaining pages are
+        never extracted.
+        
+        Args:
+            start_page: First page to extract (0-based)
+            end_page: Stop before this page (default: end of document)
             
-            page_text = self.extract_text_from_page(page_num)
+        Yields:
+            (page number (0-based), page text) for every page in the range
+        """
+        if not self.current_document:
+            return
+        
+        for page_num in range(*self._clamp_page_range(start_page, end_page)):
+            self._report_progress(page_num)
+            yield page_num, self.extract_text_from_page(page_num)
+
+    def _clamp_page_range(self, start_page: int, end_page: Optional[int]) -> Tuple[int, int]:
+        """Limit a page range to the pages that exist."""
+        page_count = len(self.current_document)
+        if end_page is None or end_page > page_count:
+            end_page = page_count
+        return max(0, start_page), end_page
+
+    def join_page_texts(self, page_texts: Iterable[Tuple[int, str]]) -> str:
+        """
+        Combine page texts with the usual page separators.
+        
+        Args:
+            page_texts: (page number (0-based), page text) pairs
             
-            # Add page separator and text
-            all_text.append(self._format_page_separator(page_num))
-            all_text.append(page_text)
+        Returns:
+            All text combined as a single string
+        """
+        return "\n".join(self.iter_text_chunks(page_texts))
+
+    def iter_text_chunks(self, page_texts: Iterable[Tuple[int, str]]) -> Iterator[str]:
+        """
+        Yield page separators and page texts lazily.
         
-        return "\n".join(all_text)
+        Joining the chunks with newlines gives exactly what
+        join_page_texts() returns.
+        """
+        for page_num, page_text in page_texts:
+            # Add page separator and text
+            yield self._format_page_separator(page_num)
+            yield page_text
 
     def _report_progress(self, page_num: int):
         """Report progress during text extraction."""
@@ -148,8 +301,12 @@ class PDFProcessor:
 
     def close_document(self):
         """Close the current document and free memory."""
+        self.page_contexts.clear()
         if self.current_document:
-            self.current_document.close()
+            if self.document_is_pooled:
+                self.pool.release(self.current_document)
+            else:
+                self.current_document.close()
             self.current_document = None
             print("📄 Document closed")
 
@@ -170,23 +327,11 @@ class PDFProcessor:
             return {"error": f"Page {page_number} doesn't exist"}
         
         try:
-            page = self.current_document[page_number]
-            
-            # Get page dimensions
-            rect = page.rect
-            
-            # Count text blocks
-            text_dict = page.get_text("dict")
-            block_count = len(text_dict["blocks"])
-            
-            return {
-                "page_number": page_number,
-                "width": rect.width,
-                "height": rect.height,
-                "text_blocks": block_count,
-                "has_images": len(page.get_images()) > 0,
-                "image_count": len(page.get_images())
-            }
+            # Block counts include image blocks, so this needs the full profile;
+            # later pages' text then comes from the same parse as their info
+            if self.auto_profile:
+                self.extraction_profile = get_profile("full")
+            return self.page_context(page_number, "full").get_info()
             
         except Exception as e:
             return {"error": f"Error getting page info: {e}"}
@@ -0,0 +1,614 @@
+# src/pipeline.py
+import json
+import re
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.pdf_processor import PDFProcessor
+from src.content_analyzer import ContentAnalyzer, ContentBlock
+from src.markdown_generator import MarkdownGenerator
+from src.search_index import SearchIndex
+from src.block_exporter import BlockExporter
+from src.page_deduplicator import PageDeduplicator
+from src.header_footer_filter import HeaderFooterFilter
+from src.spill_buffer import MemoryBudget, PageTextBuffer, SpillBuffer, TextSpool, peak_rss_bytes
+from src.render_sinks import (ArtifactSink, BlockCollectorSink, FanOutRenderer, HeadingIndexSink,
+                              MarkdownBodySink, RenderSink, StatsSink)
+from src.heading_index import HeadingIndex, section_index_path
+from src.image_exporter import ImageExporter
+from src.line_classifier import load_backend
+from src.artifact_store import (DOCUMENT_PAGE, ArtifactStore, decode_blocks, encode_manifest,
+                                manifest_is_current)
+
+
+class ConversionPipeline:
+    """
+    Runs the complete PDF to markdown conversion for a loaded document.
+
+    This is the assembly line from the architecture guide in one place:
+    extract text, analyze content, generate markdown.
+    """
+
+    def __init__(self,
+                 content_analyzer: Optional[ContentAnalyzer] = None,
+                 markdown_generator: Optional[MarkdownGenerator] = None,
+                 search_index: Optional[SearchIndex] = None,
+                 page_deduplicator: Optional[PageDeduplicator] = None,
+                 dedup_mode: str = "link",
+                 memory_budget: Optional[int] = None,
+                 spill_dir: Optional[str] = None,
+                 image_exporter: Optional[ImageExporter] = None,
+                 artifact_store: Optional[ArtifactStore] = None,
+                 header_filter: Optional[HeaderFooterFilter] = None,
+                 classifier_backend: str = "regex",
+                 model_path: Optional[str] = None):
+        """
+        Initialize the pipeline, creating default components if needed.
+
+        Args:
+            content_analyzer: Analyzer used to classify lines
+            markdown_generator: Generator used to render markdown
+            search_index: Optional index that converted documents are added to
+            page_deduplicator: Optional deduplicator for repeated pages
+            dedup_mode: "link" or "skip" duplicate pages (see PageDeduplicator)
+            memory_budget: Bytes of content blocks, page texts and markdown body
+                           kept in memory together; beyond that they spill to
+                           temporary files (None keeps all in memory)
+            spill_dir: Directory for spilled segments (default: system temp dir)
+            image_exporter: Optional exporter that writes embedded images and
+                            puts image references into the markdown
+            artifact_store: Optional store that keeps every converted document's
+                            page texts, blocks and markdown (see load_from_store())
+            header_filter: Optional filter that strips running headers, footers
+                           and page numbers before classification
+            classifier_backend: Backend of the default analyzer, "regex" or
+                                "ngram" (see src/line_classifier.py); ignored
+                                when content_analyzer is given
+            model_path: Trained model for the "ngram" backend
+        """
+        self.content_analyzer = content_analyzer or \
+            ContentAnalyzer(backend=load_backend(classifier_backend, model_path))
+        self.markdown_generator = markdown_generator or MarkdownGenerator()
+        self.search_index = search_index
+        self.page_deduplicator = page_deduplicator
+        self.dedup_mode = dedup_mode
+        self.memory_budget = memory_budget
+        self.spill_dir = spill_dir
+        self.image_exporter = image_exporter
+        self.artifact_store = artifact_store
+        self.header_filter = header_filter
+
+    def convert(self, pdf_processor: PDFProcessor, fallback_title: str = "HTB Writeup",
+                start_page: int = 0, end_page: Optional[int] = None) -> Dict:
+        """
+        Convert the document currently loaded in a PDFProcessor.
+
+        Args:
+            pdf_processor: Processor with a loaded document
+            fallback_title: Title used when the document info has no "title" entry
+            start_page: First page to convert (0-based)
+            end_page: Stop before this page (default: end of document)
+
+        Returns:
+            Dictionary with the final markdown, content blocks, the page
+            texts that were classified, statistics and the heading index
+            (anchors and byte offsets into the markdown). With a memory
+            budget the markdown is a TextSpool, the blocks a SpillBuffer
+            and the page texts a PageTextBuffer (release their temporary
+            files with close_result()), and a "memory" report is added;
+            with an image exporter, an "images" report.
+        """
+        doc_info = pdf_processor.get_document_info()
+        title = doc_info.get("title", fallback_title)
+        author = doc_info.get("author", "")
+        header = self.markdown_generator.add_document_metadata(title, author)
+        self._forget_stored_artifacts(pdf_processor)
+        self._forget_fingerprints(pdf_processor, start_page, end_page)
+
+        # One pass over the blocks collects them and renders every format
+        budget = self._new_memory_budget()
+        content_blocks = self._new_block_store(budget)
+        page_texts = self._new_page_store(budget)
+        body = TextSpool(budget, self.spill_dir) if budget else None
+        body_sink = MarkdownBodySink(self.markdown_generator, output=body)
+        rendered = self.render(pdf_processor, [
+            BlockCollectorSink(content_blocks),
+            body_sink,
+            HeadingIndexSink(body_sink, reserved_headings=[title]),
+            StatsSink(),
+        ] + self._artifact_sinks(pdf_processor), start_page, end_page, collect_page_texts=page_texts)
+        heading_index = rendered["heading_index"]
+        toc = self._finish_heading_index(heading_index, header)
+
+        if self.search_index:
+            self.search_index.add_document(str(pdf_processor.document_path), content_blocks, title)
+
+        if body is None:
+            markdown = header + toc + rendered["markdown"]
+        else:
+            body.set_head(header + toc)
+            markdown = body
+
+        result = {
+            "markdown": markdown,
+            "content_blocks": content_blocks,
+            "page_texts": page_texts,
+            "doc_info": doc_info,
+            "statistics": rendered["statistics"],
+            "heading_index": heading_index
+        }
+        if self.artifact_store:
+            self._store_markdown(pdf_processor, markdown, start_page, end_page)
+        if self.page_deduplicator:
+            result["dedup"] = self.page_deduplicator.get_statistics()
+        if self.header_filter:
+            result["headers"] = self.header_filter.get_statistics()
+        if self.image_exporter:
+            result["images"] = self.image_exporter.finish()
+        if budget:
+            result["memory"] = self.get_memory_report(budget, {"blocks": content_blocks,
+                                                               "page_texts": page_texts,
+                                                               "markdown": body})
+        return result
+
+    def close_result(self, result: Dict):
+        """Delete the temporary files behind a convert() result made with a memory budget."""
+        for key in ("markdown", "content_blocks", "page_texts"):
+            if hasattr(result.get(key), "close"):
+                result[key].close()
+
+    def render(self, pdf_processor: PDFProcessor, sinks: List[RenderSink],
+               start_page: int = 0, end_page: Optional[int] = None,
+               collect_page_texts=None) -> Dict:
+        """
+        Classify a document once and feed the blocks to several output sinks.
+
+        Unlike iter_blocks(), this is a conversion: pages are remembered
+        for deduplication.
+
+        Args:
+            pdf_processor: Processor with a loaded document
+            sinks: Output formats to produce (see src/render_sinks.py)
+            start_page: First page to read (0-based)
+            end_page: Stop before this page (default: end of document)
+            collect_page_texts: Optional list (or PageTextBuffer) that gets
+                                every (page, text) pair that is classified
+
+        Returns:
+            Dictionary mapping each sink's name to its result
+        """
+        blocks = self.iter_blocks(pdf_processor, start_page, end_page,
+                                  collect_page_texts=collect_page_texts, read_only=False)
+        return FanOutRenderer(sinks).render(blocks)
+
+    def convert_to_file(self, pdf_processor: PDFProcessor, output_path: str,
+                        fallback_title: str = "HTB Writeup", start_page: int = 0,
+                        end_page: Optional[int] = None, save_section_index: bool = True,
+                        extra_sinks: Optional[List[RenderSink]] = None) -> Dict:
+        """
+        Convert a document and stream the markdown straight to a file.
+
+        Meant for very large documents: pages are extracted lazily, no
+        blocks are kept, and the markdown is written chunk by chunk
+        instead of being built as one string. The body is spooled (in
+        memory up to the memory budget, on disk beyond it) while the
+        table of contents (which comes first) is collected. The file has
+        the same content as convert()["markdown"].
+
+        The heading index is saved next to the markdown (see
+        section_index_path()) so single sections can be rendered later
+        with render_section() without converting the whole PDF again.
+
+        Args:
+            pdf_processor: Processor with a loaded document
+            output_path: Markdown file to write
+            fallback_title: Title used when the document info has no "title" entry
+            start_page: First page to convert (0-based)
+            end_page: Stop before this page (default: end of document)
+            save_section_index: Write the heading index next to the output
+            extra_sinks: More sinks fed in the same pass (e.g. progress tracking);
+                         their results are added to the returned dictionary
+
+        Returns:
+            Dictionary with document info, statistics, the heading index
+            (and where it was saved) and the memory report
+        """
+        doc_info = pdf_processor.get_document_info()
+        title = doc_info.get("title", fallback_title)
+        header = self.markdown_generator.add_document_metadata(title, doc_info.get("author", ""))
+
+        if self.image_exporter:
+            self.image_exporter.link_from(output_path)
+        self._forget_stored_artifacts(pdf_processor)
+        self._forget_fingerprints(pdf_processor, start_page, end_page)
+
+        # Without a budget the body goes straight to disk
+        budget = self._new_memory_budget() or MemoryBudget(0)
+        with TextSpool(budget, self.spill_dir) as body:
+            body_sink = MarkdownBodySink(self.markdown_generator, output=body)
+            rendered = self.render(pdf_processor, [
+                body_sink,
+                HeadingIndexSink(body_sink, reserved_headings=[title]),
+                StatsSink(),
+            ] + self._artifact_sinks(pdf_processor) + list(extra_sinks or []), start_page, end_page)
+            body.set_head(header + self._finish_heading_index(rendered["heading_index"], header))
+
+            with open(output_path, 'w', encoding='utf-8') as f:
+                body.copy_to(f)
+            if self.artifact_store:
+                self._store_markdown(pdf_processor, body, start_page, end_page)
+
+        result = {
+            "output_path": output_path,
+            "doc_info": doc_info,
+            "statistics": rendered["statistics"],
+            "heading_index": rendered["heading_index"],
+            "memory": self.get_memory_report(budget, {"markdown": body})
+        }
+        for sink in extra_sinks or []:
+            result[sink.name] = rendered[sink.name]
+        if save_section_index:
+            result["section_index_path"] = section_index_path(output_path)
+            rendered["heading_index"].save(result["section_index_path"])
+        if self.page_deduplicator:
+            result["dedup"] = self.page_deduplicator.get_statistics()
+        if self.header_filter:
+            result["headers"] = self.header_filter.get_statistics()
+        if self.image_exporter:
+            result["images"] = self.image_exporter.finish()
+        return result
+
+    def _artifact_sinks(self, pdf_processor: PDFProcessor) -> List[RenderSink]:
+        """A sink storing the blocks, if there is an artifact store."""
+        if not self.artifact_store:
+            return []
+        return [ArtifactSink(self.artifact_store, str(pdf_processor.document_path))]
+
+    def _forget_stored_artifacts(self, pdf_processor: PDFProcessor):
+        """Remove what an earlier conversion stored, so old and new pages never mix."""
+        if self.artifact_store:
+            self.artifact_store.delete_document(str(pdf_processor.document_path))
+
+    def _forget_fingerprints(self, pdf_processor: PDFProcessor, start_page: int,
+                             end_page: Optional[int]):
+        """Let the deduplicator forget the pages that are about to be converted again."""
+        if self.page_deduplicator:
+            self.page_deduplicator.begin_document(str(pdf_processor.document_path), start_page, end_page)
+
+    def _store_markdown(self, pdf_processor: PDFProcessor, markdown, start_page: int,
+                        end_page: Optional[int]):
+        """Store the markdown (a string, or a TextSpool chunk by chunk), then the manifest."""
+        doc_key = str(pdf_processor.document_path)
+        if isinstance(markdown, str):
+            self.artifact_store.put(doc_key, "markdown", markdown.encode("utf-8"))
+        else:
+            self.artifact_store.put_chunks(doc_key, "markdown",
+                                           (chunk.encode("utf-8") for chunk in markdown.iter_chunks()))
+        # Written last: without a manifest the conversion didn't finish
+        self.artifact_store.put(doc_key, "manifest", encode_manifest(
+            doc_key, pdf_processor.document_size, start_page, end_page))
+
+    def load_from_store(self, doc_key: str) -> Optional[Dict]:
+        """
+        Read a converted document back from the artifact store.
+
+        All of the document's artifacts are fetched together, which for
+        a SegmentArtifactStore is one or a few sequential reads.
+
+        Args:
+            doc_key: Document key (the PDF path it was converted from)
+
+        Returns:
+            Dictionary with the markdown, content blocks, page texts and
+            manifest, or None if the document isn't stored completely or
+            the PDF changed since it was converted
+        """
+        if not self.artifact_store:
+            return None
+        artifacts = self.artifact_store.read_document(doc_key)
+        if ("markdown", DOCUMENT_PAGE) not in artifacts or ("manifest", DOCUMENT_PAGE) not in artifacts:
+            return None
+        manifest = json.loads(artifacts[("manifest", DOCUMENT_PAGE)])
+        if not manifest_is_current(doc_key, manifest):
+            return None
+
+        pages = sorted(artifacts)
+        return {
+            "manifest": manifest,
+            "markdown": artifacts[("markdown", DOCUMENT_PAGE)].decode("utf-8"),
+            "content_blocks": [block for kind, page in pages if kind == "blocks"
+                               for block in decode_blocks(artifacts[(kind, page)])],
+            "page_texts": [(page - 1, artifacts[(kind, page)].decode("utf-8"))
+                           for kind, page in pages if kind == "page_text"]
+        }
+
+    def _finish_heading_index(self, heading_index: HeadingIndex, header: str) -> str:
+        """Build the TOC from the heading index and point its offsets past header and TOC."""
+        toc = self.markdown_generator.format_table_of_contents(heading_index)
+        heading_index.body_offset = len(header.encode("utf-8")) + len(toc.encode("utf-8"))
+        return toc
+
+    def _new_memory_budget(self) -> Optional[MemoryBudget]:
+        """One budget shared by all buffers of a conversion, if there is a memory budget."""
+        if self.memory_budget is None:
+            return None
+        return MemoryBudget(self.memory_budget)
+
+    def _new_block_store(self, budget: Optional[MemoryBudget]):
+        """A list for the blocks, or a SpillBuffer if there is a memory budget."""
+        if budget is None:
+            return []
+        return SpillBuffer(budget, self.spill_dir)
+
+    def _new_page_store(self, budget: Optional[MemoryBudget]):
+        """A list for the page texts, or a PageTextBuffer if there is a memory budget."""
+        if budget is None:
+            return []
+        return PageTextBuffer(budget, self.spill_dir)
+
+    def get_memory_report(self, budget: MemoryBudget, buffers: Dict) -> Dict:
+        """
+        Report what the memory budget covers and what was spilled.
+
+        peak_buffered_bytes is the most the buffers (blocks, page texts,
+        markdown body) held in memory at once, which is what the budget
+        limits. Peak RSS covers the whole process (interpreter and
+        PyMuPDF included) and is only reported for reference.
+
+        Args:
+            budget: The conversion's memory budget
+            buffers: Name -> SpillBuffer, PageTextBuffer or TextSpool
+        """
+        report = budget.get_statistics()
+        report["peak_rss"] = peak_rss_bytes()
+        for name, buffer in buffers.items():
+            if buffer is not None:
+                report[name] = buffer.get_statistics()
+        report["spilled_bytes"] = sum(report[name]["spilled_bytes"] for name in buffers if name in report)
+        return report
+
+    def iter_blocks(self, pdf_processor: PDFProcessor, start_page: int = 0,
+                    end_page: Optional[int] = None,
+                    start_at_heading: Optional[str] = None,
+                    stop_at_heading: Optional[str] = None,
+                    collect_page_texts=None,
+                    read_only: bool = True) -> Iterator[ContentBlock]:
+        """
+        Lazily extract and classify a document, page by page.
+
+        Pages are only extracted when the consumer asks for more blocks,
+        so stopping early (or using islice) skips the rest of the PDF.
+
+        Args:
+            pdf_processor: Processor with a loaded document
+            start_page: First page to read (0-based)
+            end_page: Stop before this page (default: end of document)
+            start_at_heading: Regex; skip blocks until a heading matches it
+            stop_at_heading: Regex; stop before the next heading that matches it
+            collect_page_texts: Optional list (or PageTextBuffer) that gets
+                                every (page, text) pair as it is classified
+            read_only: Leave no trace: page texts aren't stored, images are
+                       referenced but not written, and duplicate pages are
+                       looked up without remembering the pages read
+                       (False when converting, see render())
+
+        Yields:
+            ContentBlock objects in document order
+        """
+        page_texts = self._iter_page_texts(pdf_processor, start_page, end_page, read_only)
+        if collect_page_texts is not None:
+            page_texts = self._collect_page_texts(page_texts, collect_page_texts)
+        chunks = pdf_processor.iter_text_chunks(page_texts)
+        blocks = self.content_analyzer.iter_analyze_chunks(chunks)
+
+        if start_at_heading or stop_at_heading:
+            blocks = self._limit_to_headings(blocks, start_at_heading, stop_at_heading)
+        return blocks
+
+    def _collect_page_texts(self, page_texts: Iterator[Tuple[int, str]],
+                            collected) -> Iterator[Tuple[int, str]]:
+        """Pass page texts through, keeping a copy of each."""
+        for page_text in page_texts:
+            collected.append(page_text)
+            yield page_text
+
+    def iter_section_blocks(self, pdf_processor: PDFProcessor, heading_index: HeadingIndex,
+                            slug_or_text: str) -> Iterator[ContentBlock]:
+        """
+        Lazily extract and classify a single section of a document.
+
+        Only the pages the section covers are extracted, using the page
+        and line positions recorded in a heading index of the same PDF
+        (e.g. one loaded from the .sections.json next to a conversion).
+
+        Args:
+            pdf_processor: Processor with the indexed document loaded
+            heading_index: Heading index built from this document
+            slug_or_text: Anchor or heading text of the section
+
+        Yields:
+            The section's ContentBlock objects, starting with its heading
+        """
+        first_line, last_line = heading_index.line_range(slug_or_text)
+        start_page, end_page = heading_index.page_range(slug_or_text)
+
+        try:
+            for block in self.iter_blocks(pdf_processor, start_page, end_page):
+                position = (block.page_number, block.line_number)
+                if block.page_number is None or position < first_line:
+                    continue
+                if position == first_line and block.page_marker:
+                    # The separator of the heading's page shares its position
+                    continue
+                if position > last_line:
+                    return
+                yield block
+        finally:
+            # Stopping at the section end leaves the page stream unfinished
+            self._finish_images()
+
+    def render_section(self, pdf_processor: PDFProcessor, heading_index: HeadingIndex,
+                       slug_or_text: str) -> str:
+        """
+        Render the markdown of a single section (see iter_section_blocks()).
+
+        Returns:
+            The section's markdown, starting with its heading
+        """
+        blocks = self.iter_section_blocks(pdf_processor, heading_index, slug_or_text)
+        # Drop the spacing rendered before the heading, as read_section() does
+        return "\n".join(self.markdown_generator.iter_markdown_lines(blocks)).lstrip("\n")
+
+    def _limit_to_headings(self, blocks: Iterator[ContentBlock], start_at_heading: Optional[str],
+                           stop_at_heading: Optional[str]) -> Iterator[ContentBlock]:
+        """Yield blocks between a start heading and a stop heading."""
+        start_regex = re.compile(start_at_heading, re.IGNORECASE) if start_at_heading else None
+        stop_regex = re.compile(stop_at_heading, re.IGNORECASE) if stop_at_heading else None
+        started = start_regex is None
+
+        for block in blocks:
+            is_heading = block.content_type == "heading"
+            if not started:
+                if is_heading and start_regex.search(block.text):
+                    started = True
+                    yield block
+                continue
+            if is_heading and stop_regex and stop_regex.search(block.text):
+                return
+            yield block
+
+    def preview_markdown(self, pdf_processor: PDFProcessor, max_lines: int = 20,
+                         fallback_title: str = "HTB Writeup") -> List[str]:
+        """
+        Render only the first lines of the markdown.
+
+        Gives the same lines as convert()["markdown"].split('\n')[:max_lines]
+        (title, table of contents, then the body), but stops extracting
+        pages once those lines are known: a TOC entry is final as soon as
+        its heading is read, so only when the TOC is shorter than the
+        preview does the whole document have to be read, and even then
+        only the body lines that fit in the preview are kept. Nothing is
+        stored or written (see iter_blocks()).
+
+        Args:
+            pdf_processor: Processor with a loaded document
+            max_lines: Number of markdown lines to return
+            fallback_title: Title used when the document info has no "title" entry
+
+        Returns:
+            List of markdown lines
+        """
+        doc_info = pdf_processor.get_document_info()
+        title = doc_info.get("title", fallback_title)
+        header = self.markdown_generator.add_document_metadata(title, doc_info.get("author", ""))
+        try:
+            return list(islice(self._iter_preview_lines(pdf_processor, header, title, max_lines), max_lines))
+        finally:
+            # The preview usually stops before the last page
+            self._finish_images()
+
+    def _iter_preview_lines(self, pdf_processor: PDFProcessor, header: str, title: str,
+                            max_lines: int) -> Iterator[str]:
+        """
+        Markdown lines in final order, TOC entries yielded as their headings are read.
+
+        The body comes after the whole TOC, so its lines are held back,
+        but never more than are left for the preview.
+        """
+        # Header and TOC always end with a newline, so the body starts on a new line
+        head_lines = header.split('\n')[:-1]
+        heading_index = self.markdown_generator.new_heading_index([title])
+        head_lines += self.markdown_generator.format_table_of_contents(heading_index).split('\n')[:-1]
+        yield from head_lines
+        lines_left = max_lines - len(head_lines)
+
+        body_lines = []
+        previous_block_type = None
+        for block in self.iter_blocks(pdf_processor):
+            if block.content_type == "heading":
+                entry = self.markdown_generator.add_to_heading_index(heading_index, block)
+                yield heading_index.toc_line(entry)
+                lines_left -= 1
+            if len(body_lines) < lines_left:
+                chunks, previous_block_type = self.markdown_generator.render_block(block, previous_block_type)
+                body_lines.extend(line for chunk in chunks for line in chunk.split('\n'))
+
+        yield from body_lines[:max(lines_left, 0)]
+
+    def _iter_page_texts(self, pdf_processor: PDFProcessor, start_page: int,
+                         end_page: Optional[int], read_only: bool) -> Iterator[Tuple[int, str]]:
+        """
+        Extract pages in a range, stripping running headers and footers,
+        adding image references, storing page texts and linking or
+        skipping duplicate pages.
+        """
+        page_texts = pdf_processor.iter_page_texts(start_page, end_page)
+        # Headers are found before image references are added, so an
+        # image at the top of a page doesn't hide the header below it
+        if self.header_filter:
+            page_texts = self.header_filter.filter_pages(page_texts)
+            # Pages leave the filter window late; keep their parses for the images
+            pdf_processor.keep_page_contexts(self.header_filter.window_size)
+        if self.image_exporter:
+            page_texts = self._iter_image_pages(pdf_processor, page_texts, write=not read_only)
+        if self.artifact_store and not read_only:
+            page_texts = self._store_page_texts(str(pdf_processor.document_path), page_texts)
+        if not self.page_deduplicator:
+            return page_texts
+
+        return self.page_deduplicator.filter_pages(
+            str(pdf_processor.document_path), page_texts, self.dedup_mode, record=not read_only
+        )
+
+    def _iter_image_pages(self, pdf_processor: PDFProcessor, page_texts: Iterator[Tuple[int, str]],
+                          write: bool) -> Iterator[Tuple[int, str]]:
+        """Add image references to page texts, waiting for the image writes at the end."""
+        self.image_exporter.begin_document(str(pdf_processor.document_path))
+        try:
+            yield from self.image_exporter.iter_annotated_pages(
+                pdf_processor.current_document, page_texts, pdf_processor.page_context, write
+            )
+        finally:
+            self._finish_images()
+
+    def _finish_images(self) -> Optional[Dict]:
+        """Wait for queued image writes and stop the writer threads (if exporting images)."""
+        if self.image_exporter:
+            return self.image_exporter.finish()
+        return None
+
+    def _store_page_texts(self, doc_key: str,
+                          page_texts: Iterator[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+        """Pass page texts through, storing each as a "page_text" artifact (1-based page)."""
+        for page_number, text in page_texts:
+            self.artifact_store.put(doc_key, "page_text", text.encode("utf-8"), page_number + 1)
+            yield page_number, text
+
+    def export_blocks(self, pdf_processor: PDFProcessor, output_path: str,
+                      export_format: str = "jsonl",
+                      exporter: Optional[BlockExporter] = None) -> str:
+        """
+        Export classified blocks as structured data instead of markdown.
+
+        Blocks are classified and written in one streaming pass. Like
+        iter_blocks(), this doesn't touch the artifact store, and image
+        references point at the files a conversion writes.
+
+        Args:
+            pdf_processor: Processor with a loaded document
+            output_path: Destination file
+            export_format: "jsonl" or "columnar" (Parquet, or CSV without pyarrow)
+            exporter: Optional configured BlockExporter
+
+        Returns:
+            The format that was written ("jsonl", "parquet" or "csv")
+        """
+        exporter = exporter or BlockExporter()
+        doc_key = str(pdf_processor.document_path)
+        blocks = self.iter_blocks(pdf_processor)
+
+        if export_format == "jsonl":
+            exporter.write_jsonl(blocks, output_path, doc_key)
+            return "jsonl"
+        if export_format == "columnar":
+            return exporter.write_columnar(blocks, output_path, doc_key)
+        raise ValueError(f"Unknown export format: {export_format}")
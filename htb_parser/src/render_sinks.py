@@ -0,0 +1,284 @@
+# src/render_sinks.py
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, TextIO
+from src.content_analyzer import ContentBlock
+from src.markdown_generator import MarkdownGenerator
+from src.block_exporter import BlockExporter
+from src.heading_index import HeadingIndex
+from src.artifact_store import DOCUMENT_PAGE, ArtifactStore, encode_blocks
+
+
+class RenderSink(ABC):
+    """
+    One output format fed by the FanOutRenderer.
+
+    A sink sees every block exactly once, in document order, and
+    builds its output as it goes. Subclass this to add a new format.
+    """
+
+    name = "sink"
+
+    @abstractmethod
+    def consume(self, block: ContentBlock):
+        """Take the next block."""
+
+    def finish(self):
+        """Called after the last block; returns the sink's result."""
+        return None
+
+    def required_sinks(self) -> List["RenderSink"]:
+        """Sinks that must see each block before this one (checked by FanOutRenderer)."""
+        return []
+
+
+class BlockCollectorSink(RenderSink):
+    """Keeps the blocks, e.g. in a list or a SpillBuffer."""
+
+    name = "content_blocks"
+
+    def __init__(self, store=None):
+        """
+        Args:
+            store: Anything with append() (default: a new list)
+        """
+        self.store = store if store is not None else []
+
+    def consume(self, block: ContentBlock):
+        self.store.append(block)
+
+    def finish(self):
+        return self.store
+
+
+class MarkdownBodySink(RenderSink):
+    """Renders the markdown body, like MarkdownGenerator.generate_markdown()."""
+
+    name = "markdown"
+
+    def __init__(self, markdown_generator: Optional[MarkdownGenerator] = None,
+                 output: Optional[TextIO] = None):
+        """
+        Args:
+            markdown_generator: Generator used to format blocks
+            output: Optional open file to stream the body to instead of
+                    collecting it (finish() then returns None)
+        """
+        self.markdown_generator = markdown_generator or MarkdownGenerator()
+        self.output = output
+        self.chunks: List[str] = []
+        self.previous_block_type = None
+        self.chunks_written = 0
+
+        # UTF-8 size of the body so far, and where the last block's own
+        # chunk starts (after any spacing), for the heading index
+        self.bytes_written = 0
+        self.block_offset = 0
+
+    def consume(self, block: ContentBlock):
+        chunks, self.previous_block_type = self.markdown_generator.render_block(
+            block, self.previous_block_type
+        )
+        for chunk in chunks:
+            if self.chunks_written:
+                self.bytes_written += 1
+                if self.output is not None:
+                    self.output.write("\n")
+            self.block_offset = self.bytes_written
+            self.bytes_written += len(chunk) if chunk.isascii() else len(chunk.encode("utf-8"))
+            if self.output is None:
+                self.chunks.append(chunk)
+            else:
+                self.output.write(chunk)
+            self.chunks_written += 1
+
+    def finish(self) -> Optional[str]:
+        if self.output is not None:
+            return None
+        return "\n".join(self.chunks)
+
+
+class TocSink(RenderSink):
+    """Builds the table of contents, like MarkdownGenerator.generate_table_of_contents()."""
+
+    name = "toc"
+
+    def __init__(self, markdown_generator: Optional[MarkdownGenerator] = None,
+                 reserved_headings: Iterable[str] = ()):
+        """
+        Args:
+            markdown_generator: Generator used to format headings
+            reserved_headings: Headings before the body whose anchors are taken
+        """
+        self.markdown_generator = markdown_generator or MarkdownGenerator()
+        self.heading_index = self.markdown_generator.new_heading_index(reserved_headings)
+
+    def consume(self, block: ContentBlock):
+        if block.content_type == "heading":
+            self.markdown_generator.add_to_heading_index(self.heading_index, block)
+
+    def finish(self) -> str:
+        return self.markdown_generator.format_table_of_contents(self.heading_index)
+
+
+class HeadingIndexSink(RenderSink):
+    """
+    Builds a HeadingIndex with byte offsets into the markdown body.
+
+    Every section also gets the page and line of its last non-empty
+    line, so it can later be re-rendered from just its pages.
+    It reads the offsets from a MarkdownBodySink, which therefore has to
+    come before it in the same FanOutRenderer (checked when the renderer
+    is created).
+    """
+
+    name = "heading_index"
+
+    def __init__(self, body_sink: MarkdownBodySink, reserved_headings: Iterable[str] = ()):
+        """
+        Args:
+            body_sink: The sink rendering the body these offsets refer to
+            reserved_headings: Headings before the body whose anchors are taken
+        """
+        self.body_sink = body_sink
+        self.markdown_generator = body_sink.markdown_generator
+        self.heading_index = self.markdown_generator.new_heading_index(reserved_headings)
+        self.last_line = None
+
+    def required_sinks(self) -> List[RenderSink]:
+        return [self.body_sink]
+
+    def consume(self, block: ContentBlock):
+        if block.content_type == "heading":
+            self.markdown_generator.add_to_heading_index(
+                self.heading_index, block, self.body_sink.block_offset, self.last_line
+            )
+        if block.page_number is not None and block.text.strip() and not block.page_marker:
+            self.last_line = (block.page_number, block.line_number)
+
+    def finish(self) -> HeadingIndex:
+        self.heading_index.close(self.body_sink.bytes_written, self.last_line)
+        return self.heading_index
+
+
+class StatsSink(RenderSink):
+    """Counts blocks, like ContentAnalyzer.get_statistics()."""
+
+    name = "statistics"
+
+    def __init__(self):
+        self.total_blocks = 0
+        self.content_types: Dict[str, int] = {}
+        self.total_confidence = 0.0
+
+    def consume(self, block: ContentBlock):
+        self.total_blocks += 1
+        self.content_types[block.content_type] = self.content_types.get(block.content_type, 0) + 1
+        self.total_confidence += block.confidence
+
+    def finish(self) -> Dict:
+        return {
+            "total_blocks": self.total_blocks,
+            "content_types": self.content_types,
+            "confidence_avg": self.total_confidence / self.total_blocks if self.total_blocks else 0.0
+        }
+
+
+class JsonlExportSink(RenderSink):
+    """Writes blocks as JSON Lines records with BlockExporter.write_jsonl_record()."""
+
+    name = "export"
+
+    def __init__(self, output: TextIO, doc_key: str = "", exporter: Optional[BlockExporter] = None):
+        """
+        Args:
+            output: Open text file the records are written to
+            doc_key: Document identifier stored in every record
+            exporter: Configured BlockExporter (decides e.g. whether empty blocks are kept)
+        """
+        self.output = output
+        self.doc_key = doc_key
+        self.exporter = exporter or BlockExporter()
+        self.records_written = 0
+
+    def consume(self, block: ContentBlock):
+        self.records_written += self.exporter.write_jsonl_record(self.output, block, self.doc_key)
+
+    def finish(self) -> int:
+        return self.records_written
+
+
+class ArtifactSink(RenderSink):
+    """Stores the classified blocks of every page in an ArtifactStore ("blocks" artifacts)."""
+
+    name = "artifacts"
+
+    def __init__(self, store: ArtifactStore, doc_key: str):
+        """
+        Args:
+            store: Store the blocks are written to
+            doc_key: Document the blocks belong to
+        """
+        self.store = store
+        self.doc_key = doc_key
+        self.page_blocks: List[ContentBlock] = []
+        self.pages_stored = 0
+
+    def consume(self, block: ContentBlock):
+        if self.page_blocks and block.page_number != self.page_blocks[-1].page_number:
+            self._store_page()
+        self.page_blocks.append(block)
+
+    def _store_page(self):
+        """Write the blocks of the current page."""
+        page = self.page_blocks[0].page_number
+        self.store.put(self.doc_key, "blocks", encode_blocks(self.page_blocks),
+                       DOCUMENT_PAGE if page is None else page)
+        self.page_blocks = []
+        self.pages_stored += 1
+
+    def finish(self) -> int:
+        if self.page_blocks:
+            self._store_page()
+        return self.pages_stored
+
+
+class FanOutRenderer:
+    """
+    Feeds one stream of content blocks to several output formats at once.
+
+    This is like a conveyor belt with several workers along it: each
+    block passes by every worker once, and each worker takes what it
+    needs. The block stream is walked a single time no matter how many
+    formats are produced, so it can be a lazy generator or a SpillBuffer.
+    """
+
+    def __init__(self, sinks: Iterable[RenderSink]):
+        """
+        Args:
+            sinks: Sinks to feed, in order; their names must be unique and
+                   every sink must come after the sinks it requires
+        """
+        self.sinks = list(sinks)
+        names = [sink.name for sink in self.sinks]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Sink names must be unique: {names}")
+        for position, sink in enumerate(self.sinks):
+            for required in sink.required_sinks():
+                if not any(required is earlier for earlier in self.sinks[:position]):
+                    raise ValueError(f"The {sink.name} sink must come after the {required.name} sink it reads from")
+
+    def render(self, blocks: Iterable[ContentBlock]) -> Dict:
+        """
+        Walk the blocks once, feeding every sink.
+
+        Args:
+            blocks: Any iterable of content blocks
+
+        Returns:
+            Dictionary mapping each sink's name to its finish() result
+        """
+        consumers = [sink.consume for sink in self.sinks]
+        for block in blocks:
+            for consume in consumers:
+                consume(block)
+        return {sink.name: sink.finish() for sink in self.sinks}
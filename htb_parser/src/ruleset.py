@@ -0,0 +1,533 @@
+# src/ruleset.py
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:
+    # Python < 3.11 exposes the regex parser as top-level modules
+    import sre_constants
+    import sre_parse
+
+
+# The rules file shipped with the parser
+DEFAULT_RULESET_PATH = Path(__file__).resolve().parent / "rules" / "default_rules.json"
+
+# Bump when the compiled form changes, so stale cache files are ignored
+COMPILED_FORMAT_VERSION = 3
+
+# Pattern families in the order classify_line checks them
+FAMILY_ORDER = ["command", "code", "heading", "url", "network", "path"]
+
+# Families whose patterns must match at the start of the line
+ANCHORED_FAMILIES = {"command", "heading"}
+
+# Regex flags a rules file may ask for
+ALLOWED_FLAGS = {"IGNORECASE": re.IGNORECASE, "ASCII": re.ASCII}
+
+# Every character \s matches except the newline (all are below U+3001)
+_SPACE_EXCEPT_NEWLINE = "".join(
+    f"\\u{code:04x}" for code in range(0x3001) if chr(code).isspace() and code != 0x0A
+)
+
+# Triggers are alternations of literal runs; past this many alternatives
+# checking the trigger costs about as much as the pattern itself
+MAX_TRIGGER_ALTERNATIVES = 16
+
+
+class RulesetError(ValueError):
+    """A rules file is malformed or contains an invalid pattern."""
+
+
+@dataclass(frozen=True)
+class _NodeInfo:
+    """
+    What derive_trigger() knows about one piece of a parsed pattern.
+
+    Each field is a tuple of alternatives, or None if unknown or too
+    many. An alternative is a tuple of (regex source, score) pairs, one
+    per character position, e.g. the digit and dot of "[0-9]\\.".
+    """
+    exact: Optional[tuple]     # Every string the piece can match
+    prefix: Optional[tuple]    # Every match starts with one of these
+    suffix: Optional[tuple]    # Every match ends with one of these
+    required: Optional[tuple]  # Every match contains one of these
+
+
+_EMPTY = ((),)
+_UNKNOWN = _NodeInfo(None, None, None, None)
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    # "x*+" and friends, Python 3.11+
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+# Regex source and score of the categories ("\d", "\s", ...), outside
+# and inside a character class; none of them may match a newline
+_CATEGORY_SOURCES = {
+    sre_constants.CATEGORY_DIGIT: ("\\d", 1),
+    sre_constants.CATEGORY_NOT_DIGIT: ("[^\\d\\n]", 0),
+    sre_constants.CATEGORY_SPACE: ("[^\\S\\n]", 0),
+    sre_constants.CATEGORY_NOT_SPACE: ("\\S", 0),
+    sre_constants.CATEGORY_WORD: ("\\w", 0),
+    sre_constants.CATEGORY_NOT_WORD: ("[^\\w\\n]", 0),
+}
+_CLASS_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT: "\\d",
+    sre_constants.CATEGORY_SPACE: _SPACE_EXCEPT_NEWLINE,
+    sre_constants.CATEGORY_NOT_SPACE: "\\S",
+    sre_constants.CATEGORY_WORD: "\\w",
+}
+
+
+def derive_trigger(pattern: str, flags: int = 0) -> Optional[str]:
+    """
+    Derive a cheap necessary condition for a pattern.
+
+    Every string the pattern matches contains a match of the trigger,
+    so a line without one can skip the (slower) pattern. The trigger is
+    the most selective run of characters the pattern can't match
+    without, starting at a literal so the regex engine can skip ahead
+    to it, e.g. "\\.[0-9]" for an IPv4 address or "nmap|hydra" for a
+    tool list. It never matches across a newline, so it can also be
+    searched for in many lines joined together.
+
+    Args:
+        pattern: Regex source
+        flags: Flags the pattern is compiled with (the trigger uses the same)
+
+    Returns:
+        The trigger's regex source, or None if the pattern requires
+        nothing selective enough to be worth checking first
+    """
+    runs = _trigger_runs(pattern, flags)
+    return "|".join(runs) if runs is not None else None
+
+
+def _trigger_runs(pattern: str, flags: int) -> Optional[List[str]]:
+    """The alternatives of a pattern's trigger, as regex sources."""
+    info = _sequence_info(sre_parse.parse(pattern, flags))
+    best = None
+    for candidate in (info.required, info.exact, info.prefix, info.suffix):
+        best = _more_selective(best, candidate)
+    # A lone character class rules out too few lines to pay off
+    if best is None or _selectivity(best) < 2:
+        return None
+
+    runs = []
+    for run in best:
+        # Start at the first literal, where the regex engine can skip ahead
+        # to; unselective characters at the end only slow the check down
+        scores = [score for _, score in run]
+        start = scores.index(2) if 2 in scores else 0
+        end = len(run)
+        while scores[start] == 0:
+            start += 1
+        while scores[end - 1] == 0:
+            end -= 1
+        runs.append("".join(source for source, _ in run[start:end]))
+    return list(dict.fromkeys(runs))
+
+
+def _sequence_info(items) -> _NodeInfo:
+    """Combine the infos of consecutive pattern items, left to right."""
+    info = _NodeInfo(_EMPTY, _EMPTY, _EMPTY, None)
+    for item in items:
+        info = _concat(info, _item_info(*item))
+    return info
+
+
+def _concat(left: _NodeInfo, right: _NodeInfo) -> _NodeInfo:
+    """Info of left followed by right."""
+    prefix = left.prefix
+    if left.exact is not None:
+        prefix = _product(left.exact, right.prefix) or left.exact
+    suffix = right.suffix
+    if right.exact is not None:
+        suffix = _product(left.suffix, right.exact) or right.exact
+
+    required = _more_selective(left.required, right.required)
+    # A run can continue across the join, e.g. "[0-9]" then "\\."
+    required = _more_selective(required, _product(left.suffix, right.prefix))
+    return _NodeInfo(_product(left.exact, right.exact), prefix, suffix, required)
+
+
+def _item_info(op, av) -> _NodeInfo:
+    """Info of one parsed pattern item."""
+    if op is sre_constants.LITERAL:
+        return _single(re.escape(chr(av)), 2)
+    if op is sre_constants.NOT_LITERAL:
+        return _single(f"[^{re.escape(chr(av))}\\n]", 0)
+    if op is sre_constants.ANY:
+        return _single("[^\\n]", 0)
+    if op is sre_constants.IN:
+        return _single(*_class_source(av))
+    if op is sre_constants.CATEGORY:
+        return _single(*_CATEGORY_SOURCES.get(av, ("[^\\n]", 0)))
+    if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        # Anchors, word boundaries and lookarounds match no characters
+        return _NodeInfo(_EMPTY, _EMPTY, _EMPTY, None)
+    if op is sre_constants.SUBPATTERN:
+        _, add_flags, del_flags, items = av
+        # Inline flags (e.g. "(?i:...)") would change what the run matches
+        return _UNKNOWN if add_flags or del_flags else _sequence_info(items)
+    if op is sre_constants.BRANCH:
+        return _branch_info([_sequence_info(items) for items in av[1]])
+    if op in _REPEATS:
+        return _repeat_info(*av)
+    return _UNKNOWN
+
+
+def _single(source: str, score: int) -> _NodeInfo:
+    """Info of an item that matches exactly one character."""
+    run = (((source, score),),)
+    return _NodeInfo(run, run, run, run)
+
+
+def _branch_info(infos) -> _NodeInfo:
+    """Info of an alternation: every field is the union of the branches'."""
+    def union(fields):
+        if any(field is None for field in fields):
+            return None
+        merged = tuple(dict.fromkeys(run for field in fields for run in field))
+        return merged if len(merged) <= MAX_TRIGGER_ALTERNATIVES else None
+
+    required = []
+    for info in infos:
+        best = None
+        for candidate in (info.required, info.exact, info.prefix, info.suffix):
+            best = _more_selective(best, candidate)
+        required.append(best)
+    return _NodeInfo(union([info.exact for info in infos]), union([info.prefix for info in infos]),
+                     union([info.suffix for info in infos]), union(required))
+
+
+def _repeat_info(minimum: int, maximum, items) -> _NodeInfo:
+    """Info of a repeated item, e.g. "x+", "x?" or "(?:ab){3}"."""
+    info = _sequence_info(items)
+    if minimum == 0:
+        if maximum == 1 and info.exact is not None:
+            # "s?" matches "s" or nothing, e.g. "https?://"
+            optional = tuple(dict.fromkeys(info.exact + _EMPTY))
+            return _NodeInfo(optional, optional, optional, None)
+        return _NodeInfo(None, _EMPTY, _EMPTY, None)
+
+    exact = info.exact if minimum == maximum == 1 else None
+    required = info.required
+    if minimum >= 2:
+        # The end of one repetition is followed by the start of the next
+        required = _more_selective(required, _product(info.suffix, info.prefix))
+    return _NodeInfo(exact, info.prefix, info.suffix, required)
+
+
+def _product(left: Optional[tuple], right: Optional[tuple]) -> Optional[tuple]:
+    """Every alternative of left followed by every one of right (None if too many)."""
+    if left is None or right is None or len(left) * len(right) > MAX_TRIGGER_ALTERNATIVES:
+        return None
+    return tuple(dict.fromkeys(a + b for a in left for b in right))
+
+
+def _selectivity(alternatives: tuple) -> int:
+    """How rare a match of the alternatives is: the score of the weakest one."""
+    return min(sum(score for _, score in run) for run in alternatives)
+
+
+def _more_selective(current: Optional[tuple], candidate: Optional[tuple]) -> Optional[tuple]:
+    """Pick the better of two sets of alternatives (fewer alternatives break ties)."""
+    if candidate is None:
+        return current
+    if current is None:
+        return candidate
+    current_key = (_selectivity(current), -len(current))
+    return candidate if (_selectivity(candidate), -len(candidate)) > current_key else current
+
+
+def _class_source(items) -> tuple:
+    """Regex source and score of a character class, never matching a newline."""
+    negated = False
+    parts = []
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negated = True
+        elif op is sre_constants.LITERAL:
+            parts.append(re.escape(chr(av)))
+        elif op is sre_constants.RANGE:
+            parts.append(f"{re.escape(chr(av[0]))}-{re.escape(chr(av[1]))}")
+        elif op is sre_constants.CATEGORY and av in _CLASS_CATEGORIES:
+            parts.append(_CLASS_CATEGORIES[av])
+        else:
+            # Anything unusual: one character of any kind
+            return "[^\\n]", 0
+    if negated:
+        return f"[^{''.join(parts)}\\n]", 0
+    has_category = any(op is sre_constants.CATEGORY for op, _ in items)
+    return f"[{''.join(parts)}]", 0 if has_category else 1
+
+
+@dataclass(frozen=True)
+class Ruleset:
+    """
+    Classification and formatting rules, validated and compiled.
+
+    This is like a recipe book that has already been translated: the
+    rules file is read and checked once, the per-family patterns are
+    merged into one verifier per family, each family gets a cheap
+    trigger derived from its patterns, and keyword tables are turned
+    into single regexes. The result can be cached on disk under
+    the hash of the rules file, so other processes skip that work (see
+    load_ruleset()).
+
+    Treat the contents as read-only; ContentAnalyzer and MarkdownGenerator
+    copy what they may change.
+    """
+
+    ruleset_hash: str
+    source_path: str
+    families: Dict  # family -> patterns, flags, verifier and trigger sources
+    markdown: Dict
+
+    @classmethod
+    def from_compiled(cls, compiled: Dict, source_path: str = "") -> "Ruleset":
+        """Build a ruleset from its compiled (JSON) form."""
+        markdown = dict(compiled["markdown"])
+        # JSON object keys are strings
+        markdown["heading_keywords"] = {int(level): keywords
+                                        for level, keywords in markdown["heading_keywords"].items()}
+        return cls(compiled["hash"], source_path, compiled["families"], markdown)
+
+
+def validate_ruleset(rules: Dict):
+    """
+    Check a parsed rules file.
+
+    Raises:
+        RulesetError: Describing the first problem found
+    """
+    if not isinstance(rules, dict) or rules.get("version") != 1:
+        raise RulesetError("Rules file must be an object with \"version\": 1")
+    for key in ("patterns", "content_types", "markdown"):
+        if not isinstance(rules.get(key), dict):
+            raise RulesetError(f"Missing or invalid section: {key}")
+
+    patterns = rules["patterns"]
+    for name, pattern in patterns.items():
+        if not isinstance(pattern, str):
+            raise RulesetError(f"patterns.{name} must be a string")
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            raise RulesetError(f"patterns.{name} is not a valid regex: {e}")
+
+    content_types = rules["content_types"]
+    if sorted(content_types) != sorted(FAMILY_ORDER):
+        raise RulesetError(f"content_types must define exactly: {', '.join(FAMILY_ORDER)}")
+    for family, spec in content_types.items():
+        if not isinstance(spec, dict):
+            raise RulesetError(f"content_types.{family} must be an object")
+        if not _is_string_list(spec.get("flags", [])):
+            raise RulesetError(f"content_types.{family}.flags must be a list of flag names")
+        for flag in spec.get("flags", []):
+            if flag not in ALLOWED_FLAGS:
+                raise RulesetError(f"content_types.{family}: unknown flag {flag}")
+        names = spec.get("patterns")
+        if not isinstance(names, list) or not names:
+            raise RulesetError(f"content_types.{family}.patterns must be a non-empty list")
+        for name in names:
+            _check_pattern_name(patterns, name, f"content_types.{family}")
+            if family in ANCHORED_FAMILIES and not patterns[name].startswith("^"):
+                raise RulesetError(f"content_types.{family}: pattern {name} must start with ^")
+
+    markdown = rules["markdown"]
+    for key in ("command_patterns", "path_patterns"):
+        if not _is_string_list(markdown.get(key)):
+            raise RulesetError(f"markdown.{key} must be a list of pattern names")
+        for name in markdown[key]:
+            _check_pattern_name(patterns, name, f"markdown.{key}")
+    for key in ("ip_pattern", "url_pattern"):
+        _check_pattern_name(patterns, markdown.get(key), f"markdown.{key}")
+
+    language_mappings = markdown.get("language_mappings")
+    if not isinstance(language_mappings, dict) or not all(
+            _is_string_list(tools) and all(tools) for tools in language_mappings.values()):
+        raise RulesetError("markdown.language_mappings must map languages to lists of tools")
+    max_length = markdown.get("inline_code_max_length")
+    if not isinstance(max_length, int) or max_length < 0:
+        raise RulesetError("markdown.inline_code_max_length must be a non-negative integer")
+    heading_keywords = markdown.get("heading_keywords")
+    if not isinstance(heading_keywords, dict) or not all(
+            level in {"1", "2", "3", "4", "5", "6"} and _is_string_list(keywords)
+            for level, keywords in heading_keywords.items()):
+        raise RulesetError("markdown.heading_keywords must map levels 1-6 to lists of keywords")
+    if not _is_string_list(markdown.get("important_terms")) or not all(markdown["important_terms"]):
+        raise RulesetError("markdown.important_terms must be a list of non-empty strings")
+
+
+def _check_pattern_name(patterns: Dict, name, where: str):
+    """Raise if a pattern reference doesn't name a defined pattern."""
+    if name not in patterns:
+        raise RulesetError(f"{where}: unknown pattern {name!r}")
+
+
+def _is_string_list(value) -> bool:
+    """Check for a list of strings."""
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def compile_ruleset(rules: Dict, ruleset_hash: str) -> Dict:
+    """
+    Turn validated rules into the compiled (JSON-serializable) form.
+
+    Pattern names are resolved, each family's patterns are merged into
+    a single verifier, each family
+    searched anywhere in the line gets a trigger (see derive_trigger();
+    None if any of its patterns has none), and the language and
+    important-term keyword tables become single regexes.
+    """
+    patterns = rules["patterns"]
+
+    families = {}
+    for family in FAMILY_ORDER:
+        spec = rules["content_types"][family]
+        family_patterns = [patterns[name] for name in spec["patterns"]]
+        flags = 0
+        for flag in spec.get("flags", []):
+            flags |= ALLOWED_FLAGS[flag]
+        families[family] = {
+            "patterns": family_patterns,
+            "flags": flags,
+            "anchored": family in ANCHORED_FAMILIES,
+            "verifier": "|".join(f"(?:{pattern})" for pattern in family_patterns),
+            # Anchored patterns fail at the first character anyway
+            "trigger": None if family in ANCHORED_FAMILIES else _family_trigger(family_patterns, flags),
+        }
+
+    markdown = dict(rules["markdown"])
+    markdown["command_patterns"] = [patterns[name] for name in markdown["command_patterns"]]
+    # The generator checks whole lines against the paths
+    markdown["path_patterns"] = [f"^{patterns[name]}$" for name in markdown["path_patterns"]]
+    markdown["ip_pattern"] = patterns[markdown["ip_pattern"]]
+    markdown["url_pattern"] = f"({patterns[markdown['url_pattern']]})"
+
+    # Tools in language order: at any position the regex picks the
+    # first listed tool, i.e. the one of the highest-priority language
+    tool_languages = {}
+    for language, tools in markdown["language_mappings"].items():
+        for tool in tools:
+            tool_languages.setdefault(tool, language)
+    markdown["tool_languages"] = tool_languages
+    markdown["language_pattern"] = (
+        "(?=(" + "|".join(re.escape(tool) for tool in tool_languages) + "))" if tool_languages else "(?!)"
+    )
+    markdown["important_terms_pattern"] = (
+        r"\b(" + "|".join(re.escape(term) for term in markdown["important_terms"]) + r")\b"
+    )
+
+    return {
+        "format": COMPILED_FORMAT_VERSION,
+        "hash": ruleset_hash,
+        "families": families,
+        "markdown": markdown,
+    }
+
+
+def _family_trigger(patterns, flags: int) -> Optional[str]:
+    """One trigger for a whole family: any of its patterns' triggers."""
+    runs = []
+    for pattern in patterns:
+        pattern_runs = _trigger_runs(pattern, flags)
+        if pattern_runs is None:
+            return None
+        runs.extend(pattern_runs)
+    return "|".join(dict.fromkeys(runs))
+
+
+def default_cache_dir() -> Optional[Path]:
+    """Where compiled rulesets are cached: under $HTB_PARSER_CACHE_DIR, None if unset."""
+    cache_root = os.environ.get("HTB_PARSER_CACHE_DIR")
+    return Path(cache_root) / "rulesets" if cache_root else None
+
+
+_loaded_rulesets: Dict[str, Ruleset] = {}
+_loaded_rulesets_lock = threading.Lock()
+
+
+def load_ruleset(path: Optional[str] = None, cache_dir: Optional[str] = None,
+                 use_cache: bool = True) -> Ruleset:
+    """
+    Load a rules file, using the compiled form cached for its hash if possible.
+
+    Within one process a ruleset is only loaded once per hash. The disk
+    cache is opt-in: with a cache_dir (or $HTB_PARSER_CACHE_DIR set) the
+    compiled form is read from it instead of being validated and compiled
+    again in every process; otherwise nothing is written to disk.
+
+    Args:
+        path: Rules file (default: the shipped rules)
+        cache_dir: Directory for compiled rulesets (default: default_cache_dir())
+        use_cache: Read and write the disk cache (if there is a cache_dir)
+
+    Returns:
+        The compiled ruleset
+
+    Raises:
+        RulesetError: If the rules file is invalid
+    """
+    source_path = Path(path) if path else DEFAULT_RULESET_PATH
+    data = source_path.read_bytes()
+    ruleset_hash = hashlib.sha256(data).hexdigest()[:16]
+
+    with _loaded_rulesets_lock:
+        ruleset = _loaded_rulesets.get(ruleset_hash)
+        if ruleset is not None:
+            return ruleset
+
+        cache_dir = cache_dir or default_cache_dir()
+        cache_path = Path(cache_dir) / f"ruleset-{ruleset_hash}.json" if use_cache and cache_dir else None
+        compiled = _read_compiled(cache_path) if cache_path else None
+        if compiled is None:
+            try:
+                rules = json.loads(data)
+            except ValueError as e:
+                raise RulesetError(f"{source_path} is not valid JSON: {e}")
+            validate_ruleset(rules)
+            compiled = compile_ruleset(rules, ruleset_hash)
+            if cache_path:
+                _write_compiled(cache_path, compiled)
+
+        ruleset = Ruleset.from_compiled(compiled, str(source_path))
+        _loaded_rulesets[ruleset_hash] = ruleset
+        return ruleset
+
+
+def _read_compiled(cache_path: Path) -> Optional[Dict]:
+    """Read a cached compiled ruleset (None if missing, unreadable or outdated)."""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            compiled = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return compiled if compiled.get("format") == COMPILED_FORMAT_VERSION else None
+
+
+def _write_compiled(cache_path: Path, compiled: Dict):
+    """Store a compiled ruleset; the cache is optional, so failures are ignored."""
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(compiled, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass
+
+
+def clear_loaded_rulesets():
+    """Forget the rulesets loaded in this process (the disk cache stays)."""
+    with _loaded_rulesets_lock:
+        _loaded_rulesets.clear()
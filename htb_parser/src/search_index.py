@@ -0,0 +1,337 @@
+# src/search_index.py
+import hashlib
+import re
+import sqlite3
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from src.content_analyzer import ContentBlock
+from src.ruleset import load_ruleset
+
+
+# Entity kinds stored next to the full-text index
+ENTITY_KINDS = ["command", "ip", "port", "path", "url", "heading"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT UNIQUE NOT NULL,
+    title TEXT,
+    content_hash TEXT NOT NULL,
+    block_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    first_block INTEGER,
+    last_block INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS blocks USING fts5(
+    text,
+    content_type UNINDEXED,
+    doc_id UNINDEXED,
+    page_number UNINDEXED,
+    line_number UNINDEXED
+);
+CREATE TABLE IF NOT EXISTS entities (
+    doc_id INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    value TEXT NOT NULL,
+    page_number INTEGER,
+    line_number INTEGER
+);
+CREATE INDEX IF NOT EXISTS entities_by_value ON entities (kind, value);
+CREATE INDEX IF NOT EXISTS entities_by_doc ON entities (doc_id);
+"""
+
+# Blocks inserted per executemany() call, so a document's rows are
+# streamed into the index instead of being collected first
+INSERT_BATCH_SIZE = 1000
+
+
+class SearchIndex:
+    """
+    A local full-text index over converted writeups.
+
+    This is like the index at the back of a book, but for the whole
+    bookshelf: every block goes into a SQLite FTS5 table, and commands,
+    IPs, ports, paths, URLs and headings are also stored as exact
+    "entities" so questions like "all hashcat commands" are one lookup.
+    """
+
+    def __init__(self, db_path: str = "htb_index.sqlite3"):
+        """
+        Open (or create) the search index.
+
+        Args:
+            db_path: SQLite database file, or ":memory:"
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._setup_entity_patterns()
+
+    def _setup_entity_patterns(self):
+        """Define regex patterns used to pull entities out of blocks."""
+        # Reuse the classification rules' URL and path patterns so both agree
+        families = load_ruleset().families
+
+        self.url_regex = re.compile("|".join(families["url"]["patterns"]), families["url"]["flags"])
+        self.path_regex = re.compile("|".join(families["path"]["patterns"]), families["path"]["flags"])
+        self.ip_regex = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+        self.port_regexes = [
+            re.compile(r'\bports?\s+([0-9]{1,5})\b', re.IGNORECASE),  # "port 445"
+            re.compile(r'\b([0-9]{1,5})/(?:tcp|udp)\b'),  # nmap "445/tcp"
+            re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}:([0-9]{1,5})\b'),  # IP:port
+        ]
+
+    def add_document(self, doc_key: str, content_blocks: Iterable[ContentBlock], title: str = "") -> bool:
+        """
+        Add or update one document in the index.
+
+        Documents whose content hasn't changed since they were last
+        indexed are skipped, so re-running a batch only pays for new work.
+        The blocks are walked twice (hash, then insert) and streamed into
+        the index in batches, so a SpillBuffer is never loaded as a whole.
+        Empty lines and page separator lines aren't indexed.
+
+        Args:
+            doc_key: Unique key for the document (usually its path)
+            content_blocks: Classified blocks for the document (a list or
+                            any other re-iterable, e.g. a SpillBuffer)
+            title: Optional document title
+
+        Returns:
+            True if the document was (re)indexed, False if it was unchanged
+        """
+        content_hash, block_count, indexed_count = self._hash_blocks(content_blocks)
+
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT id, content_hash FROM documents WHERE doc_key = ?", (doc_key,)
+            ).fetchone()
+            if row and row["content_hash"] == content_hash:
+                return False
+            if row:
+                self._delete_rows(row["id"])
+                self.connection.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+
+            # The document's blocks get consecutive rowids after the current last one
+            last_row = self.connection.execute(
+                "SELECT rowid FROM blocks ORDER BY rowid DESC LIMIT 1"
+            ).fetchone()
+            first_block = (last_row[0] if last_row else 0) + 1
+            last_block = first_block + indexed_count - 1
+
+            doc_id = self.connection.execute(
+                "INSERT INTO documents (doc_key, title, content_hash, block_count, indexed_at, "
+                "first_block, last_block) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_key, title, content_hash, block_count, time.time(), first_block, last_block)
+            ).lastrowid
+
+            self._insert_blocks(doc_id, first_block, content_blocks)
+        return True
+
+    def is_indexed(self, block: ContentBlock) -> bool:
+        """Whether a block goes into the index (not empty, not a page separator)."""
+        return block.content_type != "empty" and not block.page_marker
+
+    def _insert_blocks(self, doc_id: int, first_block: int, content_blocks: Iterable[ContentBlock]):
+        """Insert the indexed blocks and their entities, INSERT_BATCH_SIZE blocks at a time."""
+        indexed_blocks = (block for block in content_blocks if self.is_indexed(block))
+        rowid = first_block
+
+        while True:
+            batch = list(islice(indexed_blocks, INSERT_BATCH_SIZE))
+            if not batch:
+                break
+            self.connection.executemany(
+                "INSERT INTO blocks (rowid, text, content_type, doc_id, page_number, line_number) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((block_rowid, block.text, block.content_type, doc_id, block.page_number, block.line_number)
+                 for block_rowid, block in enumerate(batch, rowid))
+            )
+            self.connection.executemany(
+                "INSERT INTO entities (doc_id, kind, value, page_number, line_number) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((doc_id, kind, value, block.page_number, block.line_number)
+                 for block in batch
+                 for kind, value in self.extract_entities(block))
+            )
+            rowid += len(batch)
+
+    def _hash_blocks(self, content_blocks: Iterable[ContentBlock]) -> Tuple[str, int, int]:
+        """
+        Hash the block texts and types to detect unchanged documents.
+
+        Returns:
+            (hash, number of blocks, number of blocks that get indexed)
+        """
+        digest = hashlib.sha256()
+        block_count = 0
+        indexed_count = 0
+        for block in content_blocks:
+            digest.update(block.content_type.encode("utf-8"))
+            digest.update(b"\0")
+            digest.update(block.text.encode("utf-8"))
+            digest.update(b"\n")
+            block_count += 1
+            indexed_count += self.is_indexed(block)
+        return digest.hexdigest(), block_count, indexed_count
+
+    def _delete_rows(self, doc_id: int):
+        """Remove the indexed blocks and entities of one document."""
+        block_range = self.connection.execute(
+            "SELECT first_block, last_block FROM documents WHERE id = ?", (doc_id,)
+        ).fetchone()
+        if block_range:
+            self.connection.execute("DELETE FROM blocks WHERE rowid BETWEEN ? AND ?",
+                                    (block_range["first_block"], block_range["last_block"]))
+        self.connection.execute("DELETE FROM entities WHERE doc_id = ?", (doc_id,))
+
+    def remove_document(self, doc_key: str) -> bool:
+        """Remove a document from the index. Returns True if it was there."""
+        with self.connection:
+            row = self.connection.execute(
+                "SELECT id FROM documents WHERE doc_key = ?", (doc_key,)
+            ).fetchone()
+            if not row:
+                return False
+            self._delete_rows(row["id"])
+            self.connection.execute("DELETE FROM documents WHERE id = ?", (row["id"],))
+        return True
+
+    def extract_entities(self, block: ContentBlock) -> Iterator[Tuple[str, str]]:
+        """
+        Pull searchable entities out of a content block.
+
+        Args:
+            block: Classified content block
+
+        Yields:
+            (kind, value) pairs, e.g. ("command", "hashcat") or ("port", "445")
+        """
+        text = block.text.strip()
+        if not text:
+            return
+
+        if block.content_type == "command":
+            tool = self._command_tool(text)
+            if tool:
+                yield "command", tool
+        elif block.content_type == "heading":
+            yield "heading", text.lstrip("#").strip().lower()
+
+        for match in self.url_regex.finditer(text):
+            yield "url", match.group(0)
+        for match in self.ip_regex.finditer(text):
+            yield "ip", match.group(0)
+        for port_regex in self.port_regexes:
+            for match in port_regex.finditer(text):
+                yield "port", match.group(1)
+        if block.content_type in ("path", "command", "code"):
+            for match in self.path_regex.finditer(text):
+                yield "path", match.group(0)
+
+    def _command_tool(self, text: str) -> str:
+        """Get the tool name from a command line (skipping prompts and sudo)."""
+        tokens = text.lstrip("$#").split()
+        while tokens and tokens[0] in ("sudo", "!"):
+            tokens = tokens[1:]
+        if not tokens:
+            return ""
+        return tokens[0].rsplit("/", 1)[-1].lower()
+
+    def search(self, query: str, content_type: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        Full-text search over all indexed blocks.
+
+        Every word in the query must appear in the block, e.g.
+        search("smb null session").
+
+        Args:
+            query: Words to search for
+            content_type: Optional block type filter ("command", "text", ...)
+            limit: Maximum number of hits
+
+        Returns:
+            List of hits with document key, page, line, type and text
+        """
+        match_expression = self._build_match_expression(query)
+        if not match_expression:
+            return []
+
+        sql = ("SELECT d.doc_key, d.title, b.page_number, b.line_number, b.content_type, b.text "
+               "FROM blocks b JOIN documents d ON d.id = b.doc_id "
+               "WHERE blocks MATCH ?")
+        params = [match_expression]
+        if content_type:
+            sql += " AND b.content_type = ?"
+            params.append(content_type)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(limit)
+
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def _build_match_expression(self, query: str) -> str:
+        """Quote each query word so FTS5 syntax characters are taken literally."""
+        words = query.split()
+        return " ".join('"' + word.replace('"', '""') + '"' for word in words)
+
+    def find_entities(self, kind: str, value: Optional[str] = None, limit: int = 1000) -> List[Dict]:
+        """
+        Look up exact entities, e.g. find_entities("port", "445").
+
+        Args:
+            kind: One of ENTITY_KINDS
+            value: Exact value to look for (None lists every value of the kind)
+            limit: Maximum number of hits
+
+        Returns:
+            List of hits with document key, page, line and value
+        """
+        if kind not in ENTITY_KINDS:
+            raise ValueError(f"Unknown entity kind: {kind}")
+
+        sql = ("SELECT d.doc_key, d.title, e.page_number, e.line_number, e.kind, e.value "
+               "FROM entities e JOIN documents d ON d.id = e.doc_id WHERE e.kind = ?")
+        params = [kind]
+        if value is not None:
+            sql += " AND e.value = ?"
+            params.append(value.lower() if kind in ("command", "heading") else value)
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def find_commands(self, tool: str) -> List[Dict]:
+        """Find every command line that runs a tool, e.g. "hashcat"."""
+        return self.find_entities("command", tool)
+
+    def find_documents_mentioning(self, kind: str, value: str) -> List[str]:
+        """List the documents containing an entity, e.g. port 445."""
+        return sorted({hit["doc_key"] for hit in self.find_entities(kind, value)})
+
+    def indexed_documents(self) -> Iterable[str]:
+        """Keys of all indexed documents."""
+        return [row["doc_key"] for row in self.connection.execute("SELECT doc_key FROM documents")]
+
+    def get_statistics(self) -> Dict:
+        """Get index size statistics."""
+        counts = self.connection.execute(
+            "SELECT (SELECT COUNT(*) FROM documents) AS documents, "
+            "(SELECT COUNT(*) FROM blocks) AS blocks, "
+            "(SELECT COUNT(*) FROM entities) AS entities"
+        ).fetchone()
+        return dict(counts)
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
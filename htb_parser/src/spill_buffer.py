@@ -0,0 +1,346 @@
+# src/spill_buffer.py
+import json
+import os
+import shutil
+import sys
+import tempfile
+import weakref
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from src.content_analyzer import ContentBlock
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows - peak RSS is then reported as None
+    resource = None
+
+
+# Rough memory cost of a ContentBlock on top of its text
+# (the dataclass instance, its metadata dict and the list slot)
+BLOCK_OVERHEAD_BYTES = 400
+
+# Rough memory cost of a (page number, text) pair on top of the text
+PAGE_OVERHEAD_BYTES = 100
+
+# Characters read at a time when spooled text is streamed back
+TEXT_CHUNK_SIZE = 1024 * 1024
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def estimate_block_size(block: ContentBlock) -> int:
+    """Approximate bytes a block keeps alive in memory."""
+    return sys.getsizeof(block.text) + BLOCK_OVERHEAD_BYTES
+
+
+def utf8_length(text: str) -> int:
+    """Size of a string once written as UTF-8."""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class MemoryBudget:
+    """
+    Bytes of spillable data one conversion may keep in memory.
+
+    This is like one shelf shared by several people: when the shelf is
+    full, whoever has the most on it boxes their papers up first. The
+    buffers of a conversion (blocks, page texts, the markdown body)
+    register with the same budget, so together they stay within it.
+    """
+
+    def __init__(self, limit: int):
+        """
+        Args:
+            limit: Bytes the registered buffers may hold in memory together
+        """
+        self.limit = limit
+        self.in_use = 0
+        self.peak = 0
+        self.holders = weakref.WeakSet()
+
+    def register(self, holder):
+        """Add a buffer with memory_bytes and spill() to the budget."""
+        self.holders.add(holder)
+
+    def add(self, size: int):
+        """Account for new data in memory, spilling the biggest holders if over the limit."""
+        self.in_use += size
+        self.peak = max(self.peak, self.in_use)
+        while self.in_use > self.limit:
+            holder = max(self.holders, key=lambda candidate: candidate.memory_bytes, default=None)
+            if holder is None or holder.memory_bytes == 0:
+                break
+            holder.spill()
+
+    def release(self, size: int):
+        """Account for data that left memory (spilled or dropped)."""
+        self.in_use -= size
+
+    def get_statistics(self) -> Dict:
+        """Report the limit and the most the buffers held at once."""
+        return {
+            "memory_budget": self.limit,
+            "buffered_bytes": self.in_use,
+            "peak_buffered_bytes": self.peak
+        }
+
+
+def as_memory_budget(memory_budget: Union[int, MemoryBudget]) -> MemoryBudget:
+    """Use a shared MemoryBudget as it is, or give a byte count its own."""
+    if isinstance(memory_budget, MemoryBudget):
+        return memory_budget
+    return MemoryBudget(memory_budget)
+
+
+class SpillBuffer:
+    """
+    An append-only sequence of content blocks with a memory budget.
+
+    This is like a desk with limited space: once the pile of papers
+    gets too high it is boxed up and carried to the storeroom. Blocks
+    over the budget are written to temporary segment files and read
+    back in order whenever the buffer is iterated, so a giant document
+    can be rendered without holding every block in RAM.
+    """
+
+    # Used in the statistics keys ("blocks", "spilled_blocks")
+    item_name = "blocks"
+
+    def __init__(self, memory_budget: Union[int, MemoryBudget], spill_dir: Optional[str] = None):
+        """
+        Initialize the buffer.
+
+        Args:
+            memory_budget: Bytes kept in memory before spilling, or a
+                           MemoryBudget shared with other buffers
+            spill_dir: Directory for segment files (default: system temp dir)
+        """
+        self.budget = as_memory_budget(memory_budget)
+        self.budget.register(self)
+        self.spill_dir = spill_dir
+
+        self.items: List = []
+        self.memory_bytes = 0
+        self.segment_paths: List[str] = []
+        self.segment_dir = None
+        self._cleanup = None
+
+        # Statistics tracking
+        self.item_count = 0
+        self.spilled_items = 0
+        self.spilled_bytes = 0
+
+    def _item_size(self, block: ContentBlock) -> int:
+        """Approximate bytes one item keeps alive in memory."""
+        return estimate_block_size(block)
+
+    def _encode(self, block: ContentBlock) -> str:
+        """One JSON line for an item in a segment file."""
+        return json.dumps([block.text, block.content_type, block.confidence,
+                           block.metadata, block.page_number, block.line_number, block.page_marker],
+                          ensure_ascii=False)
+
+    def _decode(self, line: str) -> ContentBlock:
+        """Turn a segment file line back into an item."""
+        text, content_type, confidence, metadata, page_number, line_number, page_marker = json.loads(line)
+        return ContentBlock(text, content_type, confidence, metadata, page_number, line_number, page_marker)
+
+    def append(self, item):
+        """Add one item, spilling if the budget is exceeded."""
+        size = self._item_size(item)
+        self.items.append(item)
+        self.item_count += 1
+        self.memory_bytes += size
+        self.budget.add(size)
+
+    def extend(self, items: Iterable):
+        """Add a stream of items."""
+        for item in items:
+            self.append(item)
+
+    def spill(self):
+        """Write the in-memory items to a new segment file."""
+        if self.segment_dir is None:
+            self.segment_dir = tempfile.mkdtemp(prefix="htb_spill_", dir=self.spill_dir)
+            # Remove the segments even if close() is never called
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self.segment_dir, True)
+
+        segment_path = os.path.join(self.segment_dir, f"segment_{len(self.segment_paths):05d}.jsonl")
+        with open(segment_path, 'w', encoding='utf-8') as f:
+            for item in self.items:
+                f.write(self._encode(item))
+                f.write("\n")
+
+        self.segment_paths.append(segment_path)
+        self.spilled_items += len(self.items)
+        self.spilled_bytes += os.path.getsize(segment_path)
+        self._drop_memory()
+
+    def _drop_memory(self):
+        """Forget the in-memory items and give their bytes back to the budget."""
+        self.budget.release(self.memory_bytes)
+        self.items = []
+        self.memory_bytes = 0
+
+    def __iter__(self) -> Iterator:
+        """Stream every item in order: spilled segments first, then memory."""
+        for segment_path in self.segment_paths:
+            with open(segment_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield self._decode(line)
+        yield from self.items
+
+    def __len__(self) -> int:
+        return self.item_count
+
+    def get_statistics(self) -> Dict:
+        """Report how much was kept in memory and how much was spilled."""
+        return {
+            self.item_name: self.item_count,
+            "memory_budget": self.budget.limit,
+            "memory_bytes": self.memory_bytes,
+            "segments": len(self.segment_paths),
+            f"spilled_{self.item_name}": self.spilled_items,
+            "spilled_bytes": self.spilled_bytes
+        }
+
+    def close(self):
+        """Drop the in-memory items and delete the segment files."""
+        self._drop_memory()
+        self.segment_paths = []
+        if self._cleanup:
+            self._cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class PageTextBuffer(SpillBuffer):
+    """A SpillBuffer of (page number, page text) pairs."""
+
+    item_name = "pages"
+
+    def _item_size(self, page: Tuple[int, str]) -> int:
+        return sys.getsizeof(page[1]) + PAGE_OVERHEAD_BYTES
+
+    def _encode(self, page: Tuple[int, str]) -> str:
+        return json.dumps(list(page), ensure_ascii=False)
+
+    def _decode(self, line: str) -> Tuple[int, str]:
+        page_number, text = json.loads(line)
+        return page_number, text
+
+
+class TextSpool:
+    """
+    A long text written piece by piece, e.g. a markdown body.
+
+    Works like SpillBuffer for one big string: the pieces stay in
+    memory until the budget is exceeded, then everything moves to a
+    temporary file and later pieces are appended to it. A short head
+    (e.g. title and table of contents, known only at the end) can be
+    set to come before the spooled text.
+    """
+
+    def __init__(self, memory_budget: Union[int, MemoryBudget], spill_dir: Optional[str] = None):
+        """
+        Args:
+            memory_budget: Bytes kept in memory before spilling, or a
+                           MemoryBudget shared with other buffers
+            spill_dir: Directory for the spool file (default: system temp dir)
+        """
+        self.budget = as_memory_budget(memory_budget)
+        self.budget.register(self)
+        self.spill_dir = spill_dir
+
+        self.head = ""
+        self.chunks: List[str] = []
+        self.memory_bytes = 0
+        self.file = None
+
+        # Statistics tracking
+        self.total_bytes = 0
+        self.spilled_bytes = 0
+
+    def write(self, text: str):
+        """Append text (file-like, so a MarkdownBodySink can write to it)."""
+        size = utf8_length(text)
+        self.total_bytes += size
+        if self.file is not None:
+            self.file.write(text)
+            self.spilled_bytes += size
+            return
+        self.chunks.append(text)
+        self.memory_bytes += size
+        self.budget.add(size)
+
+    def spill(self):
+        """Move the in-memory text to the spool file; later writes go there too."""
+        if self.file is None:
+            self.file = tempfile.TemporaryFile('w+', encoding='utf-8', dir=self.spill_dir)
+        for chunk in self.chunks:
+            self.file.write(chunk)
+        self.spilled_bytes += self.memory_bytes
+        self.budget.release(self.memory_bytes)
+        self.chunks = []
+        self.memory_bytes = 0
+
+    def set_head(self, head: str):
+        """Text that comes before everything written (not counted as spooled)."""
+        self.head = head
+
+    def iter_chunks(self, chunk_size: int = TEXT_CHUNK_SIZE) -> Iterator[str]:
+        """Stream the head and the text back in order."""
+        if self.head:
+            yield self.head
+        if self.file is None:
+            yield from self.chunks
+            return
+        self.file.flush()
+        self.file.seek(0)
+        yield from iter(lambda: self.file.read(chunk_size), "")
+        self.file.seek(0, os.SEEK_END)
+
+    def read(self) -> str:
+        """The whole text as one string (only for texts that fit in memory)."""
+        return "".join(self.iter_chunks())
+
+    def copy_to(self, output):
+        """Write the whole text to an open text file, chunk by chunk."""
+        for chunk in self.iter_chunks():
+            output.write(chunk)
+
+    def get_statistics(self) -> Dict:
+        """Report the text size and how much of it went to disk."""
+        return {
+            "bytes": self.total_bytes,
+            "memory_bytes": self.memory_bytes,
+            "spilled_bytes": self.spilled_bytes
+        }
+
+    def close(self):
+        """Drop the text and delete the spool file."""
+        self.budget.release(self.memory_bytes)
+        self.chunks = []
+        self.memory_bytes = 0
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
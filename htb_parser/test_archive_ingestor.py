@@ -0,0 +1,96 @@
+import os
+import tarfile
+import tempfile
+import zipfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src import archive_ingestor
+from src.archive_ingestor import ArchiveIngestor, markdown_member_name, unique_output_name
+
+_convert_pdf_bytes = archive_ingestor.convert_pdf_bytes
+
+def _pdf_bytes(text: str) -> bytes:
+    """Build a one-page PDF in memory."""
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), text)
+    data = document.tobytes()
+    document.close()
+    return data
+
+def _crash_on_kill(member_name: str, pdf_data: bytes, *options):
+    """Conversion that takes its worker process down for "kill.pdf"."""
+    if member_name == "kill.pdf":
+        os._exit(1)
+    return _convert_pdf_bytes(member_name, pdf_data, *options)
+
+def test_archive_ingestion():
+    """Test converting PDFs from a zip archive into an output zip."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path = Path(temp_dir) / "writeups.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            archive.writestr("meow.pdf", _pdf_bytes("nmap -sV 10.129.1.17"))
+            archive.writestr("tier0/fawn.pdf", _pdf_bytes("ENUMERATION"))
+            archive.writestr("./meow.pdf", _pdf_bytes("gobuster dir"))
+            archive.writestr("readme.txt", "not a pdf")
+
+        output_path = Path(temp_dir) / "markdown.zip"
+        ingestor = ArchiveIngestor(max_workers=2, use_processes=False)
+        summary = ingestor.process_archive(str(archive_path), str(output_path))
+
+        assert summary["processed_successfully"] == 3
+        with zipfile.ZipFile(output_path) as archive:
+            names = sorted(archive.namelist())
+            assert names == ["meow-2.md", "meow.md", "tier0/fawn.md"]
+            assert "nmap -sV" in archive.read("meow.md").decode("utf-8")
+            assert "gobuster" in archive.read("meow-2.md").decode("utf-8")
+        print(f"✅ Archive converted without overwriting duplicates: {names}")
+
+        # With a memory budget the markdown travels as a temporary file
+        tar_path = Path(temp_dir) / "markdown.tar.gz"
+        ingestor = ArchiveIngestor(max_workers=2, use_processes=False, memory_budget=1024)
+        summary = ingestor.process_archive(str(archive_path), str(tar_path))
+        assert summary["processed_successfully"] == 3
+        with tarfile.open(tar_path) as archive, zipfile.ZipFile(output_path) as expected:
+            for name in names:
+                assert archive.extractfile(name).read() == expected.read(name)
+        assert not list(Path(tempfile.gettempdir()).glob("htb_archive_*.md"))
+
+    # Member names can't escape the output directory
+    assert markdown_member_name("../../etc/passwd.pdf") == "etc/passwd.md"
+    assert markdown_member_name("/abs/box.pdf") == "abs/box.md"
+    used = {"tier0/fawn.md"}
+    assert unique_output_name("tier0/Fawn.md", used) == "tier0/Fawn-2.md"
+
+def test_archive_worker_crash(monkeypatch):
+    """A worker process dying fails only its own member, not its bystanders."""
+
+    monkeypatch.setattr(archive_ingestor, "convert_pdf_bytes", _crash_on_kill)
+    bystanders = ["meow.pdf", "fawn.pdf", "dancing.pdf", "redeemer.pdf", "explosion.pdf", "./meow.pdf"]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path = Path(temp_dir) / "writeups.zip"
+        with zipfile.ZipFile(archive_path, "w") as archive:
+            for name in bystanders[:3] + ["kill.pdf"] + bystanders[3:]:
+                archive.writestr(name, _pdf_bytes(name.replace("./", "copy of ")))
+
+        ingestor = ArchiveIngestor(max_workers=2, use_processes=True)
+        summary = ingestor.process_archive(str(archive_path), str(Path(temp_dir) / "out"))
+
+        results = {result["input_file"]: result for result in summary["results"]}
+        assert sorted(results) == sorted(bystanders + ["kill.pdf"])
+        assert results["kill.pdf"]["error"] == "Worker process crashed"
+        for name in bystanders:
+            assert results[name]["success"], results[name]
+        assert summary["failed"] == 1
+
+        # Colliding names are given out in archive order, not completion order
+        assert results["meow.pdf"]["output_file"].endswith("meow.md")
+        assert results["./meow.pdf"]["output_file"].endswith("meow-2.md")
+        assert "copy of meow" in Path(results["./meow.pdf"]["output_file"]).read_text(encoding="utf-8")
+        print(f"✅ Worker crash failed only its member: {summary['failed']} of {summary['total_files']}")
+
+if __name__ == "__main__":
+    test_archive_ingestion()
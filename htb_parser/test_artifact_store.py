@@ -0,0 +1,144 @@
+import os
+import tempfile
+from pathlib import Path
+
+from src.artifact_store import ArtifactStore, FileArtifactStore, SegmentArtifactStore, zstandard
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+from test_pipeline import PAGES, _make_pdf
+
+def test_segment_store_round_trip():
+    """Converted documents are stored compressed and read back in one read."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        store_dir = str(Path(temp_dir) / "artifacts")
+
+        with SegmentArtifactStore(store_dir, batch_bytes=1024 * 1024) as store:
+            pipeline = ConversionPipeline(artifact_store=store)
+            with PDFProcessor() as processor:
+                assert processor.load_pdf(str(pdf_path))
+                result = pipeline.convert(processor)
+            # Nothing is written until the batch is full or the store is flushed
+            assert store.pending and store.batches_written == 0
+        assert store.batches_written == 1
+
+        for use_mmap in [False, True]:
+            with SegmentArtifactStore(store_dir, use_mmap=use_mmap) as store:
+                assert store.documents() == [str(pdf_path)]
+                cached = ConversionPipeline(artifact_store=store).load_from_store(str(pdf_path))
+                assert cached["markdown"] == result["markdown"]
+                assert [(b.text, b.content_type, b.page_number) for b in cached["content_blocks"]] == \
+                    [(b.text, b.content_type, b.page_number) for b in result["content_blocks"]]
+                assert [text.strip() for _, text in cached["page_texts"]] == PAGES
+                assert store.reads == 1
+                stats = store.get_statistics()
+        assert stats["codec"] == ("zstd" if zstandard else "zlib")
+        block_pages = {block.page_number for block in result["content_blocks"]}
+        # Markdown and manifest, then page texts and blocks
+        assert stats["artifacts"] == 2 + len(PAGES) + len(block_pages)
+        print(f"✅ Document stored and read back with one read: {stats}")
+
+        # Replacing an artifact appends; single pages are random access
+        with SegmentArtifactStore(store_dir, codec="zlib") as store:
+            store.put(str(pdf_path), "page_text", b"replaced", page=3)
+            assert store.get(str(pdf_path), "page_text", page=3) == b"replaced"
+            store.flush()
+            assert store.get(str(pdf_path), "page_text", page=3) == b"replaced"
+            assert store.get(str(pdf_path), "page_text", page=2).decode("utf-8").strip() == PAGES[1]
+            assert store.get(str(pdf_path), "page_text", page=99) is None
+            assert store.get_statistics()["garbage_bytes"] > 0
+        print("✅ Random access by page and append-only replacement work")
+
+def test_reconversion_replaces_artifacts():
+    """A new conversion replaces the stored document; a changed PDF is not served from the store."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        doc_key = str(pdf_path)
+
+        for store in [SegmentArtifactStore(str(Path(temp_dir) / "segments"), batch_bytes=64),
+                      FileArtifactStore(str(Path(temp_dir) / "files"), codec="zlib")]:
+            with store:
+                # The spooled markdown is stored chunk by chunk
+                pipeline = ConversionPipeline(artifact_store=store, memory_budget=128)
+                with PDFProcessor() as processor:
+                    assert processor.load_pdf(doc_key)
+                    full = pipeline.convert(processor)
+                    pipeline.close_result(full)
+                    partial = pipeline.convert_to_file(processor, str(Path(temp_dir) / "meow.md"),
+                                                       start_page=1, end_page=3)
+
+                cached = pipeline.load_from_store(doc_key)
+                assert cached["markdown"] == Path(partial["output_path"]).read_text(encoding="utf-8")
+                assert [page for page, _ in cached["page_texts"]] == [1, 2]
+                assert {block.page_number for block in cached["content_blocks"]} - {None} == {2, 3}
+                assert (cached["manifest"]["start_page"], cached["manifest"]["end_page"]) == (1, 3)
+
+                # A PDF that changed since it was converted isn't served from the store
+                stat = pdf_path.stat()
+                os.utime(pdf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+                assert pipeline.load_from_store(doc_key) is None
+                os.utime(pdf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+                store.delete_document(doc_key)
+                assert pipeline.load_from_store(doc_key) is None and store.documents() == []
+        print("✅ Re-converting replaces stored pages and stale entries are detected")
+
+def test_compaction_drops_garbage():
+    """compact() keeps only the live artifacts of re-converted documents."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        store_dir = Path(temp_dir) / "segments"
+        with SegmentArtifactStore(str(store_dir), batch_bytes=64, max_segment_bytes=512) as store:
+            pipeline = ConversionPipeline(artifact_store=store)
+            with PDFProcessor() as processor:
+                assert processor.load_pdf(str(pdf_path))
+                for _ in range(3):
+                    expected = pipeline.convert(processor)["markdown"]
+            store.put("other.pdf", "markdown", b"# Other")
+            store.delete_document("gone.pdf")
+
+            before = store.get_statistics()
+            assert before["garbage_bytes"] > 0
+            report = store.compact()
+            after = store.get_statistics()
+            assert report["bytes_reclaimed"] == before["garbage_bytes"]
+            assert after["garbage_bytes"] == 0 and after["stored_bytes"] == before["stored_bytes"]
+            assert after["segments"] < before["segments"]
+            assert pipeline.load_from_store(str(pdf_path))["markdown"] == expected
+
+            # Nothing to do the second time; new writes go after the compacted data
+            assert store.compact() == {"segments_rewritten": 0, "bytes_reclaimed": 0}
+            store.put("other.pdf", "markdown", b"# Other again")
+        with SegmentArtifactStore(str(store_dir)) as store:
+            assert store.get("other.pdf", "markdown") == b"# Other again"
+            assert ConversionPipeline(artifact_store=store).load_from_store(str(pdf_path))["markdown"] == expected
+        print(f"✅ Compaction reclaimed {report['bytes_reclaimed']} bytes from {report['segments_rewritten']} segments")
+
+def test_file_store_has_same_interface():
+    """The one-file-per-artifact store behaves like the segment store."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with FileArtifactStore(temp_dir, codec="zlib") as store:
+            store.put("meow.pdf", "markdown", b"# Meow")
+            for page in [2, 1]:
+                store.put("meow.pdf", "page_text", f"page {page}".encode("utf-8"), page)
+            store.put_chunks("meow.pdf", "notes", [b"one ", b"two"])
+            assert store.get("meow.pdf", "markdown") == b"# Meow"
+            assert store.get("meow.pdf", "notes") == b"one two"
+            assert list(store.iter_pages("meow.pdf", "page_text")) == [(1, b"page 1"), (2, b"page 2")]
+            assert store.documents() == ["meow.pdf"]
+
+    try:
+        ArtifactStore()
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
+    print("✅ File store round trip works")
+
+if __name__ == "__main__":
+    test_segment_store_round_trip()
+    test_reconversion_replaces_artifacts()
+    test_file_store_has_same_interface()
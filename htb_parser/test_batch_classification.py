@@ -0,0 +1,48 @@
+import time
+
+from classification_corpus import corpus_lines
+from src.content_analyzer import ContentAnalyzer
+
+def test_batch_matches_single_line():
+    """classify_lines() must agree with classify_line() on every line."""
+
+    analyzer = ContentAnalyzer()
+    lines = corpus_lines()
+
+    start = time.perf_counter()
+    expected = [analyzer.classify_line(line) for line in lines]
+    single_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = analyzer.classify_lines(lines)
+    batch_time = time.perf_counter() - start
+
+    for line, want, got in zip(lines, expected, actual):
+        assert (got.text, got.content_type, got.confidence, got.metadata) == \
+               (want.text, want.content_type, want.confidence, want.metadata), line
+
+    print(f"✅ {len(lines)} lines classified identically")
+    print(f"   Per line: {single_time:.3f}s, batch: {batch_time:.3f}s "
+          f"({single_time / batch_time:.1f}x faster)")
+
+def test_page_markers_are_exact():
+    """Only the separators PDFProcessor writes start a page, not text that looks like one."""
+
+    analyzer = ContentAnalyzer()
+    text = "--- Page 1 ---\nintro\n  --- Page 7 ---\nsee --- Page 8 --- below\n--- Page 9 --- notes\n--- Page 2 ---\nnmap -sV 10.10.10.1"
+    blocks = analyzer.analyze_text(text)
+    assert [(b.page_number, b.line_number, b.page_marker) for b in blocks] == \
+        [(1, 0, True), (1, 0, False), (1, 1, False), (1, 2, False), (1, 3, False), (2, 0, True), (2, 0, False)]
+
+    # In a chunk stream only the separator chunks start pages
+    chunks = ["\n--- Page 1 ---\n", "intro\n--- Page 7 ---", "\n--- Page 2 ---\n", "nmap -sV 10.10.10.1"]
+    typed = list(analyzer.iter_line_types(chunks))
+    assert [(page, line, marker) for _, _, page, line, marker in typed if not marker] == \
+        [(1, 0, False), (1, 1, False), (2, 0, False)]
+    assert [(b.text, b.content_type, b.page_number, b.line_number, b.page_marker)
+            for b in analyzer.iter_analyze_chunks(chunks)] == typed
+    print("✅ Page markers only at exact separators")
+
+if __name__ == "__main__":
+    test_batch_matches_single_line()
+    test_page_markers_are_exact()
@@ -0,0 +1,165 @@
+import os
+import socket
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+import src.batch_converter as batch_converter
+import src.job_journal as job_journal
+from src.batch_converter import BatchConverter
+from src.job_journal import JobJournal
+
+def _make_pdf(path: Path, pages: int):
+    """Create a small multi-page PDF."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = fitz.open()
+    for page_number in range(pages):
+        page = document.new_page()
+        page.insert_text((72, 72), f"ENUMERATION {page_number + 1}\nnmap -sV 10.129.1.{page_number}")
+    document.save(path)
+    document.close()
+
+_convert_job = batch_converter.convert_job
+
+def _crash_on_kill(journal, job, *options):
+    """Conversion that takes its worker process down for "kill.pdf"."""
+    if job["input_path"].endswith("kill.pdf"):
+        os._exit(1)
+    return _convert_job(journal, job, *options)
+
+def test_resumable_batch():
+    """A batch interrupted halfway resumes without redoing finished documents."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = Path(temp_dir) / "pdfs"
+        output_dir = Path(temp_dir) / "markdown"
+        journal_path = str(Path(temp_dir) / "jobs.sqlite3")
+        for name, pages in [("meow.pdf", 2), ("tier0/fawn.pdf", 3), ("dancing.pdf", 1)]:
+            _make_pdf(input_dir / name, pages)
+        (input_dir / "broken.pdf").write_bytes(b"not a pdf")
+
+        converter = BatchConverter(journal_path, max_workers=2)
+        assert converter.enqueue_directory(str(input_dir), str(output_dir)) == {"queued": 4, "skipped": 0}
+
+        # Simulate a run that died: one document finished, one was being
+        # converted by a worker process that no longer exists
+        with JobJournal(journal_path) as journal:
+            first = journal.claim_job()
+            assert first["input_path"].endswith("broken.pdf")
+            journal.fail_job(first["id"], "Failed to load PDF", 0.0)
+            # No process can have a pid above the kernel's maximum of 2**22
+            stuck = journal.claim_job(f"{socket.gethostname()}:{2 ** 22 + 1}")
+            journal.record_page(stuck["id"], 1, 3, 0.1)
+
+        summary = converter.run()
+        assert summary["recovered"] == 1 and len(summary["workers"]) == 3
+        assert summary["converted"] == 3 and summary["failed"] == 0
+        assert summary["journal"]["done"] == 3 and summary["journal"]["failed"] == 1
+        print(f"✅ Interrupted batch resumed: {summary['journal']}")
+
+        with JobJournal(journal_path) as journal:
+            fawn = journal.get_job(str(input_dir / "tier0/fawn.pdf"))
+            assert fawn["page_count"] == 3 and len(fawn["output_hash"]) == 64
+            assert [page["page_number"] for page in journal.pages(fawn["id"])] == [1, 2, 3]
+            assert "nmap -sV" in Path(fawn["output_path"]).read_text(encoding="utf-8")
+            finished_at = fawn["finished_at"]
+        assert not list(output_dir.rglob("*.partial"))
+        print(f"✅ Per-page progress and output hash recorded for {fawn['output_path']}")
+
+        # Running again does nothing; a changed PDF is converted again
+        summary = converter.process_directory(str(input_dir), str(output_dir))
+        assert summary["queued"] == 0 and summary["skipped"] == 4 and summary["converted"] == 0
+        _make_pdf(input_dir / "dancing.pdf", 2)
+        summary = converter.process_directory(str(input_dir), str(output_dir))
+        assert summary["queued"] == 1 and summary["converted"] == 1
+        with JobJournal(journal_path) as journal:
+            assert journal.get_job(str(input_dir / "tier0/fawn.pdf"))["finished_at"] == finished_at
+        print("✅ Finished documents are never converted twice")
+
+def test_journal_claims_are_exclusive():
+    """Workers sharing a journal never claim the same document."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal_path = str(Path(temp_dir) / "jobs.sqlite3")
+        for index in range(5):
+            pdf_path = Path(temp_dir) / f"box{index}.pdf"
+            pdf_path.write_bytes(b"%PDF-1.4")
+            with JobJournal(journal_path) as journal:
+                journal.add_job(str(pdf_path), str(pdf_path.with_suffix(".md")))
+
+        with JobJournal(journal_path) as first, JobJournal(journal_path) as second:
+            claimed = []
+            for journal in [first, second, first, second, first, second]:
+                job = journal.claim_job()
+                if job:
+                    claimed.append(job["id"])
+            assert sorted(claimed) == [1, 2, 3, 4, 5]
+            assert first.get_statistics()["running"] == 5
+
+            # Dying in a shared pool may be another document's fault: no attempt is used up
+            first.lease_seconds = -1
+            assert first.recover_abandoned(max_attempts=1) == 5
+            stats = first.get_statistics()
+            assert stats["pending"] == 5 and stats["suspects"] == 5 and stats["failed"] == 0
+            assert first.claim_job() is None
+
+            # A document that crashes its worker while running alone is failed after max_attempts
+            for _ in range(5):
+                assert first.claim_job(suspect=True)["attempts"] == 1
+            assert first.recover_abandoned(max_attempts=1) == 5
+            assert first.get_statistics()["failed"] == 5
+        print("✅ Claims are exclusive and abandoned jobs are bounded by max_attempts")
+
+def test_reboot_does_not_use_up_attempts(monkeypatch):
+    """Jobs abandoned by a reboot are queued again without using up an attempt."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        journal_path = str(Path(temp_dir) / "jobs.sqlite3")
+        pdf_path = Path(temp_dir) / "meow.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4")
+        dead_worker = f"{socket.gethostname()}:{2 ** 22 + 1}"
+
+        with JobJournal(journal_path) as journal:
+            journal.add_job(str(pdf_path), str(pdf_path.with_suffix(".md")))
+            journal.claim_job(dead_worker)
+            journal.recover_abandoned(max_attempts=1)
+
+            # The suspect runs alone when the host goes down
+            monkeypatch.setattr(job_journal, "boot_id", lambda: "boot-1")
+            journal.claim_job(dead_worker, suspect=True)
+            monkeypatch.setattr(job_journal, "boot_id", lambda: "boot-2")
+            assert journal.recover_abandoned(max_attempts=1) == 1
+
+            job = journal.get_job(str(pdf_path))
+            assert (job["state"], job["attempts"], job["suspect"]) == ("pending", 0, 1)
+        print("✅ A reboot doesn't count against the document")
+
+def test_pool_crash_is_recovered(monkeypatch):
+    """A worker crash in the pool doesn't leave its bystanders running."""
+
+    monkeypatch.setattr(batch_converter, "convert_job", _crash_on_kill)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_dir = Path(temp_dir) / "pdfs"
+        names = ["meow.pdf", "fawn.pdf", "kill.pdf", "dancing.pdf", "redeemer.pdf"]
+        for name in names:
+            _make_pdf(input_dir / name, 2)
+        (input_dir / "kill.pdf").write_bytes(b"%PDF-1.4")
+
+        converter = BatchConverter(str(Path(temp_dir) / "jobs.sqlite3"), max_workers=2, max_attempts=1)
+        summary = converter.process_directory(str(input_dir), str(Path(temp_dir) / "markdown"))
+
+        journal = summary["journal"]
+        assert summary["worker_crashed"]
+        assert journal["running"] == 0 and journal["pending"] == 0
+        assert journal["done"] == len(names) - 1 and journal["failed"] == 1
+        assert summary["failed_files"][0][0].endswith("kill.pdf")
+        for name in names:
+            if name != "kill.pdf":
+                output = Path(temp_dir) / "markdown" / name.replace(".pdf", ".md")
+                assert output.exists() and output.with_suffix(".sections.json").exists()
+        print(f"✅ Pool crash recovered in the same run: {journal}")
+
+if __name__ == "__main__":
+    test_resumable_batch()
+    test_journal_claims_are_exclusive()
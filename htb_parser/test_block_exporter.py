@@ -0,0 +1,47 @@
+import tempfile
+from pathlib import Path
+
+from src.block_exporter import BlockExporter
+from src.content_analyzer import ContentAnalyzer
+
+def test_block_export():
+    """Test JSONL and columnar export of classified blocks."""
+
+    analyzer = ContentAnalyzer()
+    exporter = BlockExporter()
+    text = "--- Page 1 ---\nENUMERATION\nnmap -sV 10.129.1.17\n\n--- Page 2 ---\nhttp://10.129.1.17/admin"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # JSONL export consumes a generator directly
+        jsonl_path = Path(temp_dir) / "blocks.jsonl"
+        count = exporter.write_jsonl(analyzer.iter_analyze_text(text), jsonl_path, "meow.pdf")
+        records = list(exporter.read_jsonl(jsonl_path))
+        assert count == len(records) == 3
+        assert records[1]["content_type"] == "command"
+        assert records[1]["metadata"] == {"shell_type": "bash"}
+        # Page separators aren't exported, and lines count from the page's own text
+        assert not any("--- Page" in record["text"] for record in records)
+        assert (records[0]["page_number"], records[0]["line_number"]) == (1, 0)
+        assert (records[1]["page_number"], records[1]["line_number"]) == (1, 1)
+        assert (records[2]["page_number"], records[2]["line_number"]) == (2, 0)
+
+        # Same positions for the chunks PDFProcessor yields
+        chunks = ["\n--- Page 1 ---\n", "ENUMERATION\nnmap -sV 10.129.1.17\n",
+                  "\n--- Page 2 ---\n", "http://10.129.1.17/admin"]
+        chunk_records = [exporter.block_to_record(block) for block in analyzer.iter_analyze_chunks(chunks)
+                         if exporter.exports(block)]
+        assert [(record["page_number"], record["line_number"], record["text"]) for record in chunk_records] == \
+            [(record["page_number"], record["line_number"], record["text"]) for record in records]
+        print(f"✅ JSONL export: {count} records")
+
+        # Columnar export (Parquet with pyarrow, CSV otherwise)
+        columnar_path = Path(temp_dir) / "blocks.columnar"
+        written_format = exporter.write_columnar(analyzer.iter_analyze_text(text), str(columnar_path))
+        columns = exporter.read_columnar(str(columnar_path))
+        assert columns["content_type"] == [record["content_type"] for record in records]
+        assert columns["page_number"] == [record["page_number"] for record in records]
+        assert columns["metadata"][1] == {"shell_type": "bash"}
+        print(f"✅ Columnar export ({written_format}): {len(columns['text'])} rows")
+
+if __name__ == "__main__":
+    test_block_export()
@@ -0,0 +1,74 @@
+import dataclasses
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.compiled_rules import CompiledRuleSet, SharedClassifier, ThreadLocalLRUCache, shared_rules
+from src.content_analyzer import ContentAnalyzer
+from classification_corpus import corpus_lines
+
+def test_compiled_rules_match_analyzer():
+    """The frozen rule set classifies exactly like ContentAnalyzer."""
+
+    analyzer = ContentAnalyzer()
+    rules = CompiledRuleSet.from_ruleset(analyzer.ruleset)
+    lines = corpus_lines()
+
+    expected = [analyzer.classify_line(line).content_type for line in lines]
+    assert [rules.content_type(line) for line in lines] == expected
+    assert rules.content_types([line.strip() for line in lines]) == expected
+
+    # The rules can't be changed after compiling
+    try:
+        rules.command_patterns = ()
+        assert False, "rule set should be frozen"
+    except dataclasses.FrozenInstanceError:
+        pass
+    assert shared_rules() is shared_rules()
+    print(f"✅ {len(lines)} lines classified identically by the compiled rules")
+
+def test_shared_classifier_threads():
+    """One SharedClassifier serves many threads with the same results."""
+
+    analyzer = ContentAnalyzer()
+    classifier = SharedClassifier()
+    lines = corpus_lines()
+    expected = [(b.text, b.content_type, b.metadata) for b in analyzer.classify_lines(lines)]
+
+    def classify(worker: int):
+        # Alternate between the single-line and batch paths
+        if worker % 2:
+            blocks = [classifier.classify_line(line) for line in lines]
+        else:
+            blocks = classifier.classify_lines(lines)
+        # The most recent lines are still in this thread's cache
+        classifier.classify_lines(lines[-100:])
+        return [(b.text, b.content_type, b.metadata) for b in blocks], classifier.cache.get_statistics()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(classify, range(8)))
+
+    for blocks, stats in results:
+        assert blocks == expected
+        assert stats["hits"] >= 100 and stats["size"] <= classifier.cache.maxsize
+
+    # Analyzer using the shared classifier as its backend
+    assert [b.content_type for b in ContentAnalyzer(backend=classifier).classify_lines(lines)] == \
+           [content_type for _, content_type, _ in expected]
+    print(f"✅ 8 threads share one classifier: {results[0][1]}")
+
+def test_thread_local_lru_cache():
+    """Each thread has its own LRU entries."""
+
+    cache = ThreadLocalLRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # Evicts "b", the least recently used
+    assert cache.get("b") is None and cache.get("c") == 3
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(cache.get("a")))
+    thread.start()
+    thread.join()
+    assert seen == [None]
+    print("✅ Per-thread LRU eviction works")
@@ -0,0 +1,65 @@
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src.document_pool import DocumentPool
+from src.pdf_processor import PDFProcessor
+
+def _make_pdf(directory: Path, name: str, text: str) -> Path:
+    """Create a tiny one-page PDF for testing."""
+    pdf_path = directory / name
+    document = fitz.open()
+    page = document.new_page()
+    page.insert_text((72, 72), text)
+    document.save(pdf_path)
+    document.close()
+    return pdf_path
+
+def test_document_pool():
+    """Test handle reuse, LRU eviction and guaranteed release."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdfs = [_make_pdf(Path(temp_dir), f"box{i}.pdf", f"Box {i}") for i in range(3)]
+
+        with DocumentPool(max_documents=2) as pool:
+            # Repeated access to the same PDF reuses the open handle
+            with pool.open(pdfs[0]) as first:
+                pass
+            with pool.open(pdfs[0]) as second:
+                assert first is second
+            print(f"✅ Handle reused: {pool.get_statistics()}")
+
+            # Concurrent borrowers never share a handle
+            with pool.open(pdfs[0]) as pooled, pool.open(pdfs[0]) as private:
+                assert pooled is first and private is not pooled
+            assert private.is_closed and not pooled.is_closed
+            assert pool.get_statistics()["private_opens"] == 1
+            print("✅ Concurrent borrower got its own handle")
+
+            # A third document pushes out the least recently used one
+            with pool.open(pdfs[1]):
+                pass
+            with pool.open(pdfs[2]):
+                pass
+            stats = pool.get_statistics()
+            assert stats["open_documents"] == 2
+            assert stats["evictions"] == 1
+            assert first.is_closed
+            print(f"✅ LRU eviction works: {stats}")
+
+            # The processor releases its document even when an error happens
+            try:
+                with PDFProcessor(pool=pool) as processor:
+                    assert processor.load_pdf(str(pdfs[1]))
+                    raise RuntimeError("simulated failure")
+            except RuntimeError:
+                pass
+            assert processor.current_document is None
+            assert pool.get_statistics()["in_use"] == 0
+            print("✅ Document released on the error path")
+
+        assert pool.get_statistics()["open_documents"] == 0
+
+if __name__ == "__main__":
+    test_document_pool()
@@ -0,0 +1,25 @@
+from golden_harness import (FIXTURES, MIN_THROUGHPUT_RATIO, golden_paths, print_report,
+                            run_harness, throughput_ratio)
+
+def test_golden_outputs():
+    """The pipeline must reproduce the stored markdown and classifications."""
+
+    for name in FIXTURES:
+        for path in golden_paths(name).values():
+            assert path.exists(), f"Missing golden output {path} - run golden_harness.py --update"
+
+    report = run_harness()
+    print_report(report)
+
+    for name, fixture in report["fixtures"].items():
+        assert not fixture["diff"], f"{name} differs from its golden output:\n" + "\n".join(fixture["diff"])
+
+    # Throughput is only comparable with a recording from the same machine
+    # (golden_harness.py --record), so without one there is nothing to check
+    ratio = throughput_ratio(report)
+    if ratio is not None:
+        assert ratio >= MIN_THROUGHPUT_RATIO, \
+            f"Throughput dropped to {ratio:.2f}x of the last recorded run"
+
+if __name__ == "__main__":
+    test_golden_outputs()
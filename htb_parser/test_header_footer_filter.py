@@ -0,0 +1,122 @@
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src.archive_ingestor import convert_pdf_bytes
+from src.batch_converter import BatchConverter
+from src.header_footer_filter import HeaderFooterFilter
+from src.image_exporter import ImageExporter
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+from test_image_exporter import _png
+
+BODIES = [
+    "ENUMERATION\nnmap -sV 10.129.1.17\nThe scan shows one open port.",
+    "Telnet is running on port 23.\nWe try to connect to it.",
+    "FOOTHOLD\ntelnet 10.129.1.17\nThe login prompt asks for a user.",
+    "We log in as root without a password.\nThe flag is in the home folder.",
+    "PRIVILEGE ESCALATION\nNot needed on this box.",
+    "The box is done.\nSubmit the flag to finish.",
+]
+
+def _make_pdf(directory: Path, logo: bool = False) -> Path:
+    """A writeup with a running header and a page-number footer on every page (and a logo above them)."""
+    pdf_path = directory / "meow.pdf"
+    document = fitz.open()
+    for number, body in enumerate(BODIES):
+        page = document.new_page()
+        if logo:
+            page.insert_image(fitz.Rect(72, 5, 92, 25), stream=_png(16, 16, (200, 0, 0)))
+        page.insert_text((72, 40), "HACK THE BOX MEOW WRITEUP")
+        page.insert_text((72, 100), body)
+        page.insert_text((280, 800), f"Page {number + 1} of {len(BODIES)}")
+    document.save(pdf_path)
+    document.close()
+    return pdf_path
+
+def test_header_footer_filter():
+    """Running headers and footers are removed before classification."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        results = {}
+        for name, header_filter in [("plain", None), ("filtered", HeaderFooterFilter(window_size=5))]:
+            with PDFProcessor() as processor:
+                assert processor.load_pdf(str(pdf_path))
+                results[name] = ConversionPipeline(header_filter=header_filter).convert(processor)
+
+        plain, filtered = results["plain"], results["filtered"]
+        toc = lambda result: result["markdown"].split("## Table of Contents")[1].split("\n\n")[1]
+        assert "hack-the-box-meow-writeup-5" in toc(plain)
+        assert "HACK THE BOX" not in filtered["markdown"] and "Page 3 of 6" not in filtered["markdown"]
+        assert "meow-writeup" not in toc(filtered)
+        for heading in ["ENUMERATION", "FOOTHOLD", "PRIVILEGE ESCALATION"]:
+            assert heading in toc(filtered)
+        assert len(filtered["content_blocks"]) < len(plain["content_blocks"])
+        stats = filtered["headers"]
+        assert stats["lines_removed"] == 2 * len(BODIES)
+        assert stats["running_lines"] == ["hack the box meow writeup", "page # of #"]
+        print(f"✅ Headers and footers stripped: {stats}")
+
+    # Streaming: pages come out in order, each after at most window_size // 2 more are read
+    header_filter = HeaderFooterFilter(window_size=5, min_repeats=3)
+    pages_read = []
+    def page_texts():
+        for number, body in enumerate(BODIES):
+            pages_read.append(number)
+            yield number, f"CONFIDENTIAL\n{body}\n- {number + 1} -"
+    for page_number, text in header_filter.filter_pages(page_texts()):
+        assert len(pages_read) <= min(page_number + 3, len(BODIES))
+        assert text.strip() == BODIES[page_number]
+
+    # Too few pages to tell a header from content: nothing is removed
+    pages = [(0, "CONFIDENTIAL\nnmap -sV 10.129.1.17"), (1, "CONFIDENTIAL\ntelnet 10.129.1.17")]
+    assert list(HeaderFooterFilter().filter_pages(pages)) == pages
+    print("✅ Filter streams with a bounded window")
+
+def test_only_page_numbers_are_masked():
+    """Numbered headings repeat at the top of pages but are content, not headers."""
+
+    header_filter = HeaderFooterFilter()
+    assert header_filter.normalize_line("Page 3 of 12") == "page # of #"
+    assert header_filter.normalize_line("- 7 -") == "- # -"
+    assert header_filter.normalize_line("Meow Writeup | Page 2") == "meow writeup | page #"
+    assert header_filter.normalize_line("TASK 3") == "task 3"
+
+    pages = [(number, f"TASK {number + 1}\nAnswer {number}\n{number + 1}") for number in range(6)]
+    filtered = list(HeaderFooterFilter(window_size=5).filter_pages(pages))
+    assert [text for _, text in filtered] == [f"TASK {number + 1}\nAnswer {number}" for number in range(6)]
+    print("✅ Numbered headings stay, bare page numbers go")
+
+def test_headers_stripped_everywhere():
+    """An image above the header doesn't hide it; batch and archive conversions can strip headers."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir), logo=True)
+        pipeline = ConversionPipeline(header_filter=HeaderFooterFilter(window_size=5),
+                                      image_exporter=ImageExporter(str(Path(temp_dir) / "images")))
+        with PDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            result = pipeline.convert(processor)
+            # Pages leave the filter late, but the images still reuse the text's parse
+            stats = processor.get_extraction_statistics()
+        assert "HACK THE BOX" not in result["markdown"] and "Page 3 of 6" not in result["markdown"]
+        assert result["images"]["references"] == len(BODIES)
+        assert stats["textpages_built"] == len(BODIES) and stats["reparses_avoided"] == len(BODIES)
+        print("✅ Header found below an image at the top of the page")
+
+        markdown = convert_pdf_bytes("meow.pdf", pdf_path.read_bytes(), strip_headers=True)["markdown"]
+        assert "HACK THE BOX" not in markdown and "FOOTHOLD" in markdown
+
+        converter = BatchConverter(str(Path(temp_dir) / "jobs.sqlite3"), max_workers=1,
+                                   use_processes=False, strip_headers=True)
+        summary = converter.process_directory(temp_dir, str(Path(temp_dir) / "markdown"))
+        assert summary["converted"] == 1
+        assert "HACK THE BOX" not in (Path(temp_dir) / "markdown" / "meow.md").read_text(encoding="utf-8")
+        print("✅ Batch and archive conversions strip headers")
+
+if __name__ == "__main__":
+    test_header_footer_filter()
+    test_only_page_numbers_are_masked()
+    test_headers_stripped_everywhere()
@@ -0,0 +1,105 @@
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src.heading_index import HeadingIndex, github_slug
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+
+PAGES = [
+    "ENUMERATION\nnmap -sV 10.129.1.17",
+    "Web Server\nThe site runs on port 80.",
+    "ENUMERATION\ngobuster dir -u http://10.129.1.17 -w common.txt",
+    "PRIVILEGE ESCALATION\nsudo -l shows vim.",
+]
+
+def test_github_slugs():
+    """Anchors follow GitHub's rules, including numbered duplicates."""
+
+    assert github_slug("1. Port Scan (TCP)") == "1-port-scan-tcp"
+    assert github_slug("Privilege Escalation") == "privilege-escalation"
+    assert github_slug("C++ & Go") == "c--go"
+
+    index = HeadingIndex(reserved_headings=["Enumeration"])
+    slugs = [index.add_heading(text, 2).slug for text in ["Enumeration", "Enumeration", "Enumeration-1"]]
+    assert slugs == ["enumeration-1", "enumeration-2", "enumeration-1-1"]
+
+    # Nesting follows the heading levels
+    index = HeadingIndex()
+    for text, level in [("Recon", 1), ("Ports", 2), ("Web", 3), ("Foothold", 1)]:
+        index.add_heading(text, level)
+    assert [entry.parent for entry in index.entries] == [None, 0, 1, None]
+    assert index.children(None) == [0, 3]
+    print("✅ GitHub-compatible unique slugs")
+
+def test_heading_index_offsets():
+    """Section byte ranges point into the rendered markdown and survive a reload."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = Path(temp_dir) / "writeup.pdf"
+        document = fitz.open()
+        for text in PAGES:
+            document.new_page().insert_text((72, 72), text)
+        document.save(pdf_path)
+        document.close()
+
+        pipeline = ConversionPipeline()
+        with PDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            result = pipeline.convert(processor, fallback_title="Writeup")
+            output_path = Path(temp_dir) / "writeup.md"
+            streamed = pipeline.convert_to_file(processor, str(output_path), fallback_title="Writeup")
+
+        index = result["heading_index"]
+        assert [entry.slug for entry in index.entries] == [
+            "enumeration", "web-server", "enumeration-1", "privilege-escalation"
+        ]
+        assert "(#enumeration-1)" in result["markdown"]
+
+        # Byte ranges cut the section out of the markdown
+        markdown_bytes = result["markdown"].encode("utf-8")
+        start, end = index.section_range("enumeration-1")
+        section = markdown_bytes[start:end].decode("utf-8")
+        assert section.startswith("# ENUMERATION") and "gobuster" in section
+        assert "PRIVILEGE" not in section
+
+        # The streamed file has the same offsets, and the index can be reloaded
+        index_path = Path(temp_dir) / "writeup.headings.json"
+        streamed["heading_index"].save(str(index_path))
+        loaded = HeadingIndex.load(str(index_path))
+        assert loaded.read_section(str(output_path), "privilege-escalation") == \
+            markdown_bytes[slice(*index.section_range("privilege-escalation"))].decode("utf-8")
+
+        # Headings added later continue the numbering
+        assert loaded.add_heading("ENUMERATION", 1).slug == "enumeration-2"
+        print(f"✅ {len(index.entries)} sections indexed with byte offsets")
+
+def test_render_single_section():
+    """A saved section index lets one section be rendered from its own pages."""
+
+    from test_pipeline import CountingPDFProcessor, _make_pdf
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        output_path = Path(temp_dir) / "meow.md"
+        pipeline = ConversionPipeline()
+
+        with CountingPDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            result = pipeline.convert_to_file(processor, str(output_path))
+            assert result["section_index_path"] == str(Path(temp_dir) / "meow.sections.json")
+
+            index = HeadingIndex.load(result["section_index_path"])
+            assert index.page_range("foothold") == (2, 4)
+            assert index.page_range("privilege-escalation") == (4, 5)
+
+            # Only the section's pages are extracted, and the markdown matches
+            processor.extracted_pages.clear()
+            section = pipeline.render_section(processor, index, "Foothold")
+            assert processor.extracted_pages == [2, 3]
+            assert section.startswith("# FOOTHOLD") and "without a password" in section
+            assert "PRIVILEGE" not in section and "nmap" not in section
+            # The byte range also covers the next page's marker, up to the next heading
+            assert index.read_section(str(output_path), "foothold").startswith(section)
+            print("✅ Single section rendered from 2 of 5 pages")
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src.content_analyzer import ContentAnalyzer, image_ref_line
+from src.image_exporter import ImageExporter
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+
+def _png(width: int, height: int, color) -> bytes:
+    """A solid-color PNG."""
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, width, height), False)
+    pixmap.set_rect(pixmap.irect, color)
+    return pixmap.tobytes("png")
+
+def _make_pdf(directory: Path) -> Path:
+    """Three pages sharing a logo, with a screenshot between two lines on page 2."""
+    pdf_path = directory / "screenshots.pdf"
+    document = fitz.open()
+    logo = _png(16, 16, (200, 0, 0))
+    logo_xref = 0
+    for number in range(3):
+        page = document.new_page()
+        page.insert_text((72, 72), f"ENUMERATION {number + 1}\nnmap -sV 10.129.1.17")
+        logo_rect = fitz.Rect(500, 20, 520, 40)
+        if logo_xref:
+            page.insert_image(logo_rect, xref=logo_xref)
+        else:
+            logo_xref = page.insert_image(logo_rect, stream=logo)
+    page = document[1]
+    page.insert_image(fitz.Rect(72, 120, 272, 220), stream=_png(64, 32, (0, 0, 255)))
+    page.insert_text((72, 250), "The scan shows telnet on port 23.")
+    document.save(pdf_path)
+    document.close()
+    return pdf_path
+
+def test_image_export():
+    """Each image xref is written once and referenced where it appears."""
+
+    # Only references inserted by the exporter are images, not image syntax in the PDF text
+    analyzer = ContentAnalyzer()
+    block = analyzer.classify_line(image_ref_line("Logo", "images/logo.png"))
+    assert (block.content_type, block.text) == ("image", "![Logo](images/logo.png)")
+    assert block.metadata == {"alt": "Logo", "src": "images/logo.png"}
+    assert analyzer.classify_line("![x](y)").content_type != "image"
+    assert analyzer.classify_lines(["![x](y)"])[0].content_type != "image"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        image_dir = Path(temp_dir) / "images"
+        exporter = ImageExporter(str(image_dir), link_prefix="images", max_pending_bytes=1)
+        pipeline = ConversionPipeline(image_exporter=exporter)
+
+        with PDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            pages_by_xref = exporter.collect_images(processor.current_document)
+            result = pipeline.convert(processor)
+
+        # The logo is used on every page, the screenshot only on page 2
+        assert sorted(pages_by_xref.values()) == [[0, 1, 2], [1]]
+        screenshot_xref = next(xref for xref, pages in pages_by_xref.items() if pages == [1])
+
+        stats = result["images"]
+        assert stats["unique_images"] == 2 and stats["images_written"] == 2
+        assert stats["references"] == 4
+        prefix = exporter.file_prefix
+        assert prefix.startswith("screenshots_")
+        assert sorted(path.name for path in image_dir.iterdir()) == \
+            sorted(f"{prefix}_{xref:05d}.png" for xref in pages_by_xref)
+
+        # The screenshot sits between the command and the following paragraph
+        markdown = result["markdown"]
+        screenshot = f"![Image {screenshot_xref} (page 2)](images/{prefix}_{screenshot_xref:05d}.png)"
+        assert markdown.index("10.129.1.17", markdown.index("ENUMERATION 2")) < markdown.index(screenshot) \
+            < markdown.index("telnet on port 23")
+        assert "\x00" not in markdown
+        print(f"✅ {stats['unique_images']} images written for {stats['references']} references")
+
+def test_image_links_and_names():
+    """Links are relative to the markdown file, names differ per document, writers stop."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        output_dir = Path(temp_dir) / "out"
+        exporter = ImageExporter(str(output_dir / "images"))
+        pipeline = ConversionPipeline(image_exporter=exporter)
+
+        (output_dir / "notes").mkdir(parents=True)
+
+        with PDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            result = pipeline.convert_to_file(processor, str(output_dir / "notes" / "box.md"))
+            assert f"](../images/{exporter.file_prefix}_" in Path(result["output_path"]).read_text()
+            print("✅ Image links are relative to the markdown file")
+
+            # The preview stops early, but the writer threads are still shut down
+            assert len(pipeline.preview_markdown(processor, max_lines=3)) == 3
+            assert exporter.executor is None
+
+            # A preview links the images without writing them again
+            shutil.rmtree(output_dir / "images")
+            written = exporter.images_written
+            markdown_lines = Path(result["output_path"]).read_text().split("\n")
+            assert pipeline.preview_markdown(processor, max_lines=len(markdown_lines)) == markdown_lines
+            assert not (output_dir / "images").exists() and exporter.images_written == written
+
+        # Documents with the same name in different folders get different files
+        exporter.begin_document("a/meow.pdf")
+        first_prefix = exporter.file_prefix
+        exporter.begin_document("b/meow.pdf")
+        assert first_prefix != exporter.file_prefix and first_prefix.startswith("meow_")
+        print("✅ Same-named documents don't share image files")
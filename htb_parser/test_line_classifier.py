@@ -0,0 +1,81 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from src.content_analyzer import ClassifierBackend, ContentAnalyzer
+from classification_corpus import split_corpus
+
+np = pytest.importorskip("numpy")
+from src.line_classifier import NgramLineClassifier, load_backend
+from src.pipeline import ConversionPipeline
+
+def test_model_learns_regex_labels():
+    """A model bootstrapped from the regex rules should mostly agree with them."""
+
+    analyzer = ContentAnalyzer()
+    training_lines, held_out = split_corpus()
+
+    classifier, report = NgramLineClassifier.train_from_regex(training_lines, analyzer)
+    labels = [analyzer.classify_line(line).content_type for line in held_out]
+    agreement = classifier.evaluate(held_out, labels)
+
+    # Held-out lines come from unseen documents and never occur in training
+    majority = labels.count("text") / len(labels)
+    assert not set(held_out) & set(training_lines)
+    assert report["agreement"] > 0.99
+    assert agreement > 0.9 and agreement > majority + 0.15
+    print(f"✅ Training agreement {report['agreement']:.3f}, held-out agreement {agreement:.3f} "
+          f"(all \"text\": {majority:.3f})")
+
+    # Saved models classify exactly like the original
+    with tempfile.TemporaryDirectory() as temp_dir:
+        model_path = Path(temp_dir) / "line_classifier.npz"
+        classifier.save(str(model_path))
+        loaded = NgramLineClassifier.load(str(model_path))
+        assert loaded.predict(held_out) == classifier.predict(held_out)
+
+        # Training is seeded, so the build step always gives the same model
+        retrained, _ = NgramLineClassifier.train_from_regex(training_lines, analyzer)
+        assert np.array_equal(retrained.weights, classifier.weights)
+
+        # The pipeline picks its backend by name
+        pipeline = ConversionPipeline(classifier_backend="ngram", model_path=str(model_path))
+        assert isinstance(pipeline.content_analyzer.backend, NgramLineClassifier)
+        assert ConversionPipeline().content_analyzer.backend.name == "regex"
+        assert load_backend("regex") is None
+        for name, path, error in [("svm", None, ValueError),
+                                  ("ngram", str(Path(temp_dir) / "missing.npz"), FileNotFoundError)]:
+            with pytest.raises(error):
+                load_backend(name, path)
+        print("✅ Backend selected by name")
+
+def test_analyzer_uses_backend():
+    """ContentAnalyzer hands batches to the configured backend."""
+
+    # A backend has to implement predict()
+    with pytest.raises(TypeError):
+        ClassifierBackend()
+
+    class ShoutBackend(ClassifierBackend):
+        name = "shout"
+
+        def predict(self, lines):
+            return ["heading" if line.isupper() else "text" for line in lines]
+
+    analyzer = ContentAnalyzer(backend=ShoutBackend())
+    blocks = analyzer.analyze_text("--- Page 1 ---\nENUMERATION\n\nnmap -sV 10.10.10.1")
+
+    assert [block.content_type for block in blocks] == ["text", "heading", "empty", "text"]
+    assert blocks[1].metadata == {"level": 1}
+    assert (blocks[3].page_number, blocks[3].line_number) == (1, 2)
+
+    # The n-gram model plugs in the same way, including odd input
+    training_lines, _ = split_corpus()
+    classifier, _ = NgramLineClassifier.train_from_regex(training_lines)
+    model_analyzer = ContentAnalyzer(backend=classifier)
+    blocks = model_analyzer.classify_lines(["nmap -sV 10.10.10.1", "", "a\nb", "ſudo ls"])
+    assert len(blocks) == 4
+    assert blocks[0].content_type == "command"
+    assert blocks[1].content_type == "empty"
+    print("✅ Backends plug into ContentAnalyzer")
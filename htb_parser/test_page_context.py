@@ -0,0 +1,59 @@
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src.page_context import PageContext, get_profile
+from src.pdf_processor import PDFProcessor
+from test_image_exporter import _make_pdf
+
+def test_page_context_reuse():
+    """Text, layout and page info of a page come from one parse."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        document = fitz.open(pdf_path)
+        expected = [(page.get_text(), len(page.get_text("dict")["blocks"]), len(page.get_images()))
+                    for page in document]
+        document.close()
+
+        with PDFProcessor(profile="full") as processor:
+            assert processor.load_pdf(str(pdf_path))
+            for page_number, (text, blocks, images) in enumerate(expected):
+                assert processor.extract_text_from_page(page_number) == text
+                info = processor.get_page_info(page_number)
+                assert (info["text_blocks"], info["image_count"]) == (blocks, images)
+                assert processor.extract_text_from_page(page_number) == text
+            stats = processor.get_extraction_statistics()
+            assert stats["textpages_built"] == len(expected)
+            assert stats["reparses_avoided"] == len(expected)
+        print(f"✅ One parse per page with the full profile: {stats}")
+
+        # The text profile skips image blocks, so page info needs its own parse
+        with PDFProcessor(profile="text") as processor:
+            assert processor.load_pdf(str(pdf_path))
+            assert processor.extract_text_from_page(0) == expected[0][0]
+            assert processor.get_page_info(0)["text_blocks"] == expected[0][1]
+            assert processor.get_extraction_statistics()["textpages_built"] == 2
+        print("✅ Text profile parses again only when image blocks are needed")
+
+        # The default profile switches to "full" once page info is asked for
+        with PDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            for page_number, (text, blocks, images) in enumerate(expected):
+                assert processor.extract_text_from_page(page_number) == text
+                assert processor.get_page_info(page_number)["text_blocks"] == blocks
+            # Only the first page was parsed before page info was wanted
+            assert processor.get_extraction_statistics()["textpages_built"] == len(expected) + 1
+        print("✅ Default profile parses each page once after the first page info")
+
+    assert get_profile("full").covers(get_profile("text"))
+    assert not get_profile("text").covers(get_profile("full"))
+    try:
+        PageContext(None, "ocr")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_page_context_reuse()
@@ -0,0 +1,85 @@
+import tempfile
+from pathlib import Path
+
+from src import page_deduplicator
+from src.page_deduplicator import PageDeduplicator
+
+COVER = ("Hack The Box writeup. Prepared by the HTB content team for educational use only. "
+         "Do not distribute outside of the platform. All rights reserved by Hack The Box Ltd. "
+         "The techniques shown in this document must only be used against machines you own "
+         "or are explicitly authorised to test, such as the retired and active machines on the "
+         "Hack The Box platform. Unauthorised access to computer systems is illegal in most "
+         "countries. The authors accept no liability for misuse of the information contained "
+         "in this writeup. Please report any mistakes or outdated steps to the content team so "
+         "the document can be updated for future students of the Starting Point tier.")
+
+def test_page_deduplication():
+    """Test exact and near-duplicate pages across documents and runs."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = str(Path(temp_dir) / "fingerprints.sqlite3")
+
+        dedup = PageDeduplicator(store)
+        meow = list(dedup.filter_pages("meow.pdf", [(0, COVER), (1, "nmap -sV 10.129.1.17")]))
+        assert meow[0][1] == COVER
+
+        # Same cover with different spacing, and with one word changed
+        fawn_cover = COVER.replace(". ", ".\n  ")
+        dancing_cover = COVER.replace("educational", "training")
+        fawn = list(dedup.filter_pages("fawn.pdf", [(0, fawn_cover), (1, "ftp 10.129.1.18")]))
+        dancing = list(dedup.filter_pages("dancing.pdf", [(0, dancing_cover)], mode="skip"))
+
+        assert fawn[0][1] == "(Duplicate of page 1 in meow.pdf)"
+        assert fawn[1][1] == "ftp 10.129.1.18"
+        # A near-duplicate keeps its text and is only reported
+        assert dancing[0][1] == dancing_cover
+
+        stats = dedup.get_statistics()
+        assert stats["exact_duplicates"] == stats["pages_skipped"] == 1
+        assert stats["near_duplicates"] == 1
+        assert stats["near_matches"][0]["doc_key"] == "dancing.pdf"
+        assert stats["near_matches"][0]["similar_to"]["doc_key"] == "meow.pdf"
+        print(f"📊 Dedup statistics: {stats}")
+        dedup.close()
+
+        # Fingerprints persist across runs, and re-converting a document
+        # doesn't match against its own earlier pages
+        dedup = PageDeduplicator(store)
+        dedup.begin_document("meow.pdf")
+        rerun = list(dedup.filter_pages("meow.pdf", [(0, COVER)]))
+        assert rerun[0][1] == COVER
+        redeemer = list(dedup.filter_pages("redeemer.pdf", [(0, COVER)]))
+        assert redeemer[0][1] == "(Duplicate of page 1 in meow.pdf)"
+        print("✅ Fingerprints persisted across runs")
+
+        # Re-converting a page range only forgets those pages
+        list(dedup.filter_pages("oopsie.pdf", [(0, "gobuster dir -u http://10.129.1.19"), (1, COVER)]))
+        dedup.begin_document("meow.pdf", 1, 2)
+        assert list(dedup.filter_pages("redeemer.pdf", [(1, COVER)]))[0][1] == \
+            "(Duplicate of page 1 in meow.pdf)"
+
+        # A read-only pass links copies without remembering anything
+        seen = dedup.get_statistics()["pages_seen"]
+        preview = list(dedup.filter_pages("tactics.pdf", [(0, "smbclient -L 10.129.1.20"), (1, COVER)],
+                                          record=False))
+        assert preview[1][1] == "(Duplicate of page 1 in meow.pdf)"
+        assert list(dedup.filter_pages("archetype.pdf", [(0, "smbclient -L 10.129.1.20")]))[0][1] == \
+            "smbclient -L 10.129.1.20"
+        assert dedup.get_statistics()["pages_seen"] == seen + 1
+        dedup.close()
+        print("✅ Partial and read-only passes keep the other fingerprints")
+
+def test_simhash_without_numpy(monkeypatch):
+    """The pure Python SimHash gives the same fingerprints as the numpy one."""
+
+    dedup = PageDeduplicator()
+    texts = [dedup.normalize_text(COVER), dedup.normalize_text(COVER.replace("educational", "training")),
+             "single", "two words"]
+    fingerprints = [dedup.simhash(text) for text in texts]
+    monkeypatch.setattr(page_deduplicator, "np", None)
+    assert [dedup.simhash(text) for text in texts] == fingerprints
+    assert bin(fingerprints[0] ^ fingerprints[1]).count("1") <= dedup.max_distance
+    dedup.close()
+
+if __name__ == "__main__":
+    test_page_deduplication()
@@ -0,0 +1,122 @@
+import tempfile
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from src.artifact_store import DOCUMENT_PAGE, FileArtifactStore
+from src.page_deduplicator import PageDeduplicator
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+
+PAGES = [
+    "ENUMERATION\nnmap -sV 10.129.1.17",
+    "The target runs Telnet on port 23.",
+    "FOOTHOLD\ntelnet 10.129.1.17",
+    "We log in as root without a password.",
+    "PRIVILEGE ESCALATION\nNot needed on this box.",
+]
+
+class CountingPDFProcessor(PDFProcessor):
+    """PDFProcessor that remembers which pages were extracted."""
+
+    def __init__(self):
+        super().__init__()
+        self.extracted_pages = []
+
+    def extract_text_from_page(self, page_number: int) -> str:
+        self.extracted_pages.append(page_number)
+        return super().extract_text_from_page(page_number)
+
+class CountingArtifactStore(FileArtifactStore):
+    """FileArtifactStore that counts the artifacts written."""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.puts = 0
+
+    def put(self, doc_key: str, kind: str, data: bytes, page: int = DOCUMENT_PAGE):
+        self.puts += 1
+        super().put(doc_key, kind, data, page)
+
+def _make_pdf(directory: Path) -> Path:
+    """Create a small multi-page writeup PDF."""
+    pdf_path = directory / "meow.pdf"
+    document = fitz.open()
+    for text in PAGES:
+        page = document.new_page()
+        page.insert_text((72, 72), text)
+    document.save(pdf_path)
+    document.close()
+    return pdf_path
+
+def test_lazy_pipeline():
+    """Test page ranges, early exit and lazy previews."""
+
+    pipeline = ConversionPipeline()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+
+        with CountingPDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+
+            # Full conversion matches the step-by-step flow
+            result = pipeline.convert(processor)
+            blocks = pipeline.content_analyzer.analyze_text(processor.extract_all_text())
+            assert [b.text for b in result["content_blocks"]] == [b.text for b in blocks]
+
+            # Page range
+            processor.extracted_pages.clear()
+            result = pipeline.convert(processor, start_page=2, end_page=4)
+            assert processor.extracted_pages == [2, 3]
+            assert "telnet" in result["markdown"] and "nmap" not in result["markdown"]
+            print("✅ Page range conversion works")
+
+            # Preview shows the first lines of the full markdown (title and
+            # TOC included) but only extracts what it needs
+            markdown_lines = pipeline.convert(processor)["markdown"].split('\n')
+            processor.extracted_pages.clear()
+            lines = pipeline.preview_markdown(processor, max_lines=4)
+            assert lines == markdown_lines[:4]
+            assert processor.extracted_pages == [0, 1, 2]
+            print(f"✅ Preview extracted pages {processor.extracted_pages}")
+            assert pipeline.preview_markdown(processor, max_lines=20) == markdown_lines[:20]
+
+            # Section between two headings, stopping early
+            processor.extracted_pages.clear()
+            section = list(pipeline.iter_blocks(processor, start_at_heading="^FOOTHOLD",
+                                                stop_at_heading="PRIVILEGE"))
+            assert section[0].text == "FOOTHOLD"
+            assert "root" in " ".join(block.text for block in section)
+            assert processor.extracted_pages == [0, 1, 2, 3, 4]
+            print(f"✅ Section extracted: {len(section)} blocks")
+
+def test_read_only_passes():
+    """Previews and sections don't store pages or touch the fingerprints."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        store = CountingArtifactStore(str(Path(temp_dir) / "artifacts"))
+        dedup = PageDeduplicator()
+        pipeline = ConversionPipeline(artifact_store=store, page_deduplicator=dedup)
+
+        with CountingPDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            result = pipeline.convert(processor)
+            puts = store.puts
+            fingerprints = dedup.connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone()
+            seen = dedup.get_statistics()["pages_seen"]
+
+            assert pipeline.preview_markdown(processor, max_lines=4) == result["markdown"].split('\n')[:4]
+            section = list(pipeline.iter_section_blocks(processor, result["heading_index"], "FOOTHOLD"))
+            assert section[0].text == "FOOTHOLD"
+
+            assert store.puts == puts
+            assert dedup.connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone() == fingerprints
+            assert dedup.get_statistics()["pages_seen"] == seen
+        dedup.close()
+        print("✅ Preview and section left the store and fingerprints alone")
+
+if __name__ == "__main__":
+    test_lazy_pipeline()
+    test_read_only_passes()
@@ -0,0 +1,57 @@
+import random
+
+from src.content_analyzer import MAX_HEADING_LENGTH, ContentAnalyzer, build_block
+from classification_corpus import corpus_lines
+
+def classify_without_prefilter(analyzer: ContentAnalyzer, line: str):
+    """The original cascade: run every pattern family in priority order."""
+    line = line.strip()
+    if not line:
+        return build_block(line, "empty")
+    rules = analyzer.rules
+    for family, patterns, anchored in [("command", rules.command_patterns, True),
+                                       ("code", rules.code_patterns, False),
+                                       ("heading", rules.heading_patterns, True),
+                                       ("url", rules.url_patterns, False),
+                                       ("network", rules.network_patterns, False),
+                                       ("path", rules.path_patterns, False)]:
+        if family == "heading" and len(line) > MAX_HEADING_LENGTH:
+            continue
+        if any(pattern.match(line) if anchored else pattern.search(line) for pattern in patterns):
+            return build_block(line, family)
+    return build_block(line, "text")
+
+def _fuzz_lines(count: int):
+    """Random lines built from characters the patterns care about."""
+    rng = random.Random(1337)
+    alphabet = "aAzZ09 -_./\\:$#!~()<?>\tſKıİé"
+    words = ["nmap", "SUDO", "ſu", "def f(", "public class", "<?php", "import os",
+             "http://", "ftp://", "10.10.10.1", "port 22", "::", "/etc", "C:\\x", "~/"]
+    lines = []
+    for _ in range(count):
+        parts = [rng.choice(words) if rng.random() < 0.3 else
+                 "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 8)))
+                 for _ in range(rng.randint(1, 4))]
+        lines.append(rng.choice(["", " "]).join(parts))
+    return lines
+
+def test_prefilter_keeps_classification():
+    """Skipping families via prefilters must never change a result."""
+
+    analyzer = ContentAnalyzer()
+    lines = corpus_lines() + _fuzz_lines(20000)
+
+    wanted = [classify_without_prefilter(analyzer, line) for line in lines]
+    for line, want in zip(lines, wanted):
+        got = analyzer.classify_line(line)
+        assert (got.content_type, got.metadata) == (want.content_type, want.metadata), line
+
+    # The batch path checks each family once for all lines
+    _, content_types = analyzer.line_types(lines)
+    for line, want, content_type in zip(lines, wanted, content_types):
+        assert content_type == want.content_type, line
+
+    print(f"✅ {len(lines)} lines classified identically with prefilters and in one batch")
+
+if __name__ == "__main__":
+    test_prefilter_keeps_classification()
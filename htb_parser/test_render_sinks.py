@@ -0,0 +1,84 @@
+import io
+import json
+
+from src.content_analyzer import ContentAnalyzer
+from src.markdown_generator import MarkdownGenerator
+from src.block_exporter import BlockExporter
+from src.render_sinks import (FanOutRenderer, HeadingIndexSink, JsonlExportSink, MarkdownBodySink,
+                              RenderSink, StatsSink, TocSink)
+from classification_corpus import REPO_ROOT
+
+class CountingBlocks:
+    """Iterable of blocks that counts how often it is walked."""
+
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.passes = 0
+
+    def __iter__(self):
+        self.passes += 1
+        return iter(self.blocks)
+
+def test_fan_out_matches_separate_passes():
+    """Every sink gives the same output as its own traversal, from one pass."""
+
+    analyzer = ContentAnalyzer()
+    generator = MarkdownGenerator()
+    text = (REPO_ROOT / "meow_notes" / "wiki3_network_enumeration_with_nmap.md").read_text(encoding="utf-8")
+    blocks = CountingBlocks(analyzer.analyze_text(text))
+
+    export = io.StringIO()
+    streamed_body = io.StringIO()
+
+    class HeadingCounter(RenderSink):
+        name = "headings"
+
+        def __init__(self):
+            self.count = 0
+
+        def consume(self, block):
+            self.count += block.content_type == "heading"
+
+        def finish(self):
+            return self.count
+
+    results = FanOutRenderer([
+        MarkdownBodySink(generator),
+        TocSink(generator),
+        StatsSink(),
+        JsonlExportSink(export, "meow.md"),
+        HeadingCounter(),
+    ]).render(blocks)
+    assert blocks.passes == 1
+
+    assert results["markdown"] == generator.generate_markdown(blocks.blocks)
+    assert results["toc"] == generator.generate_table_of_contents(blocks.blocks)
+    assert results["statistics"] == analyzer.get_statistics(blocks.blocks)
+    assert results["export"] == len(export.getvalue().splitlines())
+    assert json.loads(export.getvalue().splitlines()[0])["doc_key"] == "meow.md"
+    exported = io.StringIO()
+    BlockExporter().write_jsonl(blocks.blocks, exported, "meow.md")
+    assert export.getvalue() == exported.getvalue()
+    assert results["headings"] == results["statistics"]["content_types"]["heading"]
+
+    # The body can also be streamed to a file
+    FanOutRenderer([MarkdownBodySink(generator, output=streamed_body)]).render(blocks)
+    assert streamed_body.getvalue() == results["markdown"]
+    print(f"✅ {len(results)} outputs rendered in one pass over {len(blocks.blocks)} blocks")
+
+    # A heading index reads its body sink's offsets, so the body must come first
+    body = MarkdownBodySink(generator)
+    for sinks in ([HeadingIndexSink(body), body], [HeadingIndexSink(body)]):
+        try:
+            FanOutRenderer(sinks)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    FanOutRenderer([body, HeadingIndexSink(body)])
+
+    # consume() is abstract
+    try:
+        RenderSink()
+        assert False, "expected TypeError"
+    except TypeError:
+        pass
@@ -0,0 +1,123 @@
+import json
+import re
+import tempfile
+from pathlib import Path
+
+import src.ruleset as ruleset_module
+from src.content_analyzer import ContentAnalyzer
+from src.markdown_generator import MarkdownGenerator
+from src.ruleset import (DEFAULT_RULESET_PATH, RulesetError, clear_loaded_rulesets, default_cache_dir,
+                         derive_trigger, load_ruleset)
+from classification_corpus import corpus_lines
+
+def _write_rules(directory: Path, rules: dict) -> str:
+    """Write a rules file and return its path."""
+    path = directory / "rules.json"
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    return str(path)
+
+def test_ruleset_cache(monkeypatch):
+    """A compiled ruleset is cached on disk by hash and reused."""
+
+    # The disk cache is opt-in
+    monkeypatch.delenv("HTB_PARSER_CACHE_DIR", raising=False)
+    assert default_cache_dir() is None
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        monkeypatch.setenv("HTB_PARSER_CACHE_DIR", temp_dir)
+        assert default_cache_dir() == Path(temp_dir) / "rulesets"
+
+        clear_loaded_rulesets()
+        first = load_ruleset()
+        cached = list((Path(temp_dir) / "rulesets").glob("ruleset-*.json"))
+        assert [path.name for path in cached] == [f"ruleset-{first.ruleset_hash}.json"]
+
+        # A new process (simulated by clearing the in-memory copies) skips compiling
+        def fail_compile(rules, ruleset_hash):
+            raise AssertionError("the cached ruleset should be used")
+
+        clear_loaded_rulesets()
+        monkeypatch.setattr(ruleset_module, "compile_ruleset", fail_compile)
+        second = load_ruleset(cache_dir=Path(temp_dir) / "rulesets")
+        monkeypatch.undo()
+        assert second.families == first.families and second.markdown == first.markdown
+
+        # Within a process every analyzer shares the same ruleset
+        assert load_ruleset() is second
+        clear_loaded_rulesets()
+    print(f"✅ Ruleset {first.ruleset_hash} compiled once and loaded from the cache")
+
+def test_ruleset_validation_and_custom_rules():
+    """Invalid rules files are rejected; valid ones change classification."""
+
+    rules = json.loads(DEFAULT_RULESET_PATH.read_text(encoding="utf-8"))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        directory = Path(temp_dir)
+
+        for broken, message in [
+            ({"patterns": {**rules["patterns"], "shell_prompt": "^\\$("}}, "not a valid regex"),
+            ({"markdown": {**rules["markdown"], "url_pattern": "missing"}}, "unknown pattern"),
+            ({"patterns": {**rules["patterns"], "all_caps": "[A-Z\\s]+$"}}, "must start with ^"),
+            ({"content_types": {**rules["content_types"], "url": ["http_url"]}}, "must be an object"),
+        ]:
+            try:
+                load_ruleset(_write_rules(directory, {**rules, **broken}), use_cache=False)
+                assert False, f"expected RulesetError: {message}"
+            except RulesetError as e:
+                assert message in str(e)
+
+        # A custom rule: ncat is a command even without flags
+        custom = json.loads(json.dumps(rules))
+        custom["patterns"]["ncat"] = "^ncat\\b"
+        custom["content_types"]["command"]["patterns"].append("ncat")
+        custom_rules = load_ruleset(_write_rules(directory, custom), use_cache=False)
+
+        assert ContentAnalyzer().classify_line("ncat 10.129.1.17 4444").content_type == "network"
+        analyzer = ContentAnalyzer(ruleset=custom_rules)
+        assert analyzer.classify_line("ncat 10.129.1.17 4444").content_type == "command"
+        assert analyzer.classify_lines(["ncat 10.129.1.17 4444"])[0].content_type == "command"
+        # Analyzers compile each ruleset once per process
+        assert ContentAnalyzer(ruleset=custom_rules).rules is analyzer.rules
+        assert ContentAnalyzer().rules is not analyzer.rules
+    print("✅ Rules files are validated and custom rules take effect")
+
+def test_derived_triggers():
+    """Triggers are derived from the patterns and never rule out a match."""
+
+    assert derive_trigger(r"\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b") == r"\.[0-9]"
+    assert derive_trigger(r"^(nmap|hydra)") == "nmap|hydra"
+    assert derive_trigger(r"https?://x") == "https://x|http://x"
+    assert derive_trigger(r"from\s+\w+\s+import") == "import"
+    assert derive_trigger(r"^[A-Z\s]+$") is None  # Nothing selective to check first
+
+    rules = json.loads(DEFAULT_RULESET_PATH.read_text(encoding="utf-8"))
+    ruleset = load_ruleset()
+    lines = [line.strip() for line in corpus_lines()]
+    for family, spec in ruleset.families.items():
+        for name in rules["content_types"][family]["patterns"]:
+            pattern = re.compile(rules["patterns"][name], spec["flags"])
+            trigger = derive_trigger(rules["patterns"][name], spec["flags"])
+            if trigger is None:
+                continue
+            trigger = re.compile(trigger, spec["flags"] | re.MULTILINE)
+            for line in lines:
+                if pattern.search(line):
+                    assert trigger.search(line), (name, line)
+    print("✅ Derived triggers hold for every pattern")
+
+def test_language_automaton_matches_keyword_loop():
+    """The single-regex language lookup picks the same language as checking each list."""
+
+    generator = MarkdownGenerator()
+
+    def first_language(command: str) -> str:
+        for language, tools in generator.language_mappings.items():
+            if any(tool in command for tool in tools):
+                return language
+        return ""
+
+    for line in corpus_lines() + ["selection", "php -r 'select 1'", "powershell -ep bypass"]:
+        command = line.lower()
+        assert generator._find_matching_language(command) == first_language(command), line
+    print("✅ Language detection matches the keyword tables")
@@ -0,0 +1,73 @@
+from src.content_analyzer import ContentAnalyzer
+from src.search_index import INSERT_BATCH_SIZE, SearchIndex
+from src.spill_buffer import SpillBuffer
+
+def test_search_index():
+    """Test indexing writeups and querying commands, ports and text."""
+
+    analyzer = ContentAnalyzer()
+    meow = analyzer.analyze_text(
+        "--- Page 1 ---\nENUMERATION\nnmap -sV 10.129.1.17\n23/tcp open telnet\n"
+        "--- Page 2 ---\nWe log in with root and no password."
+    )
+    archetype = analyzer.analyze_text(
+        "--- Page 1 ---\nsmbclient -N -L \\\\\\\\10.129.1.2\\\\\nSMB is running on port 445.\n"
+        "hashcat -m 1000 hashes.txt /usr/share/wordlists/rockyou.txt"
+    )
+
+    with SearchIndex(":memory:") as index:
+        assert index.add_document("meow.pdf", meow, "Meow")
+        assert index.add_document("archetype.pdf", archetype, "Archetype")
+
+        # Unchanged documents are skipped on re-index
+        assert not index.add_document("meow.pdf", meow, "Meow")
+
+        hashcat = index.find_commands("hashcat")
+        assert [hit["doc_key"] for hit in hashcat] == ["archetype.pdf"]
+        print(f"✅ hashcat commands: {hashcat}")
+
+        assert index.find_documents_mentioning("port", "445") == ["archetype.pdf"]
+        assert index.find_documents_mentioning("port", "23") == ["meow.pdf"]
+
+        hits = index.search("root password")
+        assert hits and hits[0]["doc_key"] == "meow.pdf"
+        assert hits[0]["page_number"] == 2
+        print(f"✅ Full-text hit: {hits[0]}")
+
+        # Each document records the rowid range of its blocks for deletes
+        ranges = index.connection.execute(
+            "SELECT first_block, last_block FROM documents ORDER BY first_block").fetchall()
+        assert ranges[0]["last_block"] + 1 == ranges[1]["first_block"]
+        blocks_before = index.get_statistics()["blocks"]
+
+        assert index.remove_document("meow.pdf")
+        assert index.search("root password") == []
+        assert index.search("hashcat")
+        assert index.get_statistics()["blocks"] == blocks_before - sum(
+            1 for block in meow if block.content_type != "empty" and not block.page_marker)
+        print(f"📊 Index statistics: {index.get_statistics()}")
+
+        # Page separator lines aren't searchable text
+        assert index.search("Page") == []
+
+def test_search_index_streams_spilled_blocks():
+    """A spilled SpillBuffer is indexed in batches without being copied into a list."""
+
+    analyzer = ContentAnalyzer()
+    text = "\n".join(f"--- Page {page} ---\nsmbclient -N -L host{page}\nport {page}"
+                     for page in range(1, INSERT_BATCH_SIZE + 2))
+
+    with SpillBuffer(4096) as blocks, SearchIndex(":memory:") as index:
+        blocks.extend(analyzer.iter_analyze_text(text))
+        assert blocks.get_statistics()["segments"] > 1
+
+        assert index.add_document("big.pdf", blocks, "Big")
+        assert index.get_statistics()["blocks"] == 2 * (INSERT_BATCH_SIZE + 1)
+        assert index.find_documents_mentioning("port", str(INSERT_BATCH_SIZE + 1)) == ["big.pdf"]
+        hits = index.search(f"host{INSERT_BATCH_SIZE}")
+        assert [(hit["page_number"], hit["content_type"]) for hit in hits] == [(INSERT_BATCH_SIZE, "command")]
+        assert not index.add_document("big.pdf", blocks, "Big")
+        print(f"✅ Spilled blocks indexed: {index.get_statistics()}")
+
+if __name__ == "__main__":
+    test_search_index()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+from pathlib import Path
+
+from src.content_analyzer import ContentAnalyzer
+from src.pdf_processor import PDFProcessor
+from src.pipeline import ConversionPipeline
+from src.spill_buffer import MemoryBudget, PageTextBuffer, SpillBuffer, TextSpool
+from test_pipeline import _make_pdf
+
+def test_spill_buffer():
+    """Blocks over the budget go to disk and come back in order."""
+
+    analyzer = ContentAnalyzer()
+    text = "--- Page 1 ---\nENUMERATION\nnmap -sV 10.129.1.17\n\n--- Page 2 ---\nhttp://10.129.1.17/admin"
+    blocks = analyzer.analyze_text(text * 20)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with SpillBuffer(memory_budget=4096, spill_dir=temp_dir) as buffer:
+            buffer.extend(blocks)
+            stats = buffer.get_statistics()
+            assert stats["segments"] > 1
+            assert stats["memory_bytes"] <= 4096
+            assert len(buffer) == len(blocks)
+
+            # Iterating twice gives the same blocks both times
+            for _ in range(2):
+                assert list(buffer) == blocks
+            print(f"✅ {stats['spilled_blocks']} blocks spilled to {stats['segments']} segments")
+
+        # Closing removes the segment files
+        assert os.listdir(temp_dir) == []
+
+        # Buffers sharing a budget spill whichever holds the most
+        budget = MemoryBudget(4096)
+        with PageTextBuffer(budget, temp_dir) as pages, TextSpool(budget, temp_dir) as body:
+            for page_number in range(20):
+                pages.append((page_number, "nmap -sV 10.129.1.17\n" * 10))
+                body.write("## ENUMERATION\n" * 10)
+            assert budget.in_use <= 4096
+            assert pages.get_statistics()["spilled_pages"] > 0 and body.get_statistics()["spilled_bytes"] > 0
+            assert list(pages) == [(page_number, "nmap -sV 10.129.1.17\n" * 10) for page_number in range(20)]
+            body.set_head("# Meow\n")
+            assert body.read() == "# Meow\n" + "## ENUMERATION\n" * 200
+        assert os.listdir(temp_dir) == []
+        print(f"✅ Shared budget: peak {budget.peak} bytes buffered")
+
+def test_convert_to_file_with_budget():
+    """Streaming conversion under a tiny budget matches the in-memory result."""
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = _make_pdf(Path(temp_dir))
+        output_path = Path(temp_dir) / "meow.md"
+
+        with PDFProcessor() as processor:
+            assert processor.load_pdf(str(pdf_path))
+            expected = ConversionPipeline().convert(processor)
+
+            pipeline = ConversionPipeline(memory_budget=128, spill_dir=temp_dir)
+            spilled = pipeline.convert(processor)
+            result = pipeline.convert_to_file(processor, str(output_path))
+
+        # Blocks, page texts and the body all spill and stream back unchanged
+        assert spilled["markdown"].read() == expected["markdown"]
+        assert list(spilled["content_blocks"]) == expected["content_blocks"]
+        assert list(spilled["page_texts"]) == expected["page_texts"]
+        memory = spilled["memory"]
+        assert memory["blocks"]["spilled_blocks"] > 0
+        assert memory["page_texts"]["spilled_pages"] > 0
+        assert memory["markdown"]["spilled_bytes"] > 0
+        assert "within_budget" not in memory
+        pipeline.close_result(spilled)
+        assert not [name for name in os.listdir(temp_dir) if name.startswith("htb_spill_")]
+
+        assert output_path.read_text(encoding="utf-8") == expected["markdown"]
+        assert result["statistics"] == expected["statistics"]
+        assert result["memory"]["markdown"]["spilled_bytes"] > 0
+        assert result["memory"]["peak_rss"] is None or result["memory"]["peak_rss"] > 0
+        print(f"✅ Streamed conversion, {result['memory']['peak_buffered_bytes']} bytes buffered at most")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Train the n-gram line classifier from the writeups in this repository.
+
+Every line is labelled by the regex rules, so the model learns to
+reproduce them. Agreement is first measured on documents held out of
+training (see split_corpus()), then the model is trained on every
+distinct line. Training is seeded, so the same corpus and rules always
+give the same model. By default the model is written to
+src/models/line_classifier.npz, where ConversionPipeline(classifier_backend="ngram")
+looks for it.
+
+Usage:
+    python train_line_classifier.py [output.npz]
+"""
+import sys
+import time
+from pathlib import Path
+
+from classification_corpus import corpus_lines, split_corpus
+from src.content_analyzer import ContentAnalyzer
+from src.line_classifier import DEFAULT_MODEL_PATH, NgramLineClassifier
+
+def train_line_classifier(output_path: str = str(DEFAULT_MODEL_PATH)):
+    """Train on all markdown files and extracted text, then save the model."""
+
+    analyzer = ContentAnalyzer()
+    training_lines, held_out = split_corpus()
+    classifier, _ = NgramLineClassifier.train_from_regex(training_lines, analyzer)
+    agreement = classifier.evaluate(held_out, analyzer.rules.content_types(held_out))
+    print(f"🧪 {agreement:.1%} agreement with the regex rules on {len(held_out)} lines "
+          f"from documents held out of training")
+
+    lines = list(dict.fromkeys(line.strip() for line in corpus_lines() if line.strip()))
+    print(f"📚 Training on {len(lines)} distinct lines...")
+    start = time.perf_counter()
+    classifier, report = NgramLineClassifier.train_from_regex(lines, analyzer)
+    print(f"✅ {report['lines']} lines, {report['agreement']:.1%} training agreement "
+          f"({time.perf_counter() - start:.1f}s)")
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    classifier.save(output_path)
+    print(f"💾 Model saved to {output_path}")
+
+if __name__ == "__main__":
+    train_line_classifier(*sys.argv[1:2])